@@ -0,0 +1,372 @@
+"""Бенчмарки загрузки и обработки каталогов для NIR_graphics.py
+
+Запуск: python NIR_benchmarks.py [--rows N] [--only имя_бенчмарка]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from NIR_graphics import CatalogReader, ExpressionBatch, GalaxyNames, NumericCleaner, ParameterExpression
+
+
+def make_raw_numeric_frame(n_rows, n_cols=20, seed=0):
+    """
+    Создает DataFrame "сырых" строковых значений в том виде, в каком их отдает read_csv
+    для колонок с десятичными запятыми, пробелами и пропусками
+
+    Args:
+        n_rows: Количество строк
+        n_cols: Количество колонок
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        pd.DataFrame: Колонки dtype=object
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_cols):
+        values = np.round(rng.normal(10, 5, n_rows), 3).astype(str).astype(object)
+        kind = rng.random(n_rows)
+        values[kind < 0.15] = np.char.replace(values[kind < 0.15].astype(str), '.', ',')
+        values[(kind >= 0.15) & (kind < 0.25)] = '   '
+        values[(kind >= 0.25) & (kind < 0.30)] = np.nan
+        values[(kind >= 0.30) & (kind < 0.32)] = 'n/a'
+        padded = (kind >= 0.32) & (kind < 0.40)
+        values[padded] = np.char.add('  ', values[padded].astype(str))
+        data[f"col{i}"] = pd.Series(values, dtype=object)
+    return pd.DataFrame(data)
+
+
+def timed(func, *args):
+    """Возвращает (результат, время выполнения в секундах)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_numeric_cleaning(n_rows):
+    """Сравнение поячеечной очистки (apply + clean_value) с векторной NumericCleaner.clean_series"""
+
+    def old_path(frame):
+        return {col: frame[col].apply(NumericCleaner.clean_value) for col in frame.columns}
+
+    def new_path(frame):
+        return {col: NumericCleaner.clean_series(frame[col])[0] for col in frame.columns}
+
+    raw_df = make_raw_numeric_frame(n_rows)
+    cases = [
+        ("строковые колонки (запятые, пробелы, пропуски)", raw_df),
+        ("колонки, уже разобранные read_csv как float64",
+         raw_df.apply(lambda col: col.apply(NumericCleaner.clean_value))),
+    ]
+
+    for title, df in cases:
+        old_result, old_time = timed(old_path, df)
+        new_result, new_time = timed(new_path, df)
+
+        for col in df.columns:
+            np.testing.assert_array_equal(old_result[col].to_numpy(dtype=float), new_result[col].to_numpy())
+
+        print(f"Очистка числовых колонок, {title} ({n_rows} строк × {df.shape[1]} колонок):")
+        print(f"  apply(clean_value):  {old_time:.3f} с")
+        print(f"  clean_series:        {new_time:.3f} с  (ускорение ×{old_time / max(new_time, 1e-9):.1f})")
+
+
+def make_hyperleda_csv(path, n_rows, seed=0):
+    """
+    Записывает синтетический каталог в формате выгрузки HyperLeda: ';' как разделитель,
+    строки-комментарии, пропуски, десятичные запятые и пробелы вокруг чисел
+
+    Args:
+        path: Путь к создаваемому файлу
+        n_rows: Количество строк
+        seed: Зерно генератора случайных чисел
+    """
+    rng = np.random.default_rng(seed)
+
+    def numbers(mean, std, decimals, blank_frac=0.1, comma_frac=0.05):
+        text = np.round(rng.normal(mean, std, n_rows), decimals).astype(str)
+        kind = rng.random(n_rows)
+        text = np.where(kind < comma_frac, np.char.replace(text, '.', ','), text)
+        return np.where((kind >= comma_frac) & (kind < comma_frac + blank_frac), '', text)
+
+    names = np.char.add('NGC', rng.integers(1, 8000, n_rows).astype(str))
+    names = np.where(rng.random(n_rows) < 0.3, '', names)
+    df = pd.DataFrame({
+        'pgc': np.arange(1000, 1000 + n_rows),
+        'objname': names,
+        'objtype': 'G',
+        'type': rng.choice(['SBc', 'Sb', 'E', 'S0', ''], n_rows),
+        'bar': rng.choice(['B', ''], n_rows),
+        'ring': rng.choice(['R', ''], n_rows),
+        't': numbers(3, 2, 2),
+        'logd25': numbers(1, 0.3, 3),
+        'bt': np.char.add('  ', numbers(14, 1, 2, comma_frac=0)),
+        'vt': numbers(13, 1, 2),
+        'e_bt': numbers(0.15, 0.03, 3),
+        'e_vt': numbers(0.15, 0.03, 3),
+        'v': numbers(3000, 1500, 0),
+        'vrot': numbers(150, 50, 1, blank_frac=0.3),
+        'vvir': numbers(3000, 1500, 0),
+        'incl': numbers(45, 20, 1),
+    })
+
+    # Комментарии только перед заголовком: read_arrow отказывается от файлов с '#' среди данных
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# HyperLeda: синтетическая выборка для бенчмарка\n")
+        f.write(f"# строк: {n_rows}\n")
+        df.to_csv(f, sep=';', index=False)
+
+
+def clean_catalog(df):
+    """Очистка числовых колонок так же, как GalaxyAnalyzer.clean_numeric_columns"""
+    for col in df.columns:
+        if col.lower() not in ['objname', 'pgc', 'type', 'objtype']:
+            df[col] = NumericCleaner.clean_series(df[col])[0]
+    return df
+
+
+def bench_csv_engines(n_rows):
+    """Сравнение pandas read_csv с многопоточным pyarrow.csv (для полноценной проверки --rows 1000000)"""
+    if not CatalogReader.arrow_available():
+        print("Движки чтения CSV: pyarrow не установлен, бенчмарк пропущен")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'hyperleda.csv')
+        make_hyperleda_csv(path, n_rows)
+        size_mb = os.path.getsize(path) / 1024 ** 2
+
+        pandas_df, pandas_time = timed(lambda: clean_catalog(CatalogReader.read_csv(path, 'utf-8')))
+        arrow_df, arrow_time = timed(lambda: clean_catalog(CatalogReader.read_arrow(path, 'utf-8')))
+
+    # Оба движка должны отдавать один и тот же каталог после очистки
+    pd.testing.assert_frame_equal(pandas_df, arrow_df)
+
+    print(f"Чтение и очистка CSV ({n_rows} строк, {size_mb:.0f} MB, ядер: {os.cpu_count()}):")
+    print(f"  pandas read_csv:  {pandas_time:.3f} с")
+    print(f"  pyarrow.csv:      {arrow_time:.3f} с  (ускорение ×{pandas_time / max(arrow_time, 1e-9):.1f})")
+
+
+def legacy_galaxy_names(df):
+    """Прежний построчный get_galaxy_names: поиск позиции имени через names.tolist().index"""
+    names = df['objname'].astype(str).str.strip()
+    valid_names = []
+    for name in names:
+        clean_name = str(name).strip()
+        if clean_name and clean_name != 'nan' and clean_name != 'G' and not clean_name.isspace() and len(clean_name) > 2:
+            valid_names.append(clean_name)
+        else:
+            idx = names.tolist().index(name)
+            if pd.notna(df.iloc[idx]['pgc']):
+                valid_names.append(f"PGC{int(float(df.iloc[idx]['pgc']))}")
+            else:
+                valid_names.append(f"Галактика_{idx + 1}")
+    return valid_names
+
+
+def reference_galaxy_names(df):
+    """Построчное построение названий с правильной позицией строки (эталон для проверки)"""
+    names = []
+    for position, (objname, pgc) in enumerate(zip(df['objname'], df['pgc'])):
+        clean_name = str(objname).strip()
+        if clean_name and clean_name != 'nan' and clean_name != 'G' and len(clean_name) > 2:
+            names.append(clean_name)
+        elif pd.notna(pgc):
+            names.append(f"PGC{int(float(pgc))}")
+        else:
+            names.append(f"Галактика_{position + 1}")
+    return names
+
+
+def bench_galaxy_names(n_rows, legacy_rows=5000):
+    """
+    Сравнение прежнего квадратичного get_galaxy_names с векторным GalaxyNames.from_frame
+    на каталоге, где большая часть objname пуста (для полноценной проверки --rows 500000)
+
+    Прежний способ слишком медленный для всего каталога, поэтому он замеряется
+    на первых legacy_rows строках, а время для всего каталога оценивается по квадратичному росту
+    """
+    rng = np.random.default_rng(0)
+    objname = np.char.add('NGC', rng.integers(1, 8000, n_rows).astype(str)).astype(object)
+    kind = rng.random(n_rows)
+    objname[kind < 0.35] = ''
+    objname[(kind >= 0.35) & (kind < 0.40)] = np.nan
+    objname[(kind >= 0.40) & (kind < 0.42)] = 'G'
+    pgc = np.arange(1000, 1000 + n_rows, dtype=np.float64)
+    pgc[rng.random(n_rows) < 0.05] = np.nan
+    df = pd.DataFrame({'pgc': pgc, 'objname': pd.Series(objname, dtype=str)})
+
+    new_names, new_time = timed(GalaxyNames.from_frame, df)
+    reference, reference_time = timed(reference_galaxy_names, df)
+    assert new_names == reference
+
+    sample = df.iloc[:min(legacy_rows, n_rows)]
+    _, legacy_time = timed(legacy_galaxy_names, sample)
+    legacy_estimate = legacy_time * (n_rows / len(sample)) ** 2
+
+    blank_share = 1 - GalaxyNames.valid_mask(df['objname'].str.strip()).mean()
+    print(f"Названия галактик ({n_rows} строк, без корректного objname: {blank_share * 100:.0f}%):")
+    print(f"  прежний цикл с list.index: {legacy_time:.3f} с на {len(sample)} строках, "
+          f"оценка для всего каталога ~{legacy_estimate:.0f} с")
+    print(f"  построчный цикл:           {reference_time:.3f} с")
+    print(f"  GalaxyNames.from_frame:    {new_time:.3f} с  (ускорение ×{reference_time / max(new_time, 1e-9):.1f} "
+          f"к построчному циклу)")
+
+
+def legacy_expression(df, expression, columns):
+    """Прежнее вычисление выражения в get_parameter_data: iterrows и eval для каждой строки"""
+    safe_dict = {
+        'abs': abs, 'min': min, 'max': max, 'sum': sum, 'len': len,
+        'log': np.log, 'log10': np.log10, 'exp': np.exp, 'sqrt': np.sqrt,
+        'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+        'pi': np.pi, 'e': np.e
+    }
+    results = []
+    valid_indices = []
+    for idx, row in df.iterrows():
+        row_data = {col: row[col] for col in columns}
+        if any(pd.isna(value) for value in row_data.values()):
+            continue
+        try:
+            result = eval(expression, {"__builtins__": {}}, {**row_data, **safe_dict})
+        except (ZeroDivisionError, ValueError, TypeError, NameError):
+            continue
+        if pd.notna(result) and np.isfinite(result):
+            results.append(result)
+            valid_indices.append(idx)
+    return pd.Series(results, index=valid_indices)
+
+
+def vectorized_expression(df, expression, columns):
+    """Вычисление выражения над целыми колонками, как в GalaxyAnalyzer.get_parameter_data"""
+    values = {col: df[col].to_numpy(dtype=np.float64) for col in columns}
+    result = np.broadcast_to(np.asarray(ParameterExpression(expression).evaluate(values), dtype=np.float64), (len(df),))
+    valid = np.isfinite(result)
+    for column_values in values.values():
+        valid &= ~np.isnan(column_values)
+    return pd.Series(result[valid], index=df.index[valid])
+
+
+def bench_expressions(n_rows, legacy_rows=20000):
+    """
+    Сравнение построчного eval с векторным ParameterExpression на выражениях над колонками
+
+    Построчный способ замеряется на первых legacy_rows строках, время для всего каталога
+    оценивается линейно
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'bt': rng.normal(14, 1, n_rows),
+        'vt': rng.normal(13, 1, n_rows),
+        'vrot': rng.normal(150, 80, n_rows),
+        'objname': 'NGC1',
+    })
+    for col in ['bt', 'vt', 'vrot']:
+        df.loc[rng.random(n_rows) < 0.1, col] = np.nan
+
+    print(f"Вычисление выражений ({n_rows} строк):")
+    for expression, columns in [('bt-vt', ['bt', 'vt']), ('log10(vrot)', ['vrot']),
+                                ('max(bt, vt)-min(bt, vt)', ['bt', 'vt'])]:
+        sample = df.iloc[:min(legacy_rows, n_rows)]
+        legacy, legacy_time = timed(legacy_expression, sample, expression, columns)
+        result, new_time = timed(vectorized_expression, df, expression, columns)
+        pd.testing.assert_series_equal(legacy.astype(float), result.loc[legacy.index], check_index_type=False)
+
+        legacy_estimate = legacy_time * n_rows / len(sample)
+        print(f"  {expression}: iterrows + eval ~{legacy_estimate:.2f} с (оценка по {len(sample)} строкам), "
+              f"ParameterExpression {new_time:.4f} с (ускорение ×{legacy_estimate / max(new_time, 1e-9):.0f})")
+
+
+def bench_expression_engines(n_rows, repeats=3):
+    """
+    Сравнение вычисления выражения над целыми колонками numpy с блочным вычислением
+    ParameterExpression.evaluate_columns (numpy по блокам и numexpr, если он установлен)
+
+    Результаты всех способов сверяются с вычислением над целыми колонками
+    """
+    rng = np.random.default_rng(0)
+    values = {col: rng.normal(12, 3, n_rows) for col in ['bt', 'vt', 'e_bt', 'e_vt', 'vrot']}
+    for column in values.values():
+        column[rng.random(n_rows) < 0.1] = np.nan
+
+    engines = ['numpy'] + (['numexpr'] if ParameterExpression.numexpr_available() else [])
+    print(f"Движки вычисления выражений ({n_rows} строк, потоков: {os.cpu_count()}):")
+    if len(engines) == 1:
+        print("  numexpr не установлен - сравнивается только блочный numpy")
+    for expression in ['bt-vt', '(bt-vt)/sqrt(e_bt**2+e_vt**2)', 'log10(vrot)+2.5*log10(abs(bt))']:
+        compiled = ParameterExpression(expression)
+        reference, full_time = timed(lambda: [compiled.evaluate(values) for _ in range(repeats)][-1])
+        line = f"  {expression}: целые колонки {full_time / repeats:.4f} с"
+        for engine in engines:
+            result, engine_time = timed(lambda: [compiled.evaluate_columns(values, n_rows, engine)
+                                                 for _ in range(repeats)][-1])
+            assert np.allclose(result, reference, rtol=1e-9, atol=0, equal_nan=True), expression
+            line += f", {engine} по блокам {engine_time / repeats:.4f} с"
+        print(line)
+
+
+def bench_expression_batch(n_rows, n_expressions=40):
+    """
+    Сравнение вычисления многих выражений по одному (как get_parameter_data) с совместным
+    вычислением ExpressionBatch за один проход, на выражениях с общими подвыражениями
+
+    Результаты сверяются по значениям и маскам допустимых строк
+    """
+    rng = np.random.default_rng(0)
+    bands = ['ut', 'bt', 'vt', 'it', 'kt']
+    df = pd.DataFrame({col: rng.normal(13, 1, n_rows) for col in bands + ['vrot', 'logd25']})
+    for col in df.columns:
+        df.loc[rng.random(n_rows) < 0.1, col] = np.nan
+
+    # Цвета, их погрешности и производные величины - цвета повторяются во многих выражениях
+    colors = [f"({a}-{b})" for i, a in enumerate(bands) for b in bands[i + 1:]]
+    templates = ['{c}', '{c}*2.5+log10(vrot)', '{c}/logd25', 'abs({c})-0.5*logd25']
+    expressions = [template.format(c=color) for template in templates for color in colors][:n_expressions]
+
+    def one_by_one():
+        return {expression: vectorized_expression(df, expression, ParameterExpression(expression).names)
+                for expression in expressions}
+
+    def batched():
+        batch = ExpressionBatch(expressions)
+        return batch, batch.evaluate({name: df[name].to_numpy() for name in batch.names}, n_rows)
+
+    separate, separate_time = timed(one_by_one)
+    (batch, (values, valid, failed)), batch_time = timed(batched)
+    assert not failed
+    for expression, series in separate.items():
+        assert np.array_equal(np.flatnonzero(valid[expression]), series.index.to_numpy())
+        assert np.array_equal(values[expression][valid[expression]], series.to_numpy())
+
+    print(f"Совместное вычисление {len(expressions)} выражений ({n_rows} строк, "
+          f"шагов {len(batch.steps)} вместо {batch.nodes_total}):")
+    print(f"  по одному: {separate_time:.3f} с, ExpressionBatch: {batch_time:.3f} с "
+          f"(ускорение ×{separate_time / max(batch_time, 1e-9):.1f})")
+
+
+BENCHMARKS = {
+    'numeric_cleaning': bench_numeric_cleaning,
+    'csv_engines': bench_csv_engines,
+    'galaxy_names': bench_galaxy_names,
+    'expressions': bench_expressions,
+    'expression_engines': bench_expression_engines,
+    'expression_batch': bench_expression_batch,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарки NIR_graphics")
+    parser.add_argument('--rows', type=int, default=300000, help="Количество строк синтетического каталога")
+    parser.add_argument('--only', choices=sorted(BENCHMARKS), help="Запустить только один бенчмарк")
+    args = parser.parse_args()
+
+    for name, bench in BENCHMARKS.items():
+        if args.only and name != args.only:
+            continue
+        bench(args.rows)
+        print()
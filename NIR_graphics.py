@@ -36,6 +36,7 @@ import matplotlib
 from matplotlib.patches import Rectangle
 import re
 import os
+from collections import OrderedDict
 from matplotlib.colors import LogNorm, Normalize
 import requests
 from bs4 import BeautifulSoup
@@ -43,8 +44,35 @@ from PIL import Image, ImageTk
 import threading
 import time
 import urllib.parse
-
-matplotlib.use('TkAgg')
+import hashlib
+import json
+import codecs
+import queue
+import copy
+import array
+import contextlib
+import bisect
+import ast
+import functools
+import operator
+from concurrent.futures import ThreadPoolExecutor
+
+# Многопоточное чтение CSV (необязательная зависимость)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+# Многопоточное вычисление выражений по блокам без промежуточных массивов (необязательная зависимость)
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+# Папка программы: служебные файлы не должны зависеть от текущего каталога запуска
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
 
 warnings.filterwarnings('ignore')
 
@@ -208,89 +236,2418 @@ class GalaxyImageDownloader:
         Returns:
             str: Путь к изображению или None
         """
-        filename = os.path.join(image_folder, f"PGC{pgc_number}.jpg")
-        if os.path.exists(filename):
-            return filename
+        filename = os.path.join(image_folder, f"PGC{pgc_number}.jpg")
+        if os.path.exists(filename):
+            return filename
+
+        # Также проверяем другие возможные расширения
+        for ext in ['.jpeg', '.png', '.gif']:
+            alt_filename = os.path.join(image_folder, f"PGC{pgc_number}{ext}")
+            if os.path.exists(alt_filename):
+                return alt_filename
+
+        return None
+
+    @staticmethod
+    def download_images_for_dataframe(df, image_folder="galaxy_images", pgc_column='pgc'):
+        """
+        Загружает изображения для всех галактик в DataFrame
+
+        Args:
+            df: DataFrame с данными галактик
+            image_folder: Папка для сохранения изображений
+            pgc_column: Название колонки с PGC номерами
+
+        Returns:
+            dict: Словарь с информацией о загруженных изображениях
+        """
+        results = {
+            'success': 0,
+            'failed': 0,
+            'cached': 0,
+            'total': 0
+        }
+
+        if pgc_column not in df.columns:
+            print(f"Колонка {pgc_column} не найдена в DataFrame")
+            return results
+
+        # Создаем папку для изображений
+        if not os.path.exists(image_folder):
+            os.makedirs(image_folder)
+
+        # Обрабатываем каждую галактику
+        for idx, row in df.iterrows():
+            pgc_val = row[pgc_column]
+            if pd.isna(pgc_val):
+                continue
+
+            try:
+                pgc_num = int(float(pgc_val))
+                results['total'] += 1
+
+                # Проверяем, есть ли изображение в кэше
+                cached_path = GalaxyImageDownloader.get_galaxy_image_from_cache(pgc_num, image_folder)
+                if cached_path:
+                    results['cached'] += 1
+                    print(f"Изображение для PGC{pgc_num} уже в кэше")
+                    continue
+
+                # Загружаем изображение
+                image_path = GalaxyImageDownloader.download_galaxy_image(pgc_num, image_folder)
+                if image_path:
+                    results['success'] += 1
+                    print(f"Успешно загружено изображение для PGC{pgc_num}")
+                else:
+                    results['failed'] += 1
+                    print(f"Не удалось загрузить изображение для PGC{pgc_num}")
+
+                # Небольшая пауза, чтобы не перегружать сервер
+                time.sleep(0.5)
+
+            except Exception as e:
+                print(f"Ошибка при обработке PGC значения {pgc_val}: {e}")
+                results['failed'] += 1
+
+        print(f"\nРезультаты загрузки изображений:")
+        print(f"  Всего галактик: {results['total']}")
+        print(f"  Успешно загружено: {results['success']}")
+        print(f"  Уже в кэше: {results['cached']}")
+        print(f"  Не удалось загрузить: {results['failed']}")
+
+        return results
+
+
+class CatalogCache:
+    """
+    Бинарный колоночный кэш очищенного каталога рядом с исходным CSV-файлом
+
+    Числовые колонки открываются только для чтения через np.memmap, поэтому несколько
+    окон программы на одном каталоге делят страницы файлов в кэше ОС, а не держат
+    собственные копии данных.
+    """
+
+    CACHE_VERSION = 2
+    MANIFEST_NAME = 'manifest.json'
+
+    @staticmethod
+    def get_cache_dir(file_path):
+        """Возвращает путь к папке кэша для исходного файла"""
+        return f"{file_path}.cache"
+
+    @staticmethod
+    def file_signature(file_path, block_size=1 << 20, prefix_length=None):
+        """
+        Вычисляет подпись исходного файла: размер, время изменения и хэш содержимого
+
+        Args:
+            file_path: Путь к исходному файлу
+            block_size: Размер блока чтения в байтах
+            prefix_length: Если задан, за тот же проход считается и хэш первых prefix_length байт
+
+        Returns:
+            dict: {'size', 'mtime', 'hash'} и 'prefix_hash', если задан prefix_length
+                  (None, если файл короче префикса)
+        """
+        file_stat = os.stat(file_path)
+        digest = hashlib.blake2b(digest_size=16)
+        prefix_hash = None
+        with open(file_path, 'rb') as f:
+            if prefix_length is not None:
+                # Сначала хэшируем префикс, затем продолжаем тем же объектом хэша
+                remaining = prefix_length
+                while remaining > 0:
+                    block = f.read(min(block_size, remaining))
+                    if not block:
+                        break
+                    digest.update(block)
+                    remaining -= len(block)
+                if remaining == 0:
+                    prefix_hash = digest.copy().hexdigest()
+
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+
+        signature = {
+            'size': file_stat.st_size,
+            'mtime': file_stat.st_mtime,
+            'hash': digest.hexdigest()
+        }
+        if prefix_length is not None:
+            signature['prefix_hash'] = prefix_hash
+        return signature
+
+    @staticmethod
+    def read_manifest(file_path):
+        """Читает манифест кэша (или None, если кэша нет или он поврежден)"""
+        manifest_path = os.path.join(CatalogCache.get_cache_dir(file_path), CatalogCache.MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            return None
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get('version') != CatalogCache.CACHE_VERSION:
+            return None
+        return manifest
+
+    @staticmethod
+    def write_manifest(file_path, manifest):
+        """Атомарно записывает манифест кэша"""
+        cache_dir = CatalogCache.get_cache_dir(file_path)
+        manifest_path = os.path.join(cache_dir, CatalogCache.MANIFEST_NAME)
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, manifest_path)
+
+    @staticmethod
+    def is_valid(manifest, signature):
+        """Проверяет, соответствует ли кэш текущему содержимому исходного файла"""
+        if manifest is None or signature is None:
+            return False
+        source = manifest.get('source', {})
+        return (source.get('size') == signature['size'] and
+                source.get('hash') == signature['hash'] and
+                source.get('options') == signature.get('options'))
+
+    @staticmethod
+    def update_source(file_path, old_signature, signature):
+        """
+        Переводит кэш на новую подпись исходного файла, данные которого не изменились
+        (например, в конец дописали только комментарии или пустые строки)
+
+        Returns:
+            bool: True, если манифест обновлен
+        """
+        manifest = CatalogCache.read_manifest(file_path)
+        if not CatalogCache.is_valid(manifest, old_signature):
+            return False
+        manifest['source'] = signature
+        try:
+            CatalogCache.write_manifest(file_path, manifest)
+            return True
+        except OSError as e:
+            print(f"Не удалось обновить манифест кэша: {e}")
+            return False
+
+    @staticmethod
+    def save(file_path, df, signature, extra=None):
+        """
+        Сохраняет очищенный DataFrame в кэш: каждая колонка - отдельный .npy файл
+
+        Args:
+            file_path: Путь к исходному файлу
+            df: Очищенный DataFrame
+            signature: Подпись исходного файла (см. file_signature)
+            extra: Дополнительные сведения о загрузке, сохраняемые в манифесте
+
+        Returns:
+            bool: True, если кэш успешно записан
+        """
+        cache_dir = CatalogCache.get_cache_dir(file_path)
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+
+            # Файлы прежнего поколения могут быть отображены в память (self.df, numeric_store), и в Windows
+            # их нельзя перезаписать или удалить - новое поколение пишется под новыми именами, а манифест
+            # переключается на него атомарно. До этого момента действует прежний манифест.
+            generation = f"g{time.time_ns():x}"
+
+            columns = []
+            for i, col in enumerate(df.columns):
+                series = df[col]
+                entry = {'name': col, 'file': f"{generation}_col_{i}.npy"}
+
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    entry['kind'] = 'category'
+                    entry['categories_file'] = f"{generation}_col_{i}_categories.npy"
+                    np.save(os.path.join(cache_dir, entry['file']), series.cat.codes.to_numpy())
+                    np.save(os.path.join(cache_dir, entry['categories_file']),
+                            np.asarray(series.cat.categories.astype(str), dtype=str))
+                elif pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+                    entry['kind'] = 'numeric'
+                    values = series.to_numpy()
+                    np.save(os.path.join(cache_dir, entry['file']), values)
+
+                    # Плотная копия без NaN и позиции значений - готовый результат get_numeric_data
+                    valid = np.flatnonzero(pd.notna(values))
+                    entry['dense_file'] = f"{generation}_col_{i}_dense.npy"
+                    entry['positions_file'] = f"{generation}_col_{i}_positions.npy"
+                    np.save(os.path.join(cache_dir, entry['dense_file']), values[valid])
+                    np.save(os.path.join(cache_dir, entry['positions_file']), valid.astype(np.int64))
+                else:
+                    # Строки храним как массив фиксированной ширины + маску пропусков
+                    entry['kind'] = 'string'
+                    entry['dtype'] = str(series.dtype)
+                    entry['mask_file'] = f"{generation}_col_{i}_mask.npy"
+                    mask = series.isna().to_numpy()
+                    values = series.astype(object).where(~mask, '').astype(str).to_numpy()
+                    np.save(os.path.join(cache_dir, entry['file']), np.asarray(values, dtype=str))
+                    np.save(os.path.join(cache_dir, entry['mask_file']), mask)
+
+                columns.append(entry)
+
+            manifest = {
+                'version': CatalogCache.CACHE_VERSION,
+                'source': signature,
+                'rows': len(df),
+                'columns': columns,
+                'extra': extra or {}
+            }
+            CatalogCache.write_manifest(file_path, manifest)
+            CatalogCache.remove_unused_files(file_path, manifest)
+            return True
+
+        except Exception as e:
+            print(f"Не удалось записать кэш каталога: {e}")
+            return False
+
+    @staticmethod
+    def remove_unused_files(file_path, manifest):
+        """
+        Удаляет файлы .npy, на которые не ссылается манифест
+
+        Файлы, еще отображенные в память (в Windows их удалить нельзя), остаются и удаляются
+        при следующей записи кэша.
+        """
+        cache_dir = CatalogCache.get_cache_dir(file_path)
+        entries = manifest['columns'] + list(manifest.get('derived', {}).values())
+        used = {value for entry in entries for key, value in entry.items() if key.endswith('file')}
+        for name in os.listdir(cache_dir):
+            if name.endswith('.npy') and name not in used:
+                try:
+                    os.remove(os.path.join(cache_dir, name))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def load(file_path, signature):
+        """
+        Загружает DataFrame из кэша, если он соответствует исходному файлу
+
+        Числовые колонки отображаются в память (mmap, только чтение) без копирования и разбора.
+
+        Args:
+            file_path: Путь к исходному файлу
+            signature: Подпись исходного файла (см. file_signature)
+
+        Returns:
+            pd.DataFrame или None, если кэш отсутствует или устарел
+        """
+        manifest = CatalogCache.read_manifest(file_path)
+        if not CatalogCache.is_valid(manifest, signature):
+            return None
+
+        cache_dir = CatalogCache.get_cache_dir(file_path)
+        try:
+            data = {}
+            for entry in manifest['columns']:
+                values = np.load(os.path.join(cache_dir, entry['file']), mmap_mode='r')
+
+                if entry['kind'] == 'numeric':
+                    data[entry['name']] = pd.Series(values.view(np.ndarray), copy=False)
+                elif entry['kind'] == 'category':
+                    categories = np.load(os.path.join(cache_dir, entry['categories_file']))
+                    data[entry['name']] = pd.Series(pd.Categorical.from_codes(np.asarray(values), categories))
+                else:
+                    mask = np.load(os.path.join(cache_dir, entry['mask_file']))
+                    series = pd.Series(np.asarray(values).astype(object))
+                    series[mask] = np.nan
+                    if entry.get('dtype', 'object') != 'object':
+                        series = series.astype(entry['dtype'])
+                    data[entry['name']] = series
+
+            df = pd.DataFrame(data, copy=False)
+            if len(df) != manifest['rows']:
+                return None
+
+            # Файл мог быть только "тронут" (copy/touch) - обновляем время изменения в манифесте
+            if manifest['source'].get('mtime') != signature['mtime']:
+                manifest['source'] = signature
+                CatalogCache.write_manifest(file_path, manifest)
+
+            return df
+
+        except Exception as e:
+            print(f"Кэш каталога поврежден, будет выполнен полный разбор: {e}")
+            return None
+
+    @staticmethod
+    def save_derived(file_path, signature, name, key, values):
+        """
+        Записывает значения производной колонки в кэш каталога
+
+        Файл значений удаляется вместе с остальными колонками прежнего поколения при перезаписи
+        кэша (save), поэтому значения по прежнему содержимому файла не переживают его изменения.
+
+        Args:
+            file_path: Путь к исходному файлу
+            signature: Подпись загруженного содержимого файла - кэш должен ей соответствовать
+            name: Имя производной колонки
+            key: Строковый ключ выражения и входных данных
+            values: Массив значений
+
+        Returns:
+            bool: True, если значения записаны
+        """
+        manifest = CatalogCache.read_manifest(file_path)
+        if not CatalogCache.is_valid(manifest, signature):
+            return False
+
+        cache_dir = CatalogCache.get_cache_dir(file_path)
+        # Прежние значения колонки могут быть отображены в память - пишем под новым именем
+        name_hash = hashlib.blake2b(name.encode('utf-8'), digest_size=8).hexdigest()
+        entry = {'key': key, 'file': f"derived_{name_hash}_{time.time_ns():x}.npy"}
+        try:
+            np.save(os.path.join(cache_dir, entry['file']), values)
+            manifest.setdefault('derived', {})[name] = entry
+            CatalogCache.write_manifest(file_path, manifest)
+            CatalogCache.remove_unused_files(file_path, manifest)
+            return True
+        except Exception as e:
+            print(f"Не удалось записать производную колонку {name} в кэш: {e}")
+            return False
+
+    @staticmethod
+    def load_derived(file_path, signature, name, key):
+        """
+        Открывает значения производной колонки из кэша каталога (mmap, только чтение)
+
+        Returns:
+            Массив значений или None, если в кэше нет значений для этого ключа
+        """
+        manifest = CatalogCache.read_manifest(file_path)
+        if not CatalogCache.is_valid(manifest, signature):
+            return None
+
+        entry = manifest.get('derived', {}).get(name)
+        if entry is None or entry['key'] != key:
+            return None
+        try:
+            values = np.load(os.path.join(CatalogCache.get_cache_dir(file_path), entry['file']), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return values.view(np.ndarray) if len(values) == manifest['rows'] else None
+
+    @staticmethod
+    def open_numeric_store(file_path):
+        """
+        Открывает общее хранилище числовых колонок: для каждой колонки - Series
+        значений без NaN, индексированная позициями строк, поверх файлов кэша без копирования
+
+        Args:
+            file_path: Путь к исходному файлу
+
+        Returns:
+            dict: {имя колонки: pd.Series} (пустой, если кэша нет или он старого формата)
+        """
+        manifest = CatalogCache.read_manifest(file_path)
+        if manifest is None:
+            return {}
+
+        cache_dir = CatalogCache.get_cache_dir(file_path)
+        store = {}
+        try:
+            for entry in manifest['columns']:
+                if entry['kind'] != 'numeric' or 'dense_file' not in entry:
+                    continue
+                values = np.load(os.path.join(cache_dir, entry['dense_file']), mmap_mode='r')
+                positions = np.load(os.path.join(cache_dir, entry['positions_file']), mmap_mode='r')
+                store[entry['name']] = pd.Series(values.view(np.ndarray),
+                                                 index=pd.Index(positions.view(np.ndarray), copy=False),
+                                                 name=entry['name'], copy=False)
+        except Exception as e:
+            print(f"Не удалось открыть хранилище числовых колонок: {e}")
+            return {}
+
+        return store
+
+
+class CatalogReader:
+    """Чтение CSV-файла каталога HyperLeda: pandas (по умолчанию) или многопоточный pyarrow.csv"""
+
+    NA_VALUES = ['', ' ', 'NaN', 'nan', '        ', '        ', '...']
+    # Значения, которые pandas считает пропусками по умолчанию (keep_default_na=True) -
+    # явный список для pyarrow, чтобы оба движка давали одинаковые пропуски
+    DEFAULT_NA_VALUES = ['#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                         '<NA>', 'N/A', 'NA', 'NULL', 'None', 'n/a', 'null']
+
+    @staticmethod
+    def read_csv(file_path, encoding, **kwargs):
+        """
+        Читает CSV-файл каталога HyperLeda через pandas с общими параметрами разбора
+
+        Args:
+            file_path: Путь к файлу или файловый объект
+            encoding: Кодировка файла
+            **kwargs: Дополнительные параметры pd.read_csv
+
+        Returns:
+            pd.DataFrame
+        """
+        return pd.read_csv(file_path,
+                           sep=';',
+                           skipinitialspace=True,
+                           decimal='.',
+                           na_values=CatalogReader.NA_VALUES,
+                           encoding=encoding,
+                           # Неверно декодированный байт не должен приводить к повторному разбору всего файла
+                           encoding_errors='replace',
+                           comment='#',
+                           dtype={'objname': str},
+                           quoting=3,
+                           **kwargs)
+
+    @staticmethod
+    def arrow_available():
+        """Установлен ли pyarrow"""
+        return pa_csv is not None
+
+    @staticmethod
+    def find_header_offset(file_path):
+        """Байтовое смещение строки заголовка (первой строки, не являющейся пустой или комментарием)"""
+        offset = 0
+        with open(file_path, 'rb') as f:
+            for line in f:
+                if line.strip() and not line.lstrip(codecs.BOM_UTF8).startswith(b'#'):
+                    return offset
+                offset += len(line)
+        raise ValueError("Файл не содержит заголовка")
+
+    @staticmethod
+    def contains_byte(file_path, byte, offset=0, block_size=1 << 22):
+        """Встречается ли байт в файле начиная со смещения offset"""
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            for block in iter(lambda: f.read(block_size), b''):
+                if byte in block:
+                    return True
+        return False
+
+    @staticmethod
+    def read_arrow(file_path, encoding):
+        """
+        Многопоточное чтение CSV-файла каталога через pyarrow.csv с семантикой read_csv
+
+        Соответствие параметрам pandas:
+        - sep=';' и quoting=3: разделитель ';', кавычки не обрабатываются;
+        - comment='#': строки-комментарии до заголовка пропускаются по смещению; pandas обрезает
+          и текст после '#' внутри строки, поэтому файл с '#' в данных читается через pandas;
+        - na_values: тот же список вместе со значениями pandas по умолчанию (DEFAULT_NA_VALUES);
+        - skipinitialspace: у строковых колонок отбрасываются ведущие пробелы;
+        - objname всегда читается как строка.
+        Строки с неверным числом полей и символ '#' в данных вызывают ошибку, и вызывающий
+        код переходит на pandas.
+
+        Args:
+            file_path: Путь к файлу
+            encoding: Кодировка файла
+
+        Returns:
+            pd.DataFrame
+        """
+        na_values = sorted(set(CatalogReader.NA_VALUES) | set(CatalogReader.DEFAULT_NA_VALUES))
+        header_offset = CatalogReader.find_header_offset(file_path)
+        if CatalogReader.contains_byte(file_path, b'#', header_offset):
+            raise ValueError("в данных есть комментарии '#'")
+
+        read_options = pa_csv.ReadOptions(use_threads=True, encoding=encoding)
+        parse_options = pa_csv.ParseOptions(delimiter=';', quote_char=False)
+        convert_options = pa_csv.ConvertOptions(column_types={'objname': pa.string()},
+                                                null_values=na_values,
+                                                strings_can_be_null=True)
+
+        with open(file_path, 'rb') as f:
+            f.seek(header_offset)
+            table = pa_csv.read_csv(f, read_options=read_options, parse_options=parse_options,
+                                    convert_options=convert_options)
+
+        # split_blocks и self_destruct: колонки без пропусков переходят в pandas без копирования,
+        # а память Arrow освобождается по мере преобразования
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+
+        df.columns = [str(col).lstrip() for col in df.columns]
+        for col in df.columns:
+            if pd.api.types.is_string_dtype(df[col].dtype):
+                stripped = df[col].str.lstrip()
+                df[col] = stripped.mask(stripped.isin(na_values))
+        return df
+
+
+class NumericCleaner:
+    """Векторная очистка числовых колонок с той же семантикой, что и поячеечная clean_value"""
+
+    @staticmethod
+    def clean_value(value):
+        """Очистка одного значения от лишних пробелов и символов (эталонная поячеечная версия)"""
+        if pd.isna(value) or value == '':
+            return np.nan
+
+        # Преобразуем в строку и убираем лишние пробелы
+        str_value = str(value).strip()
+
+        # Заменяем запятые на точки для десятичных чисел
+        str_value = str_value.replace(',', '.')
+
+        # Убираем множественные пробелы
+        str_value = re.sub(r'\s+', ' ', str_value)
+
+        # Если значение состоит только из пробелов или пустое
+        if not str_value or str_value.isspace():
+            return np.nan
+
+        try:
+            return float(str_value)
+        except (ValueError, TypeError):
+            return np.nan
+
+    @staticmethod
+    def clean_series(series):
+        """
+        Очищает колонку целиком строковыми ядрами pandas и pd.to_numeric
+
+        Args:
+            series: Колонка DataFrame в исходном виде
+
+        Returns:
+            tuple: (колонка float64, количество непустых ячеек, которые не удалось преобразовать в число)
+        """
+        # Колонку, которую read_csv уже разобрал как числовую, достаточно привести к float64
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            return series.astype('float64'), 0
+
+        # Один проход по всей колонке: десятичные запятые и пробелы по краям встречаются в этих
+        # каталогах почти всегда. Внутренние пробелы не схлопываем: строка с ними не является
+        # числом ни до, ни после замены
+        present = series.notna().to_numpy()
+        stripped = series.astype(str).str.strip().str.replace(',', '.', regex=False)
+        values = np.array(pd.to_numeric(stripped, errors='coerce'), dtype=float)
+        failed = np.isnan(values) & present & (stripped != '').to_numpy(dtype=bool, na_value=False)
+
+        # Редкие формы, которые понимает float(), но не to_numeric (например, '1_000'),
+        # разбираем эталонной функцией - по одному разу на уникальное значение
+        if failed.any():
+            leftovers = stripped[failed]
+            fallback = {v: NumericCleaner.clean_value(v) for v in pd.unique(leftovers)}
+            values[failed] = np.array(leftovers.map(fallback), dtype=float)
+            failed &= np.isnan(values)
+
+        return pd.Series(values, index=series.index, name=series.name), int(failed.sum())
+
+    @staticmethod
+    def parse_strings(cells):
+        """
+        Преобразует последовательность строк в массив чисел по правилам clean_value
+
+        Работает с массивами строк фиксированной ширины numpy, без колонок dtype=object.
+
+        Args:
+            cells: Список или кортеж строк
+
+        Returns:
+            tuple: (np.array float64, количество непустых строк, которые не удалось преобразовать в число)
+        """
+        # Чаще всего все строки - обычные числа, и numpy разбирает их за один проход
+        try:
+            values = np.array(cells, dtype=float)
+            return values, int(np.isnan(values).sum())
+        except ValueError:
+            pass
+
+        text = np.char.strip(np.asarray(cells, dtype=str))
+        blank = text == ''
+        try:
+            values = np.where(blank, 'nan', np.char.replace(text, ',', '.')).astype(float)
+        except ValueError:
+            # Есть нечисловые строки - эталонная функция по одному разу на уникальное значение
+            unique, inverse = np.unique(text, return_inverse=True)
+            values = np.array([NumericCleaner.clean_value(v) for v in unique], dtype=float)[inverse]
+
+        return values, int((np.isnan(values) & ~blank).sum())
+
+
+class CompactStorage:
+    """Компактное представление каталога в памяти: float32, меньшие целые типы и категориальные колонки"""
+
+    # float32 без потерь хранит любое десятичное число не более чем из 6 значащих цифр
+    FLOAT32_DIGITS = 6
+    # Строковая колонка становится категориальной, если уникальных значений не больше этой доли
+    CATEGORY_RATIO = 0.5
+
+    @staticmethod
+    def fits_float32(values):
+        """Все ли значения массива float64 записаны не более чем 6 значащими цифрами и в диапазоне float32"""
+        finite = values[np.isfinite(values)]
+        nonzero = np.abs(finite[finite != 0])
+        if len(nonzero) == 0:
+            return True
+
+        info = np.finfo(np.float32)
+        if nonzero.max() > info.max or nonzero.min() < info.tiny:
+            return False
+
+        scale = 10.0 ** (np.floor(np.log10(nonzero)) - (CompactStorage.FLOAT32_DIGITS - 1))
+        return bool(np.allclose(np.round(nonzero / scale) * scale, nonzero, rtol=1e-9, atol=0))
+
+    @staticmethod
+    def memory_by_column(df):
+        """Память, занимаемая каждой колонкой DataFrame, в байтах (со строками)"""
+        usage = df.memory_usage(deep=True, index=False)
+        return {col: int(usage[col]) for col in df.columns}
+
+    @staticmethod
+    def compact(df):
+        """
+        Переводит колонки в компактные типы, не теряя точности исходных данных
+
+        Args:
+            df: Очищенный DataFrame
+
+        Returns:
+            tuple: (компактный DataFrame, {'before': {колонка: байт}, 'after': {колонка: байт}})
+        """
+        before = CompactStorage.memory_by_column(df)
+
+        data = {}
+        for col in df.columns:
+            series = df[col]
+            dtype = series.dtype
+            if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype):
+                pass
+            elif pd.api.types.is_float_dtype(dtype):
+                if dtype == np.float64 and CompactStorage.fits_float32(series.to_numpy()):
+                    series = series.astype(np.float32)
+            elif pd.api.types.is_integer_dtype(dtype):
+                series = pd.to_numeric(series, downcast='integer')
+            else:
+                non_null = int(series.notna().sum())
+                if non_null and series.nunique() <= CompactStorage.CATEGORY_RATIO * non_null:
+                    series = series.astype('category')
+            data[col] = series
+
+        compact_df = pd.DataFrame(data, copy=False)
+        return compact_df, {'before': before, 'after': CompactStorage.memory_by_column(compact_df)}
+
+
+class EncodingDetector:
+    """Определение кодировки CSV-файла по ограниченной выборке байтов до разбора"""
+
+    REGISTRY_FILE = os.path.join(APP_DIR, "file_encodings.json")  # Запомненные кодировки файлов
+    SAMPLE_SIZE = 256 * 1024  # Размер одного фрагмента выборки в байтах
+    SAMPLE_COUNT = 4  # Количество фрагментов (начало, середина, конец файла)
+    CYRILLIC_PAIR_THRESHOLD = 0.3  # Доля "слитных" старших байтов, начиная с которой текст считаем cp1251
+
+    BOMS = [
+        (codecs.BOM_UTF8, 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16'),
+    ]
+
+    @staticmethod
+    def read_samples(file_path):
+        """
+        Читает равномерно распределенные по файлу фрагменты фиксированного размера
+
+        Args:
+            file_path: Путь к файлу
+
+        Returns:
+            list: Фрагменты файла (bytes), первый - всегда начало файла
+        """
+        size = os.path.getsize(file_path)
+        sample_size = EncodingDetector.SAMPLE_SIZE
+        count = EncodingDetector.SAMPLE_COUNT
+
+        if size <= sample_size * count:
+            with open(file_path, 'rb') as f:
+                return [f.read()]
+
+        samples = []
+        step = (size - sample_size) // (count - 1)
+        with open(file_path, 'rb') as f:
+            for i in range(count):
+                f.seek(i * step)
+                chunk = f.read(sample_size)
+                if i > 0:
+                    # Фрагмент из середины может начинаться внутри многобайтового символа UTF-8
+                    skip = 0
+                    while skip < 3 and skip < len(chunk) and 0x80 <= chunk[skip] <= 0xBF:
+                        skip += 1
+                    chunk = chunk[skip:]
+                samples.append(chunk)
+        return samples
+
+    @staticmethod
+    def is_valid_utf8(sample):
+        """Проверяет, что фрагмент - корректный UTF-8 (незавершенный символ в конце допускается)"""
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            return True
+        except UnicodeDecodeError:
+            return False
+
+    @staticmethod
+    def looks_cyrillic(samples):
+        """
+        Оценивает по статистике старших байтов, похож ли текст на кириллицу в cp1251
+
+        В cp1251 буквы занимают 0xC0-0xFF (плюс Ё/ё), и русские слова целиком состоят
+        из старших байтов. В latin-1 старшие байты - отдельные буквы с диакритикой внутри ASCII-слов.
+        """
+        data = np.frombuffer(b''.join(samples), dtype=np.uint8)
+        letters = (data >= 0xC0) | (data == 0xA8) | (data == 0xB8)
+        letter_count = int(letters.sum())
+        if letter_count == 0:
+            return False
+
+        pairs = int((letters[1:] & letters[:-1]).sum())
+        return pairs / letter_count >= EncodingDetector.CYRILLIC_PAIR_THRESHOLD
+
+    @staticmethod
+    def detect_samples(samples):
+        """Выбирает кодировку по фрагментам файла: BOM, корректность UTF-8, статистика кириллицы"""
+        head = samples[0] if samples else b''
+        for bom, encoding in EncodingDetector.BOMS:
+            if head.startswith(bom):
+                return encoding
+
+        if all(EncodingDetector.is_valid_utf8(sample) for sample in samples):
+            return 'utf-8'
+
+        if EncodingDetector.looks_cyrillic(samples):
+            return 'cp1251'
+
+        return 'latin-1'
+
+    @staticmethod
+    def load_registry():
+        """Загружает словарь запомненных кодировок {абсолютный путь: кодировка}"""
+        try:
+            with open(EncodingDetector.REGISTRY_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def remember(file_path, encoding):
+        """Запоминает кодировку файла для следующей загрузки"""
+        registry = EncodingDetector.load_registry()
+        key = os.path.abspath(file_path)
+        if registry.get(key) == encoding:
+            return
+
+        registry[key] = encoding
+        try:
+            with open(EncodingDetector.REGISTRY_FILE, 'w', encoding='utf-8') as f:
+                json.dump(registry, f, ensure_ascii=False, indent=1)
+        except OSError as e:
+            print(f"Не удалось сохранить кодировку файла: {e}")
+
+    @staticmethod
+    def detect(file_path):
+        """
+        Определяет кодировку файла, используя запомненное значение, если оно подходит
+
+        Args:
+            file_path: Путь к файлу
+
+        Returns:
+            tuple: (кодировка, True если она взята из запомненных)
+        """
+        samples = EncodingDetector.read_samples(file_path)
+        remembered = EncodingDetector.load_registry().get(os.path.abspath(file_path))
+
+        if remembered:
+            # Однобайтовые кодировки декодируют любые байты; UTF-8 перепроверяем по выборке
+            if not remembered.startswith('utf-8') or all(EncodingDetector.is_valid_utf8(s) for s in samples):
+                return remembered, True
+
+        return EncodingDetector.detect_samples(samples), False
+
+
+class LazyCatalog:
+    """Каталог, открытый без разбора: заголовок, индекс смещений строк и разбор колонок по запросу"""
+
+    # Однобайтовые и ASCII-совместимые кодировки: в них '\n', ';' и '#' - отдельные байты
+    SUPPORTED_ENCODINGS = ('utf-8', 'utf-8-sig', 'cp1251', 'latin-1')
+    EXCLUDED_COLUMNS = ['objname', 'pgc', 'type', 'objtype']
+
+    def __init__(self, file_path, encoding, read_csv):
+        """
+        Открывает файл: читает заголовок и строит индекс байтовых смещений строк данных
+
+        Args:
+            file_path: Путь к файлу
+            encoding: Кодировка файла
+            read_csv: Функция чтения CSV с параметрами каталога (read_catalog_csv)
+        """
+        self.file_path = file_path
+        self.encoding = encoding
+        self.read_csv = read_csv
+
+        buffer = np.memmap(file_path, dtype=np.uint8, mode='r')
+        line_starts, line_ends = LazyCatalog.build_line_index(buffer)
+
+        # Пропускаем строки-комментарии и пустые строки - так же, как read_csv(comment='#')
+        first_bytes = buffer[np.minimum(line_starts, max(len(buffer) - 1, 0))] if len(buffer) else np.array([])
+        lengths = line_ends - line_starts
+        is_blank = (lengths == 0) | ((lengths == 1) & (first_bytes == ord('\r')))
+        is_data = ~is_blank & (first_bytes != ord('#'))
+        data_lines = np.flatnonzero(is_data)
+
+        if len(data_lines) == 0:
+            raise ValueError("Файл не содержит заголовка")
+
+        header_line = data_lines[0]
+        self.header_text = self.decode_line(buffer, line_starts[header_line], line_ends[header_line])
+        self.header_bytes = bytes(buffer[line_starts[header_line]:line_ends[header_line]]).rstrip(b'\r')
+        self.columns = list(self.read_csv(io.StringIO(self.header_text), encoding, nrows=0).columns)
+
+        self.row_starts = line_starts[data_lines[1:]]
+        self.row_ends = line_ends[data_lines[1:]]
+        self.end_offset = int(line_ends[-1]) if len(line_ends) else 0
+        self.buffer = buffer
+
+    @staticmethod
+    def supports_encoding(encoding):
+        """Можно ли строить байтовый индекс строк для файла в этой кодировке"""
+        return encoding in LazyCatalog.SUPPORTED_ENCODINGS
+
+    @staticmethod
+    def build_line_index(buffer, block_size=16 << 20):
+        """
+        Находит начала и концы всех строк файла поблочным поиском символа перевода строки
+
+        Returns:
+            tuple: (np.array начал строк, np.array позиций концов строк без '\n')
+        """
+        newline_positions = []
+        for block_start in range(0, len(buffer), block_size):
+            block = buffer[block_start:block_start + block_size]
+            newline_positions.append(np.flatnonzero(block == ord('\n')) + block_start)
+
+        newlines = np.concatenate(newline_positions) if newline_positions else np.array([], dtype=np.int64)
+        starts = np.concatenate(([0], newlines + 1)).astype(np.int64)
+        ends = np.concatenate((newlines, [len(buffer)])).astype(np.int64)
+
+        # Последняя "строка" после завершающего '\n' пустая - отбрасываем её
+        if len(starts) > 1 and starts[-1] >= len(buffer):
+            starts, ends = starts[:-1], ends[:-1]
+        return starts, ends
+
+    def decode_line(self, buffer, start, end):
+        """Декодирует строку файла по байтовым смещениям"""
+        text = bytes(buffer[start:end]).decode(self.encoding, errors='replace')
+        return text.lstrip('\ufeff').rstrip('\r')
+
+    @property
+    def n_rows(self):
+        """Количество строк данных в файле"""
+        return len(self.row_starts)
+
+    def read_columns(self, columns, n_rows=None):
+        """
+        Разбирает и очищает только указанные колонки файла
+
+        Колонки целиком читаются из файла потоком: срез отображенного файла по индексу смещений
+        пришлось бы скопировать в память целиком. Первые n_rows строк берутся срезом по индексу,
+        без чтения остального файла.
+
+        Args:
+            columns: Список названий колонок
+            n_rows: Разобрать только первые n_rows строк данных (None - все строки)
+
+        Returns:
+            tuple: (pd.DataFrame, словарь количества нечисловых значений по колонкам)
+        """
+        if n_rows is None or n_rows >= self.n_rows:
+            expected = self.n_rows
+            df = self.read_csv(self.file_path, self.encoding, usecols=columns)
+        else:
+            expected = max(n_rows, 0)
+            data = bytes(self.buffer[self.row_starts[0]:self.row_ends[expected - 1]]) if expected else b''
+            df = self.read_csv(io.BytesIO(self.header_bytes + b'\n' + data), self.encoding, usecols=columns)
+        if len(df) != expected:
+            raise ValueError(f"Число строк при разборе колонок ({len(df)}) не совпадает с индексом ({expected})")
+
+        unparseable_counts = {}
+        for col in df.columns:
+            if col.lower() not in LazyCatalog.EXCLUDED_COLUMNS:
+                df[col], unparseable = NumericCleaner.clean_series(df[col])
+                if unparseable:
+                    unparseable_counts[col] = unparseable
+        return df, unparseable_counts
+
+    def read_row(self, position):
+        """
+        Разбирает одну строку данных целиком (все колонки) по индексу смещений
+
+        Args:
+            position: Порядковый номер строки данных
+
+        Returns:
+            pd.Series: Очищенная строка с именем, равным position
+        """
+        line = self.decode_line(self.buffer, self.row_starts[position], self.row_ends[position])
+        row = self.read_csv(io.StringIO(self.header_text + '\n' + line), self.encoding).iloc[0]
+
+        values = {}
+        for col in self.columns:
+            value = row[col] if col in row.index else np.nan
+            if col.lower() not in LazyCatalog.EXCLUDED_COLUMNS:
+                value = NumericCleaner.clean_value(value)
+            values[col] = value
+        return pd.Series(values, name=position)
+
+
+class CatalogSource:
+    """
+    Дополнительный каталог, присоединенный к основному по pgc
+
+    Файл открывается лениво (LazyCatalog): сразу разбирается только колонка pgc, по которой
+    строится хэш-индекс pgc -> строка; остальные колонки разбираются при первом обращении.
+    """
+
+    def __init__(self, file_path, read_csv):
+        """
+        Открывает каталог и строит хэш-индекс по pgc
+
+        Args:
+            file_path: Путь к файлу каталога
+            read_csv: Функция чтения CSV с параметрами каталога (read_catalog_csv)
+        """
+        self.file_path = file_path
+        self.name = os.path.basename(file_path)
+        self.encoding, _ = EncodingDetector.detect(file_path)
+
+        if LazyCatalog.supports_encoding(self.encoding):
+            self.catalog = LazyCatalog(file_path, self.encoding, read_csv)
+            self.frame = None
+            self.columns = list(self.catalog.columns)
+        else:
+            # Для многобайтовых кодировок байтовый индекс строк не построить - читаем файл целиком
+            self.catalog = None
+            self.frame = read_csv(file_path, self.encoding)
+            self.frame_unparseable = {}
+            for col in self.frame.columns:
+                if col.lower() not in LazyCatalog.EXCLUDED_COLUMNS:
+                    self.frame[col], unparseable = NumericCleaner.clean_series(self.frame[col])
+                    if unparseable:
+                        self.frame_unparseable[col] = unparseable
+            self.columns = list(self.frame.columns)
+
+        pgc_columns = [col for col in self.columns if col.lower() == 'pgc']
+        if not pgc_columns:
+            raise ValueError(f"в каталоге {self.name} нет колонки pgc")
+        self.pgc_column = pgc_columns[0]
+
+        # Хэш-индекс pgc -> строка источника; при повторах pgc берется первая строка
+        pgc = pd.to_numeric(self.read_columns([self.pgc_column])[0][self.pgc_column], errors='coerce')
+        keys = pd.Index(pgc.to_numpy(dtype=float))
+        present = keys.notna()
+        first = present & ~keys.duplicated(keep='first')
+        self.key_index = keys[first]
+        self.key_positions = np.flatnonzero(first)
+        self.duplicates = int((present & ~first).sum())
+
+        # Префикс для колонок, имена которых уже заняты: имя файла в виде идентификатора
+        prefix = re.sub(r'\W+', '_', os.path.splitext(self.name)[0]).strip('_').lower()
+        self.prefix = prefix if prefix.isidentifier() else f"cat_{prefix}"
+        self.column_map = {}  # Имя в объединенном каталоге -> колонка источника
+        self.positions = np.array([], dtype=np.int64)  # Строка источника для каждой строки основного каталога
+
+    def read_columns(self, columns, n_rows=None):
+        """
+        Разбирает и очищает колонки источника
+
+        Args:
+            columns: Список колонок источника
+            n_rows: Только первые n_rows строк (для лениво открытого файла; разобранный
+                целиком каталог отдается полностью)
+
+        Returns:
+            tuple: (pd.DataFrame, словарь количества нечисловых значений по колонкам)
+        """
+        if self.catalog is not None:
+            return self.catalog.read_columns(columns, n_rows)
+        return self.frame[columns], {col: self.frame_unparseable[col]
+                                     for col in columns if col in self.frame_unparseable}
+
+    def align(self, primary_pgc):
+        """
+        Сопоставляет строкам основного каталога строки источника через хэш-индекс
+
+        Args:
+            primary_pgc: Массив pgc основного каталога
+        """
+        primary_pgc = np.asarray(primary_pgc, dtype=float)
+        if len(self.key_index) == 0:
+            self.positions = np.full(len(primary_pgc), -1, dtype=np.int64)
+            return
+
+        found = self.key_index.get_indexer(primary_pgc)
+        self.positions = np.where(found >= 0, self.key_positions[found], -1)
+
+    @property
+    def matched(self):
+        """Количество галактик основного каталога, найденных в источнике"""
+        return int((self.positions >= 0).sum())
+
+    def take_column(self, column):
+        """
+        Колонка источника, выровненная по строкам основного каталога
+
+        Returns:
+            tuple: (np.array значений, NaN для галактик без пары; количество нечисловых значений)
+        """
+        parsed, unparseable_counts = self.read_columns([column])
+        values = pd.api.extensions.take(parsed[column].to_numpy(), self.positions, allow_fill=True)
+        return values, unparseable_counts.get(column, 0)
+
+    def read_row(self, position):
+        """Значения колонок источника для строки основного каталога (NaN, если пары нет)"""
+        source_position = self.positions[position]
+        if source_position < 0:
+            return pd.Series({name: np.nan for name in self.column_map}, dtype=object)
+
+        if self.catalog is not None:
+            row = self.catalog.read_row(source_position)
+        else:
+            row = self.frame.iloc[source_position]
+        return pd.Series({name: row[col] for name, col in self.column_map.items()}, dtype=object)
+
+
+class GalaxyNames:
+    """Построение названий галактик по objname с запасными именами из pgc"""
+
+    # Значения objname, которые не считаются названием галактики
+    INVALID_NAMES = ['nan', 'G']
+
+    @staticmethod
+    def valid_mask(names):
+        """
+        Маска корректных названий: не пустое, длиннее 2 символов и не из INVALID_NAMES
+
+        Args:
+            names: Очищенные от пробелов названия (pd.Series строк, пропуски - NaN)
+
+        Returns:
+            np.ndarray: Булев массив
+        """
+        return (names.str.len().gt(2) & ~names.isin(GalaxyNames.INVALID_NAMES)).to_numpy(dtype=bool)
+
+    @staticmethod
+    def normalize_lines(text):
+        """
+        Нормализует обозначения галактик в тексте, по одному на строку: верхний регистр, без
+        разделителей, без ведущих нулей в номерах, соседние числа разделены точкой
+        (ngc 01300 -> NGC1300, MCG-01-02-003 -> MCG1.2.3)
+        """
+        text = re.sub(r'[^\w\n]+', ' ', text.upper().replace('_', ' '))
+        text = re.sub(r'(?<!\d)0+(?=\d)', '', text)
+        text = re.sub(r'(?<=\d) +(?=\d)', '.', text)
+        return text.replace(' ', '')
+
+    @staticmethod
+    def normalize_designation(text):
+        """Нормализованное обозначение галактики (каталожный префикс и номер без разделителей)"""
+        return GalaxyNames.normalize_lines(str(text).replace('\n', ' '))
+
+    @staticmethod
+    def normalize_designations(values):
+        """
+        Нормализованные обозначения для колонки (пропуски - пустые строки)
+
+        Вся колонка нормализуется одним текстом: регулярные выражения проходят его целиком,
+        без отдельного вызова на каждое значение
+        """
+        values = values.astype(str).fillna('').tolist()
+        keys = GalaxyNames.normalize_lines('\n'.join(values)).split('\n')
+        if len(keys) != len(values):
+            # Внутри какого-то значения был перевод строки
+            keys = [GalaxyNames.normalize_designation(value) for value in values]
+        return keys
+
+    @staticmethod
+    def split_designation(key):
+        """Делит нормализованное обозначение на каталожный префикс (до первой цифры) и номер"""
+        prefix = re.match(r'\D*', key).group()
+        return prefix, key[len(prefix):]
+
+    @staticmethod
+    def from_frame(df, start=0):
+        """
+        Векторно строит названия галактик для всех строк DataFrame за один проход по колонкам
+
+        Корректное objname берется как есть, иначе имя строится из pgc (PGC<номер>),
+        а если нет и pgc - из номера строки в каталоге (Галактика_N)
+
+        Args:
+            df: Строки каталога (колонки objname и pgc необязательны)
+            start: Позиция первой строки df в каталоге (для нумерации Галактика_N)
+
+        Returns:
+            list: Названия галактик в порядке строк df
+        """
+        n_rows = len(df)
+        if 'objname' in df.columns:
+            names = df['objname'].astype(str).str.strip()
+            valid = GalaxyNames.valid_mask(names)
+            result = names.to_numpy(dtype=object)
+        else:
+            valid = np.zeros(n_rows, dtype=bool)
+            result = np.empty(n_rows, dtype=object)
+
+        fallback = np.flatnonzero(~valid)
+        if len(fallback) == 0:
+            return result.tolist()
+
+        if 'pgc' in df.columns:
+            pgc = pd.to_numeric(df['pgc'].iloc[fallback], errors='coerce').to_numpy(dtype=np.float64)
+            has_pgc = np.isfinite(pgc)
+        else:
+            pgc = np.empty(0)
+            has_pgc = np.zeros(len(fallback), dtype=bool)
+
+        if has_pgc.any():
+            result[fallback[has_pgc]] = np.char.add('PGC', pgc[has_pgc].astype(np.int64).astype(str)).tolist()
+        if not has_pgc.all():
+            positions = fallback[~has_pgc] + start + 1
+            result[fallback[~has_pgc]] = np.char.add('Галактика_', positions.astype(str)).tolist()
+        return result.tolist()
+
+
+class GalaxyIndex:
+    """Индексы поиска строки галактики: название -> строка, PGC -> строка и подстроки objname"""
+
+    SEPARATOR = '\n'  # Не встречается внутри значений: строки CSV не содержат переводов строк
+    FUZZY_PREFIX = 2  # Сколько первых символов номера должно совпасть при поиске по расстоянию правки
+
+    def __init__(self, names, df):
+        """
+        Args:
+            names: Названия галактик в порядке строк df (galaxy_names)
+            df: Строки каталога (колонки objname и pgc необязательны)
+        """
+        self.name_rows = {}  # Название -> позиция первой строки с этим названием
+        self.pgc_rows = {}  # Номер PGC -> позиция первой строки
+        self.objname_text = ''  # objname всех строк в нижнем регистре через SEPARATOR
+        self.objname_starts = np.empty(0, dtype=np.int64)  # Смещение каждой строки в objname_text
+        self.designation_rows = {}  # Нормализованное обозначение objname -> позиция первой строки
+        self.sorted_designations = None  # Отсортированные обозначения для выбора кандидатов по префиксу
+        self.sorted_pgc = None  # (номера PGC по возрастанию, позиции строк)
+        self.add_rows(names, df, 0)
+
+    @staticmethod
+    def first_positions(keys, positions):
+        """Словарь ключ -> первая позиция (словарь из обратной последовательности оставляет первое вхождение)"""
+        return dict(zip(reversed(keys), reversed(positions)))
+
+    def add_rows(self, names, df, start):
+        """
+        Добавляет в индексы строки df, начинающиеся в каталоге с позиции start
+
+        Словари, текст и массив смещений заменяются новыми объектами, а не изменяются на месте
+        """
+        positions = list(range(start, start + len(df)))
+        # При совпадении ключей остается более ранняя строка
+        self.name_rows = {**self.first_positions(list(names), positions), **self.name_rows}
+
+        if 'pgc' in df.columns:
+            pgc = pd.to_numeric(df['pgc'], errors='coerce').to_numpy(dtype=np.float64)
+            has_pgc = np.flatnonzero(np.isfinite(pgc))
+            pgc_rows = self.first_positions(pgc[has_pgc].astype(np.int64).tolist(), (has_pgc + start).tolist())
+            self.pgc_rows = {**pgc_rows, **self.pgc_rows}
+
+        if 'objname' in df.columns and len(df):
+            objnames = df['objname'].astype(str).str.lower().fillna('')
+            lengths = objnames.str.len().to_numpy(dtype=np.int64)
+            offset = len(self.objname_text) + len(self.SEPARATOR) if len(self.objname_starts) else 0
+            starts = offset + np.concatenate([[0], np.cumsum(lengths[:-1] + len(self.SEPARATOR))])
+            text = self.SEPARATOR.join(objnames.tolist())
+            self.objname_text = self.SEPARATOR.join([self.objname_text, text]) if len(self.objname_starts) else text
+            self.objname_starts = np.concatenate([self.objname_starts, starts.astype(np.int64)])
+
+            designations = np.array(GalaxyNames.normalize_designations(df['objname']), dtype=object)
+            filled = np.flatnonzero(designations != '')
+            designation_rows = self.first_positions(designations[filled].tolist(), (filled + start).tolist())
+            self.designation_rows = {**designation_rows, **self.designation_rows}
+        self.sorted_designations = None
+        self.sorted_pgc = None
+
+    def extended(self, names, df, start):
+        """
+        Новый индекс с добавленными строками (при дописывании строк в файл)
+
+        Исходный индекс не изменяется: он используется интерфейсом до завершения загрузки
+        """
+        index = copy.copy(self)
+        index.add_rows(names, df, start)
+        return index
+
+    def find_name(self, name):
+        """Позиция строки по точному названию или None"""
+        return self.name_rows.get(name)
+
+    def find_pgc(self, pgc_num):
+        """Позиция строки по номеру PGC или None"""
+        return self.pgc_rows.get(pgc_num)
+
+    def find_designation(self, text):
+        """Позиция строки по нормализованному обозначению (NGC 1300, ngc-1300, PGC012412) или None"""
+        key = GalaxyNames.normalize_designation(text)
+        position = self.designation_rows.get(key)
+        if position is None:
+            prefix, number = GalaxyNames.split_designation(key)
+            if prefix == 'PGC' and number.isdigit():
+                position = self.pgc_rows.get(int(number))
+        return position
+
+    def fuzzy_candidates(self, prefix, number, lengths):
+        """
+        Номера обозначений того же каталога с тем же началом номера: совпадать должны все
+        группы номера, кроме последней, и первые FUZZY_PREFIX символов последней группы
+
+        Args:
+            prefix: Каталожный префикс
+            number: Номер из запроса
+            lengths: Допустимые длины номеров кандидатов
+
+        Returns:
+            dict: {номер: позиция строки}
+        """
+        head, separator, last_group = number.rpartition('.')
+        block = prefix + head + separator + last_group[:self.FUZZY_PREFIX]
+        if self.sorted_designations is None:
+            self.sorted_designations = sorted(self.designation_rows)
+        keys = self.sorted_designations
+        candidates = {}
+        for key in keys[bisect.bisect_left(keys, block):bisect.bisect_left(keys, block + '\uffff')]:
+            if len(key) - len(prefix) in lengths:
+                candidates[key[len(prefix):]] = self.designation_rows[key]
+
+        # Номера PGC из колонки pgc: кандидаты с тем же началом номера образуют отрезки чисел
+        block_digits = last_group[:self.FUZZY_PREFIX]
+        if prefix == 'PGC' and not head and block_digits.isdigit() and not block_digits.startswith('0'):
+            if self.sorted_pgc is None:
+                pgc = np.fromiter(self.pgc_rows.keys(), dtype=np.int64, count=len(self.pgc_rows))
+                order = np.argsort(pgc)
+                positions = np.fromiter(self.pgc_rows.values(), dtype=np.int64, count=len(self.pgc_rows))
+                self.sorted_pgc = (pgc[order], positions[order])
+            pgc, positions = self.sorted_pgc
+            for length in lengths:
+                if length < len(block_digits):
+                    continue
+                scale = 10 ** (length - len(block_digits))
+                lo, hi = np.searchsorted(pgc, [int(block_digits) * scale, (int(block_digits) + 1) * scale])
+                for pgc_num, position in zip(pgc[lo:hi].tolist(), positions[lo:hi].tolist()):
+                    candidates[str(pgc_num)] = min(position, candidates.get(str(pgc_num), position))
+        return candidates
+
+    @staticmethod
+    def edit_distances(query, codes):
+        """
+        Расстояния Левенштейна от строки query до каждой строки матрицы кодов (все одной длины)
+
+        Args:
+            query: Строка запроса
+            codes: Матрица кодов символов (кандидаты × длина), dtype uint32
+
+        Returns:
+            np.ndarray: Расстояние до каждого кандидата
+        """
+        count, length = codes.shape
+        previous = np.tile(np.arange(length + 1, dtype=np.int32), (count, 1))
+        for i, char in enumerate(query, start=1):
+            current = np.empty_like(previous)
+            current[:, 0] = i
+            differs = codes != ord(char)
+            for j in range(1, length + 1):
+                current[:, j] = np.minimum(np.minimum(previous[:, j], current[:, j - 1]) + 1,
+                                           previous[:, j - 1] + differs[:, j - 1])
+            previous = current
+        return previous[:, length]
+
+    def find_fuzzy(self, text):
+        """
+        Позиция строки с ближайшим по расстоянию правки обозначением или None
+
+        Кандидаты - обозначения того же каталога с тем же началом номера (см. fuzzy_candidates)
+        и длиной номера, отличающейся не больше допустимого расстояния
+        (1 для номеров до трех символов, иначе 2), поэтому их немного даже в больших каталогах.
+        """
+        prefix, number = GalaxyNames.split_designation(GalaxyNames.normalize_designation(text))
+        if not number:
+            return None
+
+        limit = 1 if len(number) <= 3 else 2
+        lengths = range(max(len(number) - limit, 1), len(number) + limit + 1)
+        by_length = {}
+        for candidate, position in self.fuzzy_candidates(prefix, number, lengths).items():
+            by_length.setdefault(len(candidate), []).append((candidate, position))
+
+        best = (limit + 1, None)
+        for length, items in by_length.items():
+            codes = np.array([candidate for candidate, _ in items], dtype=f'U{length}').view(np.uint32)
+            distances = self.edit_distances(number, codes.reshape(len(items), length))
+            closest = int(distances.min())
+            if closest <= limit:
+                position = min(position for (_, position), distance in zip(items, distances) if distance == closest)
+                best = min(best, (closest, position))
+        return best[1]
+
+    def find_objname_substring(self, term):
+        """Позиция первой строки, objname которой содержит term (без учета регистра), или None"""
+        if len(self.objname_starts) == 0:
+            return None
+        offset = self.objname_text.find(term.lower())
+        if offset < 0:
+            return None
+        return int(np.searchsorted(self.objname_starts, offset, side='right')) - 1
+
+
+class NameSearchIndex:
+    """
+    Инвертированный индекс n-грамм (до триграмм) по названиям галактик для поиска подстроки
+
+    Все названия в нижнем регистре склеены в один текст. Для каждой n-граммы хранится
+    отсортированный список ее позиций в этом тексте, поэтому запрос длиннее трех символов
+    проверяется точно - совпадением позиций покрывающих его триграмм, без перебора названий.
+
+    Запросу короче MAX_GRAM символов соответствует большая часть каталога, и выборка всех
+    названий с такой подстрокой занимает десятки миллисекунд на миллионе названий - для него
+    search_names возвращает названия, начинающиеся с запроса (срез отсортированного списка).
+    """
+
+    MAX_GRAM = 3
+    BITS_PER_CHAR = 21  # Кодовая точка Unicode занимает не больше 21 бита
+    SEPARATOR = '\n'
+
+    def __init__(self, names):
+        """
+        Args:
+            names: Названия галактик (galaxy_names)
+        """
+        self.names = np.asarray(names, dtype=object)
+        self.grams = {}  # Длина n-граммы -> (отсортированные ключи, начала списков, позиции в тексте)
+
+        # lower() может изменить длину строки ('İ' -> 'i̇'), поэтому длины берутся у строк в нижнем регистре
+        lowered = [name.lower() for name in names]
+        text = self.SEPARATOR.join(lowered)
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        lengths = np.fromiter((len(name) for name in lowered), dtype=np.int64, count=len(lowered))
+        self.char_rows = np.repeat(np.arange(len(names), dtype=np.int32), lengths + 1)[:len(codes)]
+        is_separator = codes == ord(self.SEPARATOR)
+
+        for n in range(1, self.MAX_GRAM + 1):
+            count = max(len(codes) - n + 1, 0)
+            keys = np.zeros(count, dtype=np.uint64)
+            valid = np.ones(count, dtype=bool)
+            for offset in range(n):
+                keys = (keys << np.uint64(self.BITS_PER_CHAR)) | codes[offset:offset + count]
+                valid &= ~is_separator[offset:offset + count]
+            positions = np.flatnonzero(valid)
+            keys = keys[positions]
+
+            # Устойчивая сортировка сохраняет возрастание позиций внутри каждой n-граммы
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            positions = positions[order]
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1, [len(keys)]]).astype(np.int64)
+            self.grams[n] = (keys[starts[:-1]] if len(keys) else keys, starts, positions)
+
+        # Названия по алфавиту (в нижнем регистре) для поиска коротких запросов по началу названия
+        order = sorted(range(len(lowered)), key=lowered.__getitem__)
+        self.sorted_lowered = [lowered[row] for row in order]
+        self.sorted_names = [self.names[row] for row in order]
+
+    def gram_key(self, gram):
+        """Числовой ключ n-граммы"""
+        key = 0
+        for char in gram:
+            key = (key << self.BITS_PER_CHAR) | ord(char)
+        return np.uint64(key)
+
+    def postings(self, gram):
+        """Отсортированный массив позиций n-граммы в общем тексте названий"""
+        keys, starts, positions = self.grams[len(gram)]
+        key = self.gram_key(gram)
+        index = int(np.searchsorted(keys, key))
+        if index == len(keys) or keys[index] != key:
+            return positions[:0]
+        return positions[starts[index]:starts[index + 1]]
+
+    def search(self, query):
+        """
+        Строки, названия которых содержат query (без учета регистра)
+
+        Returns:
+            np.ndarray: Позиции строк по возрастанию
+        """
+        query = query.lower()
+        if not query:
+            return np.arange(len(self.names))
+
+        # Запрос покрывается n-граммами со смещениями 0, n, 2n, ... и последней n-граммой
+        n = min(len(query), self.MAX_GRAM)
+        offsets = sorted(set(range(0, len(query) - n + 1, n)) | {len(query) - n})
+        parts = sorted(((offset, self.postings(query[offset:offset + n])) for offset in offsets),
+                       key=lambda part: len(part[1]))
+
+        # Начала вхождений - по самой редкой n-грамме, остальные должны стоять на своих смещениях
+        anchor_offset, anchor = parts[0]
+        starts = anchor - anchor_offset
+        for offset, positions in parts[1:]:
+            if len(starts) == 0:
+                break
+            expected = starts + offset
+            found = np.minimum(np.searchsorted(positions, expected), len(positions) - 1)
+            starts = starts[positions[found] == expected]
+
+        rows = self.char_rows[starts]
+        if len(rows) > 1:
+            rows = rows[np.concatenate([[True], rows[1:] != rows[:-1]])]
+        return rows
+
+    def search_names(self, query):
+        """
+        Названия, содержащие query (без учета регистра), в порядке строк каталога
+
+        Для запроса короче MAX_GRAM символов - названия, начинающиеся с query, по алфавиту.
+        """
+        query = query.lower()
+        if 0 < len(query) < self.MAX_GRAM:
+            start = bisect.bisect_left(self.sorted_lowered, query)
+            stop = bisect.bisect_left(self.sorted_lowered, query + chr(sys.maxunicode), start)
+            return self.sorted_names[start:stop]
+        return self.names[self.search(query)].tolist()
+
+
+class ParamRegistry:
+    """Описания числовых параметров, вычисленные один раз за загрузку, и индекс для фильтра по ним"""
+
+    def __init__(self, columns, describe):
+        """
+        Args:
+            columns: Числовые колонки (numeric_columns)
+            describe: Функция колонка -> {'name', 'ru_name', 'unit'} (GalaxyAnalyzer.describe_param)
+        """
+        self.describe = describe
+        self.columns = list(columns)
+        self.info = {col: describe(col) for col in self.columns}
+        self.labels = [f"{col} - {self.info[col]['ru_name']}" for col in self.columns]
+        # Имя и описание - отдельные строки одного элемента: совпадение не может пересечь их границу
+        self.index = NameSearchIndex([f"{col}{NameSearchIndex.SEPARATOR}{self.info[col]['ru_name']}"
+                                      for col in self.columns])
+
+    def get(self, col_name):
+        """Описание параметра; описания прочих колонок вычисляются при первом обращении и запоминаются"""
+        info = self.info.get(col_name)
+        if info is None:
+            info = self.info[col_name] = self.describe(col_name)
+        return info
+
+    def filter(self, search_term):
+        """Подписи "колонка - описание" параметров, в имени или описании которых есть search_term"""
+        if not search_term:
+            return list(self.labels)
+        return [self.labels[row] for row in self.index.search(search_term).tolist()]
+
+
+class ParameterExpression:
+    """
+    Выражение над числовыми колонками (bt-vt, log10(vrot), max(bt, vt)), разобранное один раз
+    в ограниченное дерево AST и вычисляемое сразу над целыми столбцами numpy
+    """
+
+    # Допустимые узлы дерева: арифметика, числа, имена колонок и вызовы функций из FUNCTIONS
+    ALLOWED_NODES = (
+        ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+        ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd,
+    )
+
+    @staticmethod
+    def elementwise(ufunc):
+        """Поэлементный аналог встроенных min/max для двух и более аргументов"""
+        def apply(*args):
+            if len(args) < 2:
+                raise TypeError("ожидается не меньше двух аргументов")
+            return functools.reduce(ufunc, args)
+        return apply
+
+    # Векторные аналоги функций прежнего safe_dict (sum и len от числа всегда давали ошибку)
+    FUNCTIONS = {
+        'abs': np.abs, 'min': elementwise(np.minimum), 'max': elementwise(np.maximum),
+        'log': np.log, 'log10': np.log10, 'exp': np.exp, 'sqrt': np.sqrt,
+        'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    }
+    CONSTANTS = {'pi': np.pi, 'e': np.e}
+    # Функции, которые numexpr вычисляет так же, как numpy (min/max, // и % остаются numpy)
+    NUMEXPR_FUNCTIONS = {'abs', 'log', 'log10', 'exp', 'sqrt', 'sin', 'cos', 'tan'}
+    # Строк в одном блоке при вычислении через numpy: блок float64 каждой колонки - 256 KB,
+    # так что промежуточные массивы блока остаются в кэше процессора
+    BLOCK_ROWS = 32768
+
+    def __init__(self, expression):
+        """
+        Args:
+            expression: Текст выражения
+
+        Raises:
+            SyntaxError: Выражение не разбирается
+            ValueError: В выражении есть недопустимые конструкции
+        """
+        self.expression = expression
+        tree = ast.parse(expression.strip(), mode='eval')
+
+        names = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, self.ALLOWED_NODES):
+                raise ValueError(f"недопустимая конструкция в выражении: {type(node).__name__}")
+            if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or
+                                                   not isinstance(node.value, (int, float))):
+                raise ValueError(f"недопустимая константа в выражении: {node.value!r}")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in self.FUNCTIONS or node.keywords:
+                    raise ValueError(f"недопустимый вызов функции в выражении: {ast.unparse(node)}")
+            elif isinstance(node, ast.Name) and node.id not in self.FUNCTIONS and node.id not in self.CONSTANTS:
+                names.add(node.id)
+
+        self.names = sorted(names)  # Имена колонок, на которые ссылается выражение
+        self.code = compile(tree, '<expression>', 'eval')
+        self.tree = tree
+        self.numexpr_text = self.to_numexpr(tree)  # Текст для numexpr или None, если он не подходит
+
+    @classmethod
+    def to_numexpr(cls, tree):
+        """
+        Переводит дерево выражения в текст для numexpr.evaluate
+
+        Константы pi, e и целые числа подставляются как float (колонки всегда float64),
+        поэтому numexpr не переходит на целочисленную арифметику.
+
+        Returns:
+            Текст выражения или None, если в нем есть то, что numexpr считает иначе, чем numpy
+        """
+        calls = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+
+        class Translator(ast.NodeTransformer):
+            def visit_Name(self, node):
+                if node.id in cls.CONSTANTS:
+                    return ast.copy_location(ast.Constant(float(cls.CONSTANTS[node.id])), node)
+                if node.id in cls.FUNCTIONS and id(node) not in calls:
+                    raise ValueError(node.id)
+                return node
+
+            def visit_Constant(self, node):
+                return ast.copy_location(ast.Constant(float(node.value)), node)
+
+            def visit_UnaryOp(self, node):
+                self.generic_visit(node)
+                return node.operand if isinstance(node.op, ast.UAdd) else node
+
+            def visit_BinOp(self, node):
+                if isinstance(node.op, (ast.FloorDiv, ast.Mod)):
+                    raise ValueError(type(node.op).__name__)
+                return self.generic_visit(node)
+
+            def visit_Call(self, node):
+                if node.func.id not in cls.NUMEXPR_FUNCTIONS or len(node.args) != 1:
+                    raise ValueError(node.func.id)
+                node.args = [self.visit(arg) for arg in node.args]
+                return node
+
+        try:
+            return ast.unparse(Translator().visit(copy.deepcopy(tree)))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def numexpr_available():
+        """Установлен ли numexpr"""
+        return numexpr is not None
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def compiled(expression):
+        """Разобранное выражение из кэша (ошибки разбора не кэшируются и возникают заново)"""
+        return ParameterExpression(expression)
+
+    def evaluate(self, values):
+        """
+        Вычисляет выражение
+
+        Args:
+            values: {имя колонки: массив numpy или число}
+
+        Returns:
+            Массив numpy (или число) - результат без отбрасывания NaN и бесконечностей
+        """
+        # Как и раньше, функции и константы перекрывают одноименные колонки
+        namespace = {**values, **self.FUNCTIONS, **self.CONSTANTS}
+        with np.errstate(all='ignore'):
+            return eval(self.code, {"__builtins__": {}}, namespace)
+
+    def evaluate_columns(self, values, length, engine='numexpr'):
+        """
+        Вычисляет выражение над целыми колонками по блокам
+
+        numexpr сам делит колонки на блоки и обрабатывает их во всех потоках без промежуточных
+        массивов полной длины. Без него (или для выражений, которые он не поддерживает) колонки
+        делятся на блоки по BLOCK_ROWS строк и вычисляются numpy в пуле потоков, пишущих в общий
+        результат (ufunc numpy отпускают GIL).
+
+        Args:
+            values: {имя колонки: массив float64 длины length}
+            length: Количество строк
+            engine: 'numexpr' или 'numpy'
+
+        Returns:
+            Массив float64 длины length без отбрасывания NaN и бесконечностей
+        """
+        if engine == 'numexpr' and numexpr is not None and self.numexpr_text is not None:
+            try:
+                result = numexpr.evaluate(self.numexpr_text, local_dict={name: values[name] for name in self.names},
+                                          global_dict={})
+                return np.broadcast_to(np.asarray(result, dtype=np.float64), (length,))
+            except (KeyError, ValueError, TypeError, SyntaxError, NotImplementedError):
+                pass  # Например, имя колонки, недопустимое для numexpr - считаем через numpy
+
+        result = np.empty(length, dtype=np.float64)
+
+        def evaluate_block(start):
+            stop = min(start + self.BLOCK_ROWS, length)
+            result[start:stop] = self.evaluate({name: column[start:stop] for name, column in values.items()})
+
+        starts = range(0, length, self.BLOCK_ROWS)
+        workers = min(os.cpu_count() or 1, len(starts))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(evaluate_block, starts))
+        else:
+            for start in starts:
+                evaluate_block(start)
+        return result
+
+
+class ExpressionBatch:
+    """
+    Совместное вычисление нескольких выражений за один проход по каталогу блоками строк
+
+    Выражения переводятся в общий список шагов, в котором одинаковые подвыражения (и целые
+    выражения) встречаются один раз. В каждом блоке строк входные колонки приводятся к float64
+    и проверяются на пропуски тоже один раз для всех выражений.
+    """
+
+    # Те же операции, что выполняет eval над массивами numpy и числами
+    BINARY_OPERATORS = {
+        ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+        ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    }
+    UNARY_OPERATORS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+
+    def __init__(self, expressions):
+        """
+        Args:
+            expressions: Список выражений над числовыми колонками
+
+        Raises:
+            SyntaxError, ValueError: Выражение не разбирается или содержит недопустимые конструкции
+        """
+        self.expressions = list(expressions)
+        self.steps = []  # (функция или None, значение или имя колонки, номера шагов-аргументов)
+        self.step_index = {}  # ast.dump подвыражения -> номер шага
+        self.nodes_total = 0  # Сколько подвыражений было бы вычислено по отдельности
+        self.roots = []  # Номер шага результата каждого выражения
+        self.inputs = []  # Входные колонки каждого выражения
+
+        for expression in self.expressions:
+            compiled = ParameterExpression.compiled(expression)
+            self.roots.append(self.add_step(compiled.tree.body))
+            self.inputs.append(tuple(compiled.names))
+        self.names = sorted({name for names in self.inputs for name in names})
+
+    def add_step(self, node):
+        """Добавляет подвыражение (если его еще нет) и возвращает номер его шага"""
+        self.nodes_total += 1
+        key = ast.dump(node)
+        if key in self.step_index:
+            return self.step_index[key]
+
+        if isinstance(node, ast.Constant):
+            step = (None, node.value, ())
+        elif isinstance(node, ast.Name):
+            # Как в ParameterExpression.evaluate: функции и константы перекрывают одноименные колонки
+            if node.id in ParameterExpression.FUNCTIONS:
+                step = (None, ParameterExpression.FUNCTIONS[node.id], ())
+            elif node.id in ParameterExpression.CONSTANTS:
+                step = (None, ParameterExpression.CONSTANTS[node.id], ())
+            else:
+                step = (None, None, node.id)
+        elif isinstance(node, ast.BinOp):
+            step = (self.BINARY_OPERATORS[type(node.op)], None, (self.add_step(node.left), self.add_step(node.right)))
+        elif isinstance(node, ast.UnaryOp):
+            step = (self.UNARY_OPERATORS[type(node.op)], None, (self.add_step(node.operand),))
+        else:
+            step = (ParameterExpression.FUNCTIONS[node.func.id], None, tuple(self.add_step(arg) for arg in node.args))
+
+        self.steps.append(step)
+        self.step_index[key] = len(self.steps) - 1
+        return len(self.steps) - 1
+
+    def evaluate_block(self, columns):
+        """
+        Выполняет все шаги над одним блоком строк
+
+        Args:
+            columns: {имя колонки: массив float64 блока}
+
+        Returns:
+            list: Результат каждого шага или исключение, если шаг (или его аргумент) не вычислился
+        """
+        results = []
+        with np.errstate(all='ignore'):
+            for function, value, args in self.steps:
+                if function is None:
+                    results.append(columns[args] if isinstance(args, str) else value)
+                    continue
+                arguments = [results[arg] for arg in args]
+                failed = next((arg for arg in arguments if isinstance(arg, Exception)), None)
+                if failed is not None:
+                    results.append(failed)
+                    continue
+                try:
+                    results.append(function(*arguments))
+                except (ArithmeticError, ValueError, TypeError) as e:
+                    results.append(e)
+        return results
+
+    def evaluate(self, columns, length):
+        """
+        Вычисляет все выражения по блокам ParameterExpression.BLOCK_ROWS строк в пуле потоков
+
+        Args:
+            columns: {имя колонки: числовой массив длины length} для всех self.names
+            length: Количество строк
+
+        Returns:
+            tuple: (values, valid, failed) - {выражение: массив float64 с NaN в недопустимых строках},
+                   {выражение: булева маска допустимых строк} и {выражение: текст ошибки вычисления}.
+                   Строка допустима, как в get_parameter_data: во входных колонках нет пропусков,
+                   а результат конечен.
+        """
+        values = {expression: np.empty(length, dtype=np.float64) for expression in self.expressions}
+        valid = {expression: np.empty(length, dtype=bool) for expression in self.expressions}
+        failed = {}
+
+        def sweep_block(start):
+            stop = min(start + ParameterExpression.BLOCK_ROWS, length)
+            block = {name: np.asarray(columns[name][start:stop], dtype=np.float64) for name in self.names}
+            present = {name: ~np.isnan(block[name]) for name in self.names}
+            input_masks = {}
+            results = self.evaluate_block(block)
+
+            for expression, root, names in zip(self.expressions, self.roots, self.inputs):
+                result = results[root]
+                if isinstance(result, Exception):
+                    failed[expression] = str(result) or type(result).__name__
+                    continue
+                try:
+                    result = np.broadcast_to(np.asarray(result, dtype=np.float64), (stop - start,))
+                except (TypeError, ValueError) as e:
+                    failed[expression] = str(e)
+                    continue
+                # Маска пропусков общая для выражений с одинаковыми входными колонками
+                if names not in input_masks:
+                    input_masks[names] = np.logical_and.reduce([present[name] for name in names]) \
+                        if names else np.ones(stop - start, dtype=bool)
+                block_valid = np.isfinite(result) & input_masks[names]
+                valid[expression][start:stop] = block_valid
+                values[expression][start:stop] = np.where(block_valid, result, np.nan)
+
+        starts = range(0, length, ParameterExpression.BLOCK_ROWS)
+        workers = min(os.cpu_count() or 1, len(starts))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(sweep_block, starts))
+        else:
+            for start in starts:
+                sweep_block(start)
+
+        # Как get_parameter_data: выражение, которое не вычисляется, не дает ни одного значения
+        for expression in failed:
+            values[expression][:] = np.nan
+            valid[expression][:] = False
+        return values, valid, failed
+
+
+class DerivedColumn:
+    """
+    Именованная производная колонка: выражение над числовыми колонками (bt-vt, log10(vrot)),
+    вычисленное один раз и доступное как обычная колонка каталога
+
+    Определения хранятся в REGISTRY_FILE и переживают перезапуск, значения - в кэше каталога.
+    """
+
+    REGISTRY_FILE = os.path.join(APP_DIR, "derived_columns.json")  # Определения производных колонок
+
+    def __init__(self, name, expression):
+        """
+        Args:
+            name: Имя колонки
+            expression: Выражение над числовыми колонками
+
+        Raises:
+            SyntaxError, ValueError: Выражение не разбирается или содержит недопустимые конструкции
+        """
+        self.name = name
+        self.expression = expression
+        self.compiled = ParameterExpression.compiled(expression.strip())
+        self.inputs_key = None  # Ключ входных данных, по которым вычислены текущие значения
+        self.persistent = False  # Входные данные целиком из файла каталога - значения можно хранить в кэше
 
-        # Также проверяем другие возможные расширения
-        for ext in ['.jpeg', '.png', '.gif']:
-            alt_filename = os.path.join(image_folder, f"PGC{pgc_number}{ext}")
-            if os.path.exists(alt_filename):
-                return alt_filename
+    @staticmethod
+    def load_registry():
+        """Загружает сохраненные определения (неразбираемые пропускаются)"""
+        try:
+            with open(DerivedColumn.REGISTRY_FILE, 'r', encoding='utf-8') as f:
+                definitions = json.load(f)
+        except (OSError, ValueError):
+            return []
 
-        return None
+        columns = []
+        for definition in definitions:
+            try:
+                columns.append(DerivedColumn(definition['name'], definition['expression']))
+            except (KeyError, TypeError, SyntaxError, ValueError) as e:
+                print(f"Пропущено определение производной колонки {definition!r}: {e}")
+        return columns
 
     @staticmethod
-    def download_images_for_dataframe(df, image_folder="galaxy_images", pgc_column='pgc'):
+    def save_registry(columns):
+        """Сохраняет определения производных колонок"""
+        definitions = [{'name': column.name, 'expression': column.expression} for column in columns]
+        try:
+            with open(DerivedColumn.REGISTRY_FILE, 'w', encoding='utf-8') as f:
+                json.dump(definitions, f, ensure_ascii=False, indent=1)
+        except OSError as e:
+            print(f"Не удалось сохранить производные колонки: {e}")
+
+    def compute(self, values, length, engine):
         """
-        Загружает изображения для всех галактик в DataFrame
+        Вычисляет значения колонки
 
         Args:
-            df: DataFrame с данными галактик
-            image_folder: Папка для сохранения изображений
-            pgc_column: Название колонки с PGC номерами
+            values: {имя входной колонки: массив float64}
+            length: Количество строк
+            engine: Движок вычисления выражений (см. ParameterExpression.evaluate_columns)
 
         Returns:
-            dict: Словарь с информацией о загруженных изображениях
+            Массив float32 (если он хранит результат без потерь) или float64; NaN там, где
+            пропущена входная колонка или результат не конечен - как в get_parameter_data
         """
-        results = {
-            'success': 0,
-            'failed': 0,
-            'cached': 0,
-            'total': 0
+        result = np.array(self.compiled.evaluate_columns(values, length, engine), dtype=np.float64)
+        valid = np.isfinite(result)
+        for column_values in values.values():
+            valid &= ~np.isnan(column_values)
+        result[~valid] = np.nan
+        return result.astype(np.float32) if CompactStorage.fits_float32(result) else result
+
+
+class SeriesCache:
+    """
+    Кэш вычисленных рядов параметров с вытеснением давно не использованных (LRU)
+
+    Ключ - пара (версия данных, выражение). Версия увеличивается при каждой загрузке
+    файла, поэтому ряды прежних данных никогда не возвращаются; объем кэша ограничен
+    суммарным размером рядов в байтах.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # Ключ -> (ряд, размер в байтах), от старых к новым
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Возвращает ряд из кэша или None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, series):
+        """Кладет ряд в кэш, вытесняя давно не использованные ряды сверх лимита"""
+        size = int(series.memory_usage(index=True))
+        if size > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self.entries[key] = (series, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        """Удаляет все ряды (счетчики попаданий сохраняются)"""
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """Состояние кэша: количество рядов, занятые байты и счетчики"""
+        return {
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
         }
 
-        if pgc_column not in df.columns:
-            print(f"Колонка {pgc_column} не найдена в DataFrame")
-            return results
 
-        # Создаем папку для изображений
-        if not os.path.exists(image_folder):
-            os.makedirs(image_folder)
+class LoadProfile:
+    """Профиль загрузки каталога: время, количество строк и колонок на каждом этапе"""
+
+    # Названия этапов для окна профиля (в JSON этапы записываются ключами)
+    PHASE_TITLES = {
+        'file_signature': "Подпись файла",
+        'cache_read': "Чтение кэша",
+        'encoding_detection': "Определение кодировки",
+        'parse': "Разбор CSV",
+        'clean_numeric_columns': "Очистка числовых колонок",
+        'compact': "Компактное хранение",
+        'cache_write': "Запись кэша",
+        'find_numeric_columns': "Поиск числовых колонок",
+        'get_galaxy_names': "Названия галактик",
+        'galaxy_index': "Индекс поиска галактик",
+        'joined_columns': "Каталоги и производные",
+    }
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.mode = None  # Способ загрузки: cache, append, full, streaming, lazy, alternative
+        self.started = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.start_time = time.perf_counter()
+        self.total_seconds = None
+        self.phases = []
+
+    def reset(self):
+        """Забывает замеры неудавшейся попытки загрузки перед повторной загрузкой другим способом"""
+        self.mode = None
+        self.phases = []
+
+    def add(self, name, seconds, rows=None, columns=None, error=None):
+        """Добавляет замер этапа"""
+        entry = {'phase': name, 'seconds': round(seconds, 6), 'rows': rows, 'columns': columns}
+        if error is not None:
+            entry['error'] = error
+        self.phases.append(entry)
+
+    @contextlib.contextmanager
+    def phase(self, name, counts=None):
+        """
+        Замеряет этап загрузки, выполняемый внутри блока with
 
-        # Обрабатываем каждую галактику
-        for idx, row in df.iterrows():
-            pgc_val = row[pgc_column]
-            if pd.isna(pgc_val):
-                continue
+        Args:
+            name: Ключ этапа (см. PHASE_TITLES)
+            counts: Функция без аргументов, возвращающая (строк, колонок) после этапа
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.add(name, time.perf_counter() - start, error=str(e) or type(e).__name__)
+            raise
+        rows, columns = counts() if counts is not None else (None, None)
+        self.add(name, time.perf_counter() - start, rows, columns)
+
+    def finish(self):
+        """Фиксирует общее время загрузки"""
+        self.total_seconds = round(time.perf_counter() - self.start_time, 6)
+
+    def to_dict(self):
+        """Профиль в виде словаря для записи в JSON"""
+        return {
+            'file': self.file_path,
+            'mode': self.mode,
+            'started': self.started,
+            'total_seconds': self.total_seconds,
+            'phases': self.phases,
+        }
 
-            try:
-                pgc_num = int(float(pgc_val))
-                results['total'] += 1
+    def save_json(self, path):
+        """Записывает профиль в JSON-файл"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def format_table(self):
+        """Профиль в виде текстовой таблицы"""
+        lines = [f"{'Этап':<28}{'Время, с':>10}{'Строк':>12}{'Колонок':>10}"]
+        for entry in self.phases:
+            title = self.PHASE_TITLES.get(entry['phase'], entry['phase'])
+            rows = '' if entry['rows'] is None else entry['rows']
+            columns = '' if entry['columns'] is None else entry['columns']
+            lines.append(f"{title:<28}{entry['seconds']:>10.3f}{rows:>12}{columns:>10}")
+            if 'error' in entry:
+                lines.append(f"    ошибка: {entry['error']}")
+        if self.total_seconds is not None:
+            lines.append(f"{'Всего':<28}{self.total_seconds:>10.3f}")
+        return "\n".join(lines)
+
+
+class GalaxySelector(ttk.Frame):
+    """
+    Выбор галактики из очень длинного списка названий вместо ttk.Combobox
+
+    Названия не передаются в Tcl целиком: в выпадающем списке всегда лежат только видимые
+    строки, а полоса прокрутки управляет смещением окна по списку в памяти. Набор символов
+    переходит к первому названию, начинающемуся с набранной строки.
+    """
+
+    VISIBLE_ROWS = 15
+    TYPEAHEAD_RESET_MS = 1000  # Пауза, после которой набор префикса начинается заново
+
+    def __init__(self, parent, textvariable, width=25):
+        """
+        Args:
+            parent: Родительский виджет
+            textvariable: tk.StringVar с выбранным названием (galaxy_var)
+            width: Ширина поля в символах
+        """
+        super().__init__(parent)
+        self.variable = textvariable
+        self.names = []
+        self.sorted_names = None  # (названия в нижнем регистре по алфавиту, их позиции) для перехода по префиксу
+        self.top = 0  # Первая видимая строка выпадающего списка
+        self.cursor = 0  # Выделенная строка выпадающего списка
+        self.prefix = ''
+        self.prefix_job = None
+        self.popup = None
+        self.listbox = None
+        self.scrollbar = None
+        self.disabled = False
+
+        self.entry = ttk.Entry(self, textvariable=textvariable, width=width, state='readonly')
+        self.entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.button = ttk.Button(self, text="▼", width=2, command=self.toggle_popup)
+        self.button.pack(side=tk.LEFT)
+        self.entry.bind('<Button-1>', lambda event: self.toggle_popup())
+        self.entry.bind('<Down>', lambda event: self.open_popup())
+        self.entry.bind('<KeyPress>', self.on_key)
+
+    def set_values(self, names):
+        """Задает список названий (список или массив); в Tcl ничего не копируется"""
+        self.names = names
+        self.sorted_names = None
+        self.top = 0
+        self.cursor = 0
+        if self.popup is not None:
+            self.render()
+
+    def set(self, name):
+        """Выбирает название"""
+        self.variable.set(name)
+
+    def configure(self, cnf=None, **kw):
+        """Поддерживает state='readonly'/'normal'/'disabled', как у ttk.Combobox"""
+        state = kw.pop('state', None)
+        if state is not None:
+            self.disabled = state == 'disabled'
+            self.entry.configure(state='disabled' if self.disabled else 'readonly')
+            self.button.configure(state='disabled' if self.disabled else 'normal')
+            if self.disabled:
+                self.close_popup()
+        if cnf or kw:
+            super().configure(cnf, **kw)
+
+    config = configure
+
+    def toggle_popup(self):
+        """Открывает или закрывает выпадающий список"""
+        if self.popup is None:
+            self.open_popup()
+        else:
+            self.close_popup()
 
-                # Проверяем, есть ли изображение в кэше
-                cached_path = GalaxyImageDownloader.get_galaxy_image_from_cache(pgc_num, image_folder)
-                if cached_path:
-                    results['cached'] += 1
-                    print(f"Изображение для PGC{pgc_num} уже в кэше")
-                    continue
+    def open_popup(self):
+        """Открывает выпадающий список под полем на выбранном названии"""
+        if self.disabled or self.popup is not None or len(self.names) == 0:
+            return
 
-                # Загружаем изображение
-                image_path = GalaxyImageDownloader.download_galaxy_image(pgc_num, image_folder)
-                if image_path:
-                    results['success'] += 1
-                    print(f"Успешно загружено изображение для PGC{pgc_num}")
-                else:
-                    results['failed'] += 1
-                    print(f"Не удалось загрузить изображение для PGC{pgc_num}")
+        self.popup = tk.Toplevel(self)
+        self.popup.overrideredirect(True)
+        self.popup.geometry(f"+{self.winfo_rootx()}+{self.winfo_rooty() + self.winfo_height()}")
+
+        self.listbox = tk.Listbox(self.popup, height=self.VISIBLE_ROWS, width=self.entry.cget('width') + 2,
+                                  exportselection=False, activestyle='none')
+        self.scrollbar = ttk.Scrollbar(self.popup, orient=tk.VERTICAL, command=self.on_scroll)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox.bind('<ButtonRelease-1>', self.on_click)
+        self.listbox.bind('<MouseWheel>', lambda event: self.scroll_by(-1 if event.delta > 0 else 1))
+        self.listbox.bind('<Button-4>', lambda event: self.scroll_by(-1))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll_by(1))
+        self.listbox.bind('<Up>', lambda event: self.move_cursor(-1))
+        self.listbox.bind('<Down>', lambda event: self.move_cursor(1))
+        self.listbox.bind('<Prior>', lambda event: self.move_cursor(-self.VISIBLE_ROWS))
+        self.listbox.bind('<Next>', lambda event: self.move_cursor(self.VISIBLE_ROWS))
+        self.listbox.bind('<Return>', lambda event: self.choose(self.cursor))
+        self.listbox.bind('<Escape>', lambda event: self.close_popup())
+        self.listbox.bind('<KeyPress>', self.on_key)
+        self.listbox.bind('<FocusOut>', lambda event: self.after(100, self.close_if_unfocused))
+
+        current = self.variable.get()
+        if not (0 <= self.cursor < len(self.names) and self.names[self.cursor] == current):
+            position = self.find_name(current)
+            self.cursor = 0 if position is None else position
+        self.show_row(self.cursor)
+        self.listbox.focus_set()
+
+    def close_popup(self):
+        """Закрывает выпадающий список"""
+        if self.popup is not None:
+            self.popup.destroy()
+            self.popup = None
+            self.listbox = None
+            self.scrollbar = None
+
+    def close_if_unfocused(self):
+        """Закрывает список, если фокус ушел за его пределы"""
+        if self.popup is not None and self.focus_get() is not self.listbox:
+            self.close_popup()
+
+    def render(self):
+        """Перерисовывает видимые строки списка и полосу прокрутки"""
+        total = len(self.names)
+        self.top = max(0, min(self.top, total - self.VISIBLE_ROWS))
+        visible = self.names[self.top:self.top + self.VISIBLE_ROWS]
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *visible)
+        if self.top <= self.cursor < self.top + len(visible):
+            self.listbox.selection_set(self.cursor - self.top)
+        if total:
+            self.scrollbar.set(self.top / total, min((self.top + self.VISIBLE_ROWS) / total, 1.0))
+
+    def show_row(self, row):
+        """Прокручивает список так, чтобы строка row была видна"""
+        if row < self.top or row >= self.top + self.VISIBLE_ROWS:
+            self.top = row - self.VISIBLE_ROWS // 2
+        self.render()
+
+    def scroll_by(self, rows):
+        """Прокрутка на rows строк"""
+        self.top += rows
+        self.render()
+
+    def on_scroll(self, *args):
+        """Команда полосы прокрутки: moveto доля | scroll n units/pages"""
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.names))
+            self.render()
+        elif args[0] == 'scroll':
+            step = self.VISIBLE_ROWS if args[2] == 'pages' else 1
+            self.scroll_by(int(args[1]) * step)
+
+    def move_cursor(self, rows):
+        """Перемещает выделение в открытом списке"""
+        self.cursor = max(0, min(self.cursor + rows, len(self.names) - 1))
+        self.show_row(self.cursor)
+        return 'break'
+
+    def on_click(self, event):
+        """Выбор строки щелчком"""
+        if self.listbox.size():
+            self.choose(self.top + self.listbox.nearest(event.y))
+
+    def choose(self, row):
+        """Выбирает название строки row и закрывает список"""
+        if 0 <= row < len(self.names):
+            self.cursor = row
+            self.variable.set(self.names[row])
+            self.event_generate('<<ComboboxSelected>>')
+        self.close_popup()
+
+    def on_key(self, event):
+        """Набор символов переходит к первому названию с набранным префиксом"""
+        if self.disabled or not event.char or not event.char.isprintable():
+            return None
 
-                # Небольшая пауза, чтобы не перегружать сервер
-                time.sleep(0.5)
+        self.prefix += event.char.lower()
+        if self.prefix_job is not None:
+            self.after_cancel(self.prefix_job)
+        self.prefix_job = self.after(self.TYPEAHEAD_RESET_MS, self.reset_prefix)
 
-            except Exception as e:
-                print(f"Ошибка при обработке PGC значения {pgc_val}: {e}")
-                results['failed'] += 1
+        row = self.find_prefix(self.prefix)
+        if row is not None:
+            self.cursor = row
+            if self.popup is not None:
+                self.show_row(row)
+            else:
+                self.variable.set(self.names[row])
+        return 'break'
+
+    def reset_prefix(self):
+        """Сбрасывает набранный префикс"""
+        self.prefix = ''
+        self.prefix_job = None
+
+    def sorted_index(self):
+        """Названия в нижнем регистре по алфавиту и их позиции (строятся один раз на список)"""
+        if self.sorted_names is None:
+            lowered = np.array([str(name).lower() for name in self.names])
+            order = np.argsort(lowered, kind='stable')
+            self.sorted_names = (lowered[order], order)
+        return self.sorted_names
+
+    def find_prefix(self, prefix):
+        """Позиция первой по порядку строки, название которой начинается с prefix (без учета регистра)"""
+        lowered, order = self.sorted_index()
+        lo, hi = np.searchsorted(lowered, [prefix, prefix + '\uffff'])
+        if lo == hi:
+            return None
+        return int(order[lo:hi].min())
+
+    def find_name(self, name):
+        """Позиция первой строки с точно таким названием или None (двоичным поиском по sorted_index)"""
+        lowered, order = self.sorted_index()
+        key = name.lower()
+        lo = np.searchsorted(lowered, key, side='left')
+        hi = np.searchsorted(lowered, key, side='right')
+        for position in sorted(order[lo:hi].tolist()):
+            if self.names[position] == name:
+                return position
+        return None
 
-        print(f"\nРезультаты загрузки изображений:")
-        print(f"  Всего галактик: {results['total']}")
-        print(f"  Успешно загружено: {results['success']}")
-        print(f"  Уже в кэше: {results['cached']}")
-        print(f"  Не удалось загрузить: {results['failed']}")
 
-        return results
+class LoadCancelled(Exception):
+    """Загрузка данных отменена пользователем"""
 
 
 class GalaxyAnalyzer:
+    # Этапы загрузки данных для окна хода загрузки
+    LOAD_PHASES = [
+        ('read', "Чтение файла"),
+        ('clean', "Очистка числовых колонок"),
+        ('numeric', "Поиск числовых колонок"),
+        ('names', "Построение названий галактик"),
+        ('joined', "Присоединенные каталоги и производные колонки"),
+    ]
+    # Период проверки файла в режиме слежения, мс
+    WATCH_INTERVAL_MS = 2000
+    # Предельный объем кэша вычисленных рядов параметров, байт
+    SERIES_CACHE_MAX_BYTES = 256 * 1024 ** 2
+    # Строк в выборке, по которой еще не разобранные колонки проверяются на числовые значения
+    COLUMN_SAMPLE_ROWS = 1000
+    # Русские описания параметров каталога HyperLeda
+    PARAM_DESCRIPTIONS = {
+        'pgc': 'Номер в каталоге PGC',
+        'objname': 'Основное название объекта',
+        'objtype': 'Тип объекта (G=галактика; S=звезда...)',
+        'al1950': 'Прямое восхождение 1950 (часы)',
+        'de1950': 'Склонение 1950 (градусы)',
+        'al2000': 'Прямое восхождение 2000 (часы)',
+        'de2000': 'Склонение 2000 (градусы)',
+        'l2': 'Галактическая долгота (градусы)',
+        'b2': 'Галактическая широта (градусы)',
+        'sgl': 'Сверхгалактическая долгота (градусы)',
+        'sgb': 'Сверхгалактическая широта (градусы)',
+        'type': 'Морфологический тип',
+        'bar': 'Галактика с баром (B)',
+        'ring': 'Галактика с кольцом (R)',
+        'multiple': 'Кратная галактика (M)',
+        'compactness': 'Компактность (C) или диффузность (D)',
+        't': 'Код морфологического типа',
+        'e_t': 'Ошибка кода морфологического типа',
+        'logd25': 'Логарифм видимого диаметра (d25 в 0.1 угл. мин)',
+        'e_logd25': 'Ошибка логарифма видимого диаметра',
+        'logr25': 'Логарифм отношения осей (большая/малая ось)',
+        'e_logr25': 'Ошибка логарифма отношения осей',
+        'pa': 'Позиционный угол большой оси (Север-Восток)',
+        'brief': 'Средняя эффективная поверхностная яркость',
+        'e_brief': 'Ошибка средней эффективной поверхностной яркости',
+        'logdc': 'Логарифм скорректированного видимого диаметра (dc в 0.1 угл. мин)',
+        'bt': 'Полная B-звездная величина',
+        'e_bt': 'Ошибка полной B-звездная величина',
+        'it': 'Полная I-звездная величина',
+        'e_it': 'Ошибка полной I-звездная величина',
+        'ut': 'Полная U-звездная величина',
+        'e_ut': 'Ошибка полной U-звездной величины',
+        'vt': 'Полная V-звездная величина',
+        'e_vt': 'Ошибка полной V-звездной величины',
+        'kt': 'Полная K-звездная величина',
+        'e_kt': 'Ошибка полной K-звездной величины',
+        'ube': 'Эффективный цвет U-B',
+        'bve': 'Эффективный цвет B-V',
+        'ubtc': 'Скорректированный полный цвет U-B',
+        'bvtc': 'Скорректированный полный цвет B-V',
+        'vmaxg': 'Видимая максимальная скорость вращения газа',
+        'e_vmaxg': 'Ошибка видимой максимальной скорости вращения газа',
+        'vmaxs': 'Видимая максимальная скорость вращения звезд',
+        'e_vmaxs': 'Ошибка видимой максимальной скорости вращения звезд',
+        'vdis': 'Центральная дисперсия скоростей',
+        'e_vdis': 'Ошибка центральной дисперсии скоростей',
+        'vrot': 'Максимальная скорость вращения, скорректированная на наклон',
+        'e_vrot': 'Ошибка максимальной скорости вращения',
+        'vrad': 'Гелиоцентрическая лучевая скорость (радио)',
+        'e_vrad': 'Ошибка гелиоцентрической лучевой скорости (радио)',
+        'vopt': 'Гелиоцентрическая лучевая скорость (оптическая)',
+        'e_vopt': 'Ошибка гелиоцентрической лучевой скорости (оптическая)',
+        'v': 'Средняя гелиоцентрическая лучевая скорость',
+        'e_v': 'Ошибка средней гелиоцентрической лучевой скорости',
+        'vlg': 'Лучевая скорость относительно Местной группы',
+        'vgsr': 'Лучевая скорость относительно GSR',
+        'vvir': 'Лучевая скорость, скорректированная на падение на Virgo',
+        'v3k': 'Лучевая скорость относительно реликтового излучения',
+        'm21': 'Поток линии 21 см в звездных величинах',
+        'e_m21': 'Ошибка потока линии 21 см',
+        'mfir': 'Звездная величина в дальнем ИК-диапазоне',
+        'm21c': 'Скорректированный потока линии 21 см в звездных величинах',
+        'hic': 'Индекс 21 см btc-m21c в звездных величинах',
+        'ag': 'Галактическое поглощение в B-диапазоне',
+        'ai': 'Внутреннее поглощение из-за наклона в B-диапазоне',
+        'a21': 'Самопоглощение на линии 21 см',
+        'incl': 'Наклон между лучом зрения и полярной осей галактики',
+        'btc': 'Скорректированная полная B-звездная величина',
+        'itc': 'Скорректированная полная I-звездная величина',
+        'mg2': 'Центральный индекс Линка Mg2',
+        'e_mg2': 'Ошибка центрального индекса Линка Mg2',
+        'logavmm': 'Логарифм среднего значения',
+        'e_logavmm': 'Ошибка логарифма среднего значения',
+        'modz': 'Космологический модуль расстояния (от vvir с ΛCDM)',
+        'e_modz': 'Ошибка космологического модуля расстояния',
+        'mod0': 'Модуль расстояния от измерений расстояния',
+        'e_mod0': 'Ошибка модуля расстояния от измерений расстояния',
+        'mabs': 'Абсолютная B-звездная величина',
+        'e_mabs': 'Ошибка абсолютной B-звездной величины',
+        'modbest': 'Лучший модуль расстояния (комбинация mod0 и modz)',
+        'e_modbest': 'Ошибка лучшего модуля расстояния',
+        'bri25': 'Средняя поверхностная яркость внутри изофоты 25',
+        'numtype': 'Числовой тип',
+        'hptr': 'Указатель',
+        'agnclass': 'Класс активности активного ядра',
+        'f_astrom': 'Флаг точности астрометрии',
+        'name': 'Название',
+        'id': 'Идентификатор',
+        'stage': 'Стадия Хаббла',
+        'mtype': 'Морфологический тип',
+        'b': 'Параметр бара',
+    }
+
     def __init__(self, root):
         self.root = root
         self.root.title("Анализатор галактик с баром")
@@ -299,7 +2656,30 @@ class GalaxyAnalyzer:
         self.df = None
         self.numeric_columns = []
         self.galaxy_names = []
+        self.unparseable_counts = {}  # Количество нечисловых значений по колонкам
         self.current_file_path = None
+        self.current_encoding = None  # Кодировка текущего файла (определяется при загрузке)
+        self.lazy_catalog = None  # Лениво открытый каталог (режим load_settings['lazy'])
+        self.numeric_store = {}  # Числовые колонки без NaN поверх общих файлов кэша (np.memmap)
+        self.streaming_peak_bytes = None  # Пик памяти данных при потоковой загрузке (для строки состояния)
+        self.load_thread = None  # Поток фоновой загрузки данных
+        self.load_queue = None  # Очередь сообщений от потока загрузки
+        self.load_cancel_event = None  # Флаг отмены загрузки
+        self.load_on_complete = None  # Действие после успешной загрузки
+        self.load_progress_window = None
+        self.file_snapshot = None  # Состояние загруженного файла для инкрементальной перезагрузки
+        self.appended_rows = 0  # Сколько строк добавила последняя инкрементальная перезагрузка
+        self.watched_stat = None  # (размер, время изменения) файла, замеченные режимом слежения
+        self.memory_report = None  # Память колонок до и после компактного представления
+        self.load_profile = None  # Профиль последней загрузки (LoadProfile)
+        self.galaxy_index = None  # Индексы поиска строки галактики по названию и PGC (GalaxyIndex)
+        self.name_search_index = None  # Индекс n-грамм названий для поиска (строится в фоне после загрузки)
+        self.param_registry = None  # Описания числовых параметров текущей загрузки (ParamRegistry)
+        self.parsed_expressions = {}  # Строка выражения -> результат parse_parameter_expression
+        self.data_version = 0  # Увеличивается при каждой смене данных, входит в ключ кэша рядов
+        self.series_cache = SeriesCache(self.SERIES_CACHE_MAX_BYTES)  # Вычисленные ряды параметров
+        self.catalog_sources = []  # Дополнительные каталоги, присоединенные по pgc (CatalogSource)
+        self.derived_columns = DerivedColumn.load_registry()  # Именованные производные колонки (DerivedColumn)
         self.current_canvas = None
         self.current_fig = None
         self.current_ax = None
@@ -348,12 +2728,31 @@ class GalaxyAnalyzer:
             'bivariate_3d_zlim': None,  # Ограничение по оси Z (None - автоматическое)
         }
 
+        # Настройки загрузки данных
+        self.load_settings = {
+            'use_cache': True,  # Бинарный кэш очищенного каталога рядом с CSV
+            'streaming': False,  # Потоковое чтение файла частями (для очень больших каталогов)
+            'chunksize': 100000,  # Количество строк в одной части при потоковом чтении
+            'usecols': None,  # Список нужных колонок (None - все колонки)
+            'float32': True,  # Хранить числовые колонки как float32 при потоковом чтении
+            'categorical_columns': ['objtype', 'type'],  # Строковые колонки для хранения как category
+            'lazy': False,  # Ленивое открытие: колонки разбираются при первом обращении
+            'watch_file': False,  # Следить за файлом и автоматически подгружать изменения
+            'engine': 'pandas',  # Движок полного чтения CSV: 'pandas' или многопоточный 'pyarrow'
+            'compact': False,  # Компактное хранение: float32 без потери точности и категориальные колонки
+            'verbose': False,  # Выводить в консоль структуру данных и профиль загрузки
+            'expression_engine': 'numexpr',  # Вычисление выражений: 'numexpr' (если установлен) или 'numpy'
+        }
+
         # Создание интерфейса
         self.create_interface()
 
         # Автоматическая попытка загрузки файла по умолчанию
         self.try_load_default_file()
 
+        # Слежение за изменениями файла (работает, если включено в настройках загрузки)
+        self.root.after(self.WATCH_INTERVAL_MS, self.watch_file_changes)
+
     def create_no_image_placeholder(self):
         """Создает изображение-заглушку для случаев, когда нет изображения галактики"""
         try:
@@ -394,6 +2793,14 @@ class GalaxyAnalyzer:
                    command=self.reload_file).pack(side=tk.LEFT, padx=5)
         ttk.Button(file_frame, text="Загрузить все изображения",
                    command=self.download_all_images).pack(side=tk.LEFT, padx=5)
+        ttk.Button(file_frame, text="Настройки загрузки",
+                   command=self.show_load_settings).pack(side=tk.LEFT, padx=5)
+        ttk.Button(file_frame, text="Добавить каталог",
+                   command=self.add_catalog_source).pack(side=tk.LEFT, padx=5)
+        ttk.Button(file_frame, text="Убрать доп. каталоги",
+                   command=self.remove_catalog_sources).pack(side=tk.LEFT, padx=5)
+        ttk.Button(file_frame, text="Производные колонки",
+                   command=self.show_derived_columns).pack(side=tk.LEFT, padx=5)
 
         status_frame = ttk.LabelFrame(top_frame, text="Статус", padding=5)
         status_frame.pack(side=tk.RIGHT, fill=tk.X)
@@ -453,8 +2860,9 @@ class GalaxyAnalyzer:
 
         ttk.Label(galaxy_frame, text="Галактика:").grid(row=0, column=0, padx=(0, 10))
         self.galaxy_var = tk.StringVar()
-        self.galaxy_combo = ttk.Combobox(galaxy_frame, textvariable=self.galaxy_var,
-                                         values=self.galaxy_names, width=25, state="readonly")
+        # Список не передается в Tcl целиком - отображаются только видимые строки
+        self.galaxy_combo = GalaxySelector(galaxy_frame, textvariable=self.galaxy_var, width=25)
+        self.galaxy_combo.set_values(self.galaxy_names)
         self.galaxy_combo.grid(row=0, column=1, padx=(0, 10))
         if self.galaxy_names:
             self.galaxy_combo.set(self.galaxy_names[0])
@@ -466,6 +2874,10 @@ class GalaxyAnalyzer:
 
         ttk.Button(galaxy_frame, text="Найти",
                    command=self.search_galaxy).grid(row=0, column=4, padx=5)
+        self.search_count_label = ttk.Label(galaxy_frame, text="", foreground="gray")
+        self.search_count_label.grid(row=0, column=5, padx=5)
+        # Список галактик фильтруется при каждом нажатии клавиши
+        self.search_var.trace_add('write', lambda *args: self.filter_galaxies())
 
         options_frame = ttk.LabelFrame(control_frame, text="Статистические линии", padding=5)
         options_frame.grid(row=4, column=0, columnspan=6, sticky=tk.W, pady=10)
@@ -488,6 +2900,8 @@ class GalaxyAnalyzer:
                    command=self.show_extended_statistics).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Информация о файле",
                    command=self.show_file_info).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Профиль загрузки",
+                   command=self.show_load_profile).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Справочный материал",
                    command=self.show_reference_material).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Экспорт графика",
@@ -796,7 +3210,7 @@ class GalaxyAnalyzer:
                         self.current_canvas.draw_idle()
 
                         # Обновляем выбранную галактику в комбобоксе
-                        if galaxy_name in self.galaxy_names:
+                        if self.galaxy_index.find_name(galaxy_name) is not None:
                             self.galaxy_var.set(galaxy_name)
 
                         # Пытаемся получить PGC номер и загрузить изображение
@@ -838,8 +3252,8 @@ class GalaxyAnalyzer:
         for file_name in default_files:
             if os.path.exists(file_name):
                 self.current_file_path = file_name
-                self.load_data()
-                messagebox.showinfo("Успех", f"Файл {file_name} загружен автоматически")
+                self.load_data(on_complete=lambda: messagebox.showinfo(
+                    "Успех", f"Файл {file_name} загружен автоматически"))
                 return
 
         # Если файл не найден, показываем диалог выбора файла
@@ -849,246 +3263,1325 @@ class GalaxyAnalyzer:
     def load_file_dialog(self):
         """Диалог выбора файла"""
         file_path = filedialog.askopenfilename(
-            title="Выберите файл данных",
+            title="Выберите файл данных",
+            filetypes=[
+                ("CSV files", "*.csv"),
+                ("Text files", "*.txt"),
+                ("All files", "*.*")
+            ]
+        )
+
+        if file_path:
+            self.current_file_path = file_path
+            self.load_data()
+        else:
+            # Если пользователь отменил выбор, создаем пустой датафрейм
+            self.df = pd.DataFrame()
+            self.numeric_columns = []
+            self.galaxy_names = []
+            messagebox.showwarning("Предупреждение",
+                                   "Файл не выбран. Программа будет работать в демонстрационном режиме.")
+
+    def clean_numeric_value(self, value):
+        """Очистка числовых значений от лишних пробелов и символов"""
+        return NumericCleaner.clean_value(value)
+
+    def load_data(self, on_complete=None, show_progress=True):
+        """
+        Запускает загрузку данных из файла в фоновом потоке
+
+        Ход загрузки по этапам передается в главный поток через очередь, которую опрашивает
+        poll_load_queue (root.after). Интерфейс обновляется только после завершения загрузки.
+
+        Args:
+            on_complete: Функция без аргументов, вызываемая после успешной загрузки
+            show_progress: Показывать окно хода загрузки (в режиме слежения за файлом - нет)
+        """
+        if not self.current_file_path:
+            messagebox.showerror("Ошибка", "Файл не выбран")
+            return
+
+        if self.load_thread is not None and self.load_thread.is_alive():
+            messagebox.showwarning("Предупреждение", "Загрузка файла уже выполняется")
+            return
+
+        self.load_queue = queue.Queue()
+        self.load_cancel_event = threading.Event()
+        self.load_on_complete = on_complete
+
+        # Фоновый поток работает с поверхностной копией анализатора: текущие данные остаются
+        # доступны интерфейсу, пока новые не загружены целиком, а отмена ничего не портит
+        loader = copy.copy(self)
+
+        if show_progress:
+            self.show_load_progress()
+        self.load_thread = threading.Thread(target=loader.load_data_worker)
+        self.load_thread.daemon = True
+        self.load_thread.start()
+        self.root.after(100, self.poll_load_queue)
+
+    def load_data_worker(self):
+        """Тело фонового потока загрузки: результат или ошибка передаются через очередь"""
+        try:
+            self.load_data_pipeline()
+            with self.load_profile.phase('joined_columns', lambda: (len(self.df), len(self.numeric_columns))):
+                self.prepare_joined_columns()
+            self.load_profile.finish()
+            if self.load_settings['verbose']:
+                print("\nПрофиль загрузки:")
+                print(self.load_profile.format_table())
+            self.load_queue.put(('done', self))
+        except LoadCancelled:
+            self.load_queue.put(('cancelled', None))
+        except Exception as e:
+            self.load_queue.put(('error', e))
+
+    def load_data_pipeline(self):
+        """Загрузка, очистка и подготовка данных из файла (без обращений к интерфейсу)"""
+        self.appended_rows = 0
+        self.streaming_peak_bytes = None
+        profile = self.load_profile = LoadProfile(self.current_file_path)
+
+        # Производные колонки вычисляются заново по загруженным данным (materialize_derived_columns);
+        # у копии загрузчика свои определения, чтобы не менять состояние, которым пользуется интерфейс
+        derived = self.derived_column_names()
+        self.derived_columns = [DerivedColumn(column.name, column.expression) for column in self.derived_columns]
+
+        # Если в файл только дописали строки, разбираем лишь добавленный хвост
+        signature = self.check_append_only_change()
+        if signature is not None:
+            try:
+                profile.mode = 'append'
+                self.append_file_tail(signature, derived)
+                return
+            except LoadCancelled:
+                raise
+            except Exception as e:
+                print(f"Инкрементальная перезагрузка не удалась ({e}), выполняется полная загрузка")
+                self.appended_rows = 0
+                # Профиль описывает только полную загрузку, а не смесь двух попыток
+                profile.reset()
+
+        try:
+            self.current_encoding = None
+            self.lazy_catalog = None
+            self.numeric_store = {}
+            self.file_snapshot = None
+            self.memory_report = None
+
+            self.report_load_progress('read', "Проверка файла")
+            with profile.phase('file_signature'):
+                signature = CatalogCache.file_signature(self.current_file_path)
+                signature['options'] = self.get_load_options_key()
+
+            # Пробуем взять уже очищенный каталог из бинарного кэша
+            if self.load_settings['use_cache']:
+                with profile.phase('cache_read', lambda: cached_df.shape if cached_df is not None else (None, None)):
+                    cached_df = CatalogCache.load(self.current_file_path, signature)
+                    if cached_df is not None:
+                        self.df = cached_df
+                        cache_extra = CatalogCache.read_manifest(self.current_file_path).get('extra', {})
+                        self.unparseable_counts = cache_extra.get('unparseable_counts', {})
+                        self.memory_report = cache_extra.get('memory_report')
+                        self.numeric_store = CatalogCache.open_numeric_store(self.current_file_path)
+                if cached_df is not None:
+                    profile.mode = 'cache'
+                    print(f"✓ Данные загружены из кэша. Размер: {self.df.shape}")
+                    self.prepare_loaded_catalog()
+                    self.remember_file_snapshot(signature)
+                    return
+
+            # Определяем кодировку по выборке байтов и разбираем файл ровно один раз
+            self.report_load_progress('read', "Определение кодировки")
+            with profile.phase('encoding_detection'):
+                encoding, remembered = EncodingDetector.detect(self.current_file_path)
+            self.current_encoding = encoding
+            self.report_load_progress('read', f"Кодировка: {encoding}")
+            if self.load_settings['lazy'] and LazyCatalog.supports_encoding(encoding):
+                profile.mode = 'lazy'
+                with profile.phase('parse', self.frame_counts):
+                    self.df = self.open_lazy_catalog(encoding)
+            elif self.load_settings['streaming']:
+                # Части очищаются сразу после чтения - этапы разбора и очистки замеряются внутри
+                profile.mode = 'streaming'
+                self.df = self.load_data_streaming(encoding)
+            else:
+                profile.mode = 'full'
+                with profile.phase('parse', self.frame_counts):
+                    self.df = self.read_catalog_full(encoding)
+                # Очищаем числовые колонки
+                self.report_load_progress('clean')
+                with profile.phase('clean_numeric_columns', self.frame_counts):
+                    self.clean_numeric_columns()
+
+            if self.load_settings['compact'] and self.lazy_catalog is None:
+                self.report_load_progress('clean', "Компактное представление колонок")
+                with profile.phase('compact', self.frame_counts):
+                    self.compact_data()
+            EncodingDetector.remember(self.current_file_path, encoding)
+            print(f"✓ Файл загружен с кодировкой {encoding}" + (" (запомненной)" if remembered else ""))
+
+            print(f"✓ Данные загружены успешно. Размер: {self.df.shape}")
+            print(f"✓ Файл: {os.path.basename(self.current_file_path)}")
+
+            # Сохраняем очищенный каталог, чтобы следующий запуск обошелся без разбора CSV
+            # Лениво открытый каталог еще не разобран - кэшировать нечего
+            if self.load_settings['use_cache'] and self.lazy_catalog is None:
+                self.report_load_progress('clean', "Запись кэша каталога")
+                with profile.phase('cache_write', self.frame_counts):
+                    self.save_catalog_cache(signature)
+
+            # Покажем структуру данных для диагностики
+            if self.load_settings['verbose']:
+                print("\nПервые 5 строк данных:")
+                print(self.df.head())
+                print("\nКолонки данных:")
+                print(self.df.columns.tolist())
+                print("\nТипы данных:")
+                print(self.df.dtypes)
+
+            self.prepare_loaded_catalog()
+            self.remember_file_snapshot(signature)
+
+        except LoadCancelled:
+            raise
+        except Exception as e:
+            print(f"Ошибка загрузки: {e}")
+            # Попробуем альтернативный способ чтения
+            try:
+                profile.mode = 'alternative'
+                self.load_data_alternative()
+            except LoadCancelled:
+                raise
+            except Exception as e2:
+                print(f"Альтернативный способ тоже не сработал: {e2}")
+                raise e
+
+    def frame_counts(self):
+        """Строки и колонки загруженных данных для профиля загрузки"""
+        return self.df.shape if self.df is not None else (None, None)
+
+    def prepare_loaded_catalog(self):
+        """Поиск числовых колонок и построение названий галактик с замером этапов"""
+        # Находим числовые колонки
+        self.report_load_progress('numeric')
+        with self.load_profile.phase('find_numeric_columns', lambda: (len(self.df), len(self.numeric_columns))):
+            self.find_numeric_columns()
+
+        # Получаем список названий галактик из objname
+        self.report_load_progress('names')
+        with self.load_profile.phase('get_galaxy_names', lambda: (len(self.galaxy_names), None)):
+            self.get_galaxy_names()
+        with self.load_profile.phase('galaxy_index', lambda: (len(self.galaxy_names), None)):
+            self.galaxy_index = GalaxyIndex(self.galaxy_names, self.df)
+
+    def save_catalog_cache(self, signature):
+        """Записывает очищенный каталог в кэш и переходит на отображенные в память колонки кэша"""
+        cache_extra = {'unparseable_counts': self.unparseable_counts, 'memory_report': self.memory_report}
+        if CatalogCache.save(self.current_file_path, self.df, signature, cache_extra):
+            print(f"✓ Кэш каталога записан: {CatalogCache.get_cache_dir(self.current_file_path)}")
+            # Переходим на колонки кэша, освобождая собственную копию данных
+            cached_df = CatalogCache.load(self.current_file_path, signature)
+            if cached_df is not None:
+                self.df = cached_df
+                self.numeric_store = CatalogCache.open_numeric_store(self.current_file_path)
+
+    def compact_data(self):
+        """Переводит self.df в компактное представление и запоминает отчет о памяти"""
+        self.df, self.memory_report = CompactStorage.compact(self.df)
+        before = sum(self.memory_report['before'].values()) / 1024 ** 2
+        after = sum(self.memory_report['after'].values()) / 1024 ** 2
+        print(f"✓ Компактное хранение: {before:.1f} MB -> {after:.1f} MB")
+
+    def remember_file_snapshot(self, signature):
+        """Запоминает состояние загруженного файла для последующей инкрементальной перезагрузки"""
+        self.file_snapshot = {
+            'path': self.current_file_path,
+            'size': signature['size'],
+            'mtime': signature['mtime'],
+            'hash': signature['hash'],
+            'options': signature['options'],
+            'encoding': self.current_encoding,
+        }
+
+    def check_append_only_change(self):
+        """
+        Проверяет, что файл изменился только дописыванием строк в конец
+
+        Старая часть файла должна совпадать по хэшу с загруженной и заканчиваться
+        переводом строки, а параметры загрузки - остаться прежними.
+
+        Returns:
+            dict: Подпись нового файла (см. CatalogCache.file_signature) или None,
+                  если нужна полная загрузка
+        """
+        snapshot = self.file_snapshot
+        if (snapshot is None or self.df is None or self.lazy_catalog is not None or
+                snapshot['path'] != self.current_file_path or
+                snapshot['options'] != self.get_load_options_key()):
+            return None
+
+        try:
+            if os.path.getsize(self.current_file_path) <= snapshot['size']:
+                return None
+            with open(self.current_file_path, 'rb') as f:
+                f.seek(snapshot['size'] - 1)
+                if f.read(1) != b'\n':
+                    return None
+
+            self.report_load_progress('read', "Проверка дописанных строк")
+            signature = CatalogCache.file_signature(self.current_file_path, prefix_length=snapshot['size'])
+        except OSError:
+            return None
+
+        if signature.pop('prefix_hash') != snapshot['hash']:
+            return None
+        signature['options'] = snapshot['options']
+        return signature
+
+    def read_header_bytes(self):
+        """Возвращает байты строки заголовка файла (первой строки, не являющейся комментарием)"""
+        with open(self.current_file_path, 'rb') as f:
+            f.seek(CatalogReader.find_header_offset(self.current_file_path))
+            line = f.readline()
+        return line if line.endswith(b'\n') else line + b'\n'
+
+    def append_file_tail(self, signature, derived=()):
+        """
+        Разбирает и очищает только дописанные в конец файла строки и добавляет их
+        к self.df, galaxy_names и производным данным
+
+        Args:
+            signature: Подпись нового файла (из check_append_only_change)
+            derived: Производные колонки в self.df - они отбрасываются и вычисляются после загрузки
+        """
+        snapshot = self.file_snapshot
+        profile = self.load_profile
+        encoding = snapshot['encoding']
+        if not encoding:
+            with profile.phase('encoding_detection'):
+                encoding = EncodingDetector.detect(self.current_file_path)[0]
+
+        self.report_load_progress('read', "Чтение дописанных строк")
+        with profile.phase('parse', lambda: tail.shape):
+            with open(self.current_file_path, 'rb') as f:
+                f.seek(snapshot['size'])
+                tail_bytes = f.read(signature['size'] - snapshot['size'])
+            tail = self.read_catalog_csv(io.BytesIO(self.read_header_bytes() + tail_bytes), encoding)
+
+        # Колонки присоединенных каталогов будут заново выровнены, а производные - вычислены после загрузки
+        added = self.federated_columns() + list(derived)
+        base = self.df.drop(columns=[col for col in added if col in self.df.columns])
+
+        missing = [col for col in base.columns if col not in tail.columns]
+        if missing:
+            raise ValueError(f"в дописанных строках нет колонок {missing}")
+        tail = tail[list(base.columns)]
+
+        if len(tail) == 0:
+            # Дописаны только комментарии или пустые строки: данные прежние, а pd.concat с пустым
+            # хвостом превратил бы целочисленные колонки (pgc) в object
+            self.df = base
+            self.current_encoding = encoding
+            if self.load_settings['use_cache']:
+                with profile.phase('cache_write'):
+                    CatalogCache.update_source(self.current_file_path, snapshot, signature)
+            with profile.phase('find_numeric_columns', lambda: (len(self.df), len(self.numeric_columns))):
+                self.find_numeric_columns()
+            self.remember_file_snapshot(signature)
+            print("✓ В дописанной части файла нет строк с данными")
+            return
+
+        # Очищаем хвост так же, как при полной загрузке, и приводим к типам уже загруженных колонок
+        self.report_load_progress('clean')
+        unparseable_counts = dict(self.unparseable_counts)
+        with profile.phase('clean_numeric_columns', lambda: tail.shape):
+            for col in tail.columns:
+                dtype = base[col].dtype
+                if col.lower() in ['objname', 'pgc', 'type', 'objtype'] or isinstance(dtype, pd.CategoricalDtype):
+                    continue
+                cleaned, unparseable = NumericCleaner.clean_series(tail[col])
+                tail[col] = cleaned.astype(dtype) if pd.api.types.is_float_dtype(dtype) else cleaned
+                if unparseable:
+                    unparseable_counts[col] = unparseable_counts.get(col, 0) + unparseable
+
+        start = len(base)
+        df = pd.concat([base, tail], ignore_index=True)
+        for col in base.columns:
+            if isinstance(base[col].dtype, pd.CategoricalDtype):
+                categories = pd.api.types.union_categoricals(
+                    [base[col], tail[col].astype('category')]).categories
+                df[col] = pd.Categorical(df[col], categories=categories)
+
+        # Новые объекты вместо изменения старых: их еще использует интерфейс до завершения загрузки
+        self.df = df
+        self.unparseable_counts = unparseable_counts
+        self.current_encoding = encoding
+        self.numeric_store = {}
+        self.memory_report = None
+        self.appended_rows = len(tail)
+
+        if self.load_settings['use_cache']:
+            with profile.phase('cache_write', self.frame_counts):
+                self.save_catalog_cache(signature)
+
+        self.report_load_progress('numeric')
+        with profile.phase('find_numeric_columns', lambda: (len(self.df), len(self.numeric_columns))):
+            self.find_numeric_columns()
+        self.report_load_progress('names')
+        with profile.phase('get_galaxy_names', lambda: (len(self.df) - start, None)):
+            tail_names = self.make_galaxy_names_for_rows(start)
+            self.galaxy_names = self.galaxy_names + tail_names
+        with profile.phase('galaxy_index', lambda: (len(tail_names), None)):
+            self.galaxy_index = self.galaxy_index.extended(tail_names, self.df.iloc[start:], start)
+        self.remember_file_snapshot(signature)
+        print(f"✓ Дописано строк: {self.appended_rows}. Размер: {self.df.shape}")
+
+    def make_galaxy_names_for_rows(self, start):
+        """Названия галактик для строк self.df, начиная с позиции start (по правилам get_galaxy_names)"""
+        return GalaxyNames.from_frame(self.df.iloc[start:], start)
+
+    def report_load_progress(self, phase, detail="", fraction=None):
+        """
+        Передает ход фоновой загрузки в главный поток и прерывает загрузку, если она отменена
+
+        Args:
+            phase: Этап загрузки (ключ из LOAD_PHASES)
+            detail: Пояснение к этапу
+            fraction: Доля выполнения этапа от 0 до 1 (None - неизвестна)
+        """
+        self.check_load_cancelled()
+        if self.load_queue is not None:
+            self.load_queue.put(('progress', (phase, detail, fraction)))
+
+    def check_load_cancelled(self):
+        """Выбрасывает LoadCancelled, если пользователь отменил загрузку"""
+        if self.load_cancel_event is not None and self.load_cancel_event.is_set():
+            raise LoadCancelled()
+
+    def poll_load_queue(self):
+        """Опрашивает очередь фоновой загрузки из главного цикла Tk"""
+        try:
+            while True:
+                kind, payload = self.load_queue.get_nowait()
+                if kind == 'progress':
+                    self.update_load_progress(*payload)
+                else:
+                    self.finish_background_load(kind, payload)
+                    return
+        except queue.Empty:
+            pass
+
+        self.root.after(100, self.poll_load_queue)
+
+    def finish_background_load(self, kind, payload):
+        """Применяет результат фоновой загрузки в главном потоке"""
+        self.close_load_progress()
+        self.load_thread = None
+
+        if kind == 'done':
+            for attr in ('df', 'numeric_columns', 'galaxy_names', 'unparseable_counts',
+                         'current_encoding', 'lazy_catalog', 'numeric_store', 'file_snapshot',
+                         'memory_report', 'load_profile', 'galaxy_index', 'param_registry',
+                         'parsed_expressions', 'catalog_sources', 'derived_columns', 'streaming_peak_bytes'):
+                setattr(self, attr, getattr(payload, attr))
+            if self.file_snapshot is not None:
+                self.watched_stat = (self.file_snapshot['size'], self.file_snapshot['mtime'])
+            self.bump_data_version()
+            self.build_name_search_index()
+            # После дописывания строк выбранные параметры и галактика остаются прежними
+            self.update_interface_after_load(keep_selection=payload.appended_rows > 0)
+            if self.load_on_complete is not None:
+                self.load_on_complete()
+        elif kind == 'catalog':
+            for attr in ('df', 'numeric_columns', 'unparseable_counts', 'param_registry',
+                         'parsed_expressions', 'catalog_sources', 'derived_columns'):
+                setattr(self, attr, getattr(payload, attr))
+            self.bump_data_version()
+            self.update_interface_after_load(keep_selection=True)
+            self.show_catalog_source_report(self.catalog_sources[-1])
+        elif kind == 'cancelled':
+            self.update_status_label()
+            print("✓ Загрузка отменена, оставлены прежние данные")
+        elif kind == 'catalog_error':
+            self.update_status_label()
+            messagebox.showerror("Ошибка", f"Не удалось открыть каталог: {payload}")
+        else:
+            self.update_status_label()
+            messagebox.showerror("Ошибка", f"Не удалось загрузить данные: {payload}")
+
+    def bump_data_version(self):
+        """Отмечает смену данных: ряды, вычисленные по прежним данным, больше не используются"""
+        self.data_version += 1
+        self.series_cache.clear()
+
+    def build_name_search_index(self):
+        """Строит индекс поиска по названиям в фоновом потоке; до его готовности поиск идет перебором"""
+        names = self.galaxy_names
+        self.name_search_index = None
+
+        def worker():
+            index = NameSearchIndex(names)
+            # За время построения могли загрузить другой файл - тогда индекс уже не нужен
+            if self.galaxy_names is names:
+                self.name_search_index = index
+                print(f"✓ Индекс поиска галактик построен: {len(names)} названий")
+
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+
+    def watch_file_changes(self):
+        """Периодическая проверка файла в режиме слежения: изменения подгружаются автоматически"""
+        loading = self.load_thread is not None and self.load_thread.is_alive()
+        if self.load_settings['watch_file'] and self.current_file_path and not loading:
+            try:
+                file_stat = os.stat(self.current_file_path)
+                current = (file_stat.st_size, file_stat.st_mtime)
+            except OSError:
+                current = None
+
+            if current is not None and self.watched_stat is not None and current != self.watched_stat:
+                # Запоминаем сразу, чтобы неудачная загрузка не повторялась до следующего изменения
+                self.watched_stat = current
+                print("✓ Файл изменился, выполняется перезагрузка")
+                self.load_data(show_progress=False)
+
+        self.root.after(self.WATCH_INTERVAL_MS, self.watch_file_changes)
+
+    def show_load_progress(self, file_path=None):
+        """Показать окно хода загрузки с кнопкой отмены (file_path - загружаемый файл, если не текущий)"""
+        window = tk.Toplevel(self.root)
+        window.title("Загрузка данных")
+        window.geometry("420x170")
+        window.resizable(False, False)
+        window.transient(self.root)
+        window.protocol("WM_DELETE_WINDOW", self.cancel_load)
+        self.load_progress_window = window
+
+        main_frame = ttk.Frame(window, padding=12)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(main_frame, text=os.path.basename(file_path or self.current_file_path),
+                  font=('Arial', 10, 'bold')).pack(anchor=tk.W)
+        self.load_phase_label = ttk.Label(main_frame, text="Подготовка...")
+        self.load_phase_label.pack(anchor=tk.W, pady=(6, 2))
+        self.load_progressbar = ttk.Progressbar(main_frame, mode='determinate', length=390,
+                                                maximum=len(self.LOAD_PHASES) * 100)
+        self.load_progressbar.pack(fill=tk.X)
+        self.load_detail_label = ttk.Label(main_frame, text="", foreground='gray', font=(None, 8))
+        self.load_detail_label.pack(anchor=tk.W, pady=(2, 0))
+
+        self.load_cancel_button = ttk.Button(main_frame, text="Отмена", command=self.cancel_load)
+        self.load_cancel_button.pack(pady=(10, 0))
+
+    def update_load_progress(self, phase, detail, fraction):
+        """Отображает этап загрузки в строке состояния и в окне хода загрузки"""
+        phases = [key for key, _ in self.LOAD_PHASES]
+        index = phases.index(phase)
+        # Ход потоковой загрузки (процент, строки, пик памяти) виден и без окна - в режиме слежения
+        if hasattr(self, 'status_label'):
+            self.status_label.config(text=f"Загрузка: {detail or self.LOAD_PHASES[index][1]}")
+
+        if self.load_progress_window is None:
+            return
+
+        self.load_phase_label.config(text=f"Этап {index + 1} из {len(phases)}: {self.LOAD_PHASES[index][1]}")
+        self.load_progressbar['value'] = (index + (fraction or 0)) * 100
+        self.load_detail_label.config(text=detail)
+
+    def close_load_progress(self):
+        """Закрывает окно хода загрузки"""
+        if self.load_progress_window is not None:
+            self.load_progress_window.destroy()
+            self.load_progress_window = None
+
+    def cancel_load(self):
+        """Отмена фоновой загрузки (поток остановится на ближайшей проверке)"""
+        if self.load_cancel_event is None or self.load_progress_window is None:
+            return
+
+        self.load_cancel_event.set()
+        self.load_phase_label.config(text="Отмена загрузки...")
+        self.load_cancel_button.config(state='disabled')
+
+    def read_catalog_csv(self, file_path, encoding, **kwargs):
+        """
+        Читает CSV-файл каталога HyperLeda с общими параметрами разбора
+
+        Args:
+            file_path: Путь к файлу
+            encoding: Кодировка файла
+            **kwargs: Дополнительные параметры pd.read_csv
+
+        Returns:
+            pd.DataFrame
+        """
+        return CatalogReader.read_csv(file_path, encoding, **kwargs)
+
+    def read_catalog_full(self, encoding):
+        """
+        Полное чтение текущего файла движком из load_settings['engine']
+
+        Если pyarrow не установлен или не может прочитать файл с той же семантикой
+        (например, из-за строк с неверным числом полей), используется pandas.
+        """
+        if self.load_settings['engine'] == 'pyarrow':
+            if CatalogReader.arrow_available():
+                try:
+                    df = CatalogReader.read_arrow(self.current_file_path, encoding)
+                    print("✓ Файл прочитан многопоточным движком pyarrow")
+                    return df
+                except Exception as e:
+                    print(f"pyarrow не смог прочитать файл ({e}), используется pandas")
+            else:
+                print("pyarrow не установлен, используется pandas")
+
+        return self.read_catalog_csv(self.current_file_path, encoding)
+
+    def get_load_options_key(self):
+        """Параметры загрузки, влияющие на содержимое DataFrame (часть ключа кэша)"""
+        # Ленивый режим материализует те же данные, что и полная загрузка, и может взять её кэш
+        if self.load_settings['lazy'] or not self.load_settings['streaming']:
+            options = {'mode': 'full'}
+        else:
+            options = {
+                'mode': 'streaming',
+                'usecols': sorted(self.load_settings['usecols']) if self.load_settings['usecols'] else None,
+                'float32': self.load_settings['float32'],
+                'categorical_columns': sorted(self.load_settings['categorical_columns']),
+            }
+
+        if self.load_settings['compact']:
+            options['compact'] = True
+        return options
+
+    def load_data_streaming(self, encoding):
+        """
+        Потоковая загрузка большого файла частями с отбором колонок и сжатием типов
+
+        Каждая часть сразу очищается, числовые колонки приводятся к float32, а строковые
+        колонки из categorical_columns хранятся как category, поэтому в памяти никогда
+        не находится весь файл в виде строк.
+
+        Args:
+            encoding: Кодировка файла
+
+        Returns:
+            pd.DataFrame: Очищенные данные
+        """
+        usecols = None
+        if self.load_settings['usecols']:
+            # objname и pgc нужны всегда - из них строятся названия галактик
+            wanted = {col.strip().lower() for col in self.load_settings['usecols']} | {'objname', 'pgc'}
+            usecols = lambda col: col.strip().lower() in wanted
+
+        categorical = {col.lower() for col in self.load_settings['categorical_columns']}
+        float_dtype = 'float32' if self.load_settings['float32'] else 'float64'
+        file_size = os.path.getsize(self.current_file_path)
+        file_name = os.path.basename(self.current_file_path)
+
+        self.unparseable_counts = {}
+        chunks = []
+        rows_loaded = 0
+        retained_bytes = 0
+        peak_bytes = 0
+        start = time.perf_counter()
+        clean_seconds = 0.0
+
+        with open(self.current_file_path, 'rb') as handle:
+            reader = self.read_catalog_csv(handle, encoding,
+                                           chunksize=self.load_settings['chunksize'], usecols=usecols)
+            for chunk in reader:
+                raw_bytes = int(chunk.memory_usage(deep=True).sum())
+
+                clean_start = time.perf_counter()
+                for col in chunk.columns:
+                    col_lower = col.lower()
+                    if col_lower in categorical:
+                        chunk[col] = chunk[col].astype('category')
+                    elif col_lower not in ['objname', 'pgc', 'type', 'objtype']:
+                        cleaned, unparseable = NumericCleaner.clean_series(chunk[col])
+                        chunk[col] = cleaned.astype(float_dtype)
+                        if unparseable:
+                            self.unparseable_counts[col] = self.unparseable_counts.get(col, 0) + unparseable
+                clean_seconds += time.perf_counter() - clean_start
+
+                chunks.append(chunk)
+                rows_loaded += len(chunk)
+                retained_bytes += int(chunk.memory_usage(deep=True).sum())
+                peak_bytes = max(peak_bytes, retained_bytes + raw_bytes)
+
+                progress = min(handle.tell() / file_size, 1) if file_size else 1
+                self.report_load_progress(
+                    'read',
+                    f"{file_name}: {progress * 100:.0f}% | Строк: {rows_loaded} | "
+                    f"Пик памяти: {peak_bytes / 1024 ** 2:.1f} MB",
+                    progress
+                )
+
+        if not chunks:
+            return pd.DataFrame()
+
+        # Категории в частях различаются - приводим их к общему набору, иначе concat вернет object
+        for col in chunks[0].columns:
+            if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+                categories = pd.api.types.union_categoricals([chunk[col] for chunk in chunks]).categories
+                for chunk in chunks:
+                    chunk[col] = chunk[col].cat.set_categories(categories)
+
+        df = pd.concat(chunks, ignore_index=True)
+        self.load_profile.add('parse', time.perf_counter() - start - clean_seconds, *df.shape)
+        self.load_profile.add('clean_numeric_columns', clean_seconds, *df.shape)
+        self.streaming_peak_bytes = peak_bytes
+        print(f"✓ Потоковая загрузка: {rows_loaded} строк, {len(chunks)} частей, "
+              f"пик памяти данных {peak_bytes / 1024 ** 2:.1f} MB")
+        return df
+
+    def open_lazy_catalog(self, encoding):
+        """
+        Ленивое открытие файла: читается только заголовок и индекс смещений строк
+
+        Сразу разбираются лишь objname и pgc (нужны для названий галактик), остальные
+        колонки разбираются и очищаются при первом обращении через ensure_columns.
+
+        Returns:
+            pd.DataFrame: Данные с уже материализованными колонками
+        """
+        self.lazy_catalog = LazyCatalog(self.current_file_path, encoding, self.read_catalog_csv)
+        self.unparseable_counts = {}
+
+        id_columns = [col for col in self.lazy_catalog.columns if col.lower() in ['objname', 'pgc']]
+        if id_columns:
+            df, _ = self.lazy_catalog.read_columns(id_columns)
+        else:
+            df = pd.DataFrame(index=pd.RangeIndex(self.lazy_catalog.n_rows))
+
+        print(f"✓ Файл открыт лениво: {self.lazy_catalog.n_rows} строк, "
+              f"{len(self.lazy_catalog.columns)} колонок (разобрано: {len(df.columns)})")
+        return df
+
+    def ensure_columns(self, columns):
+        """Разбирает ещё не материализованные колонки лениво открытого и присоединенных каталогов"""
+        for source in self.catalog_sources:
+            for name in columns:
+                if name in source.column_map and name not in self.df.columns:
+                    self.df[name], unparseable = source.take_column(source.column_map[name])
+                    if unparseable:
+                        self.unparseable_counts[name] = unparseable
+                    print(f"✓ Присоединена колонка {name} из каталога {source.name}")
+
+        if self.lazy_catalog is None:
+            return
+
+        missing = [col for col in columns
+                   if col in self.lazy_catalog.columns and col not in self.df.columns]
+        if not missing:
+            return
+
+        parsed, unparseable_counts = self.lazy_catalog.read_columns(missing)
+        for col in missing:
+            self.df[col] = parsed[col].to_numpy()
+        self.unparseable_counts.update(unparseable_counts)
+        print(f"✓ Разобраны колонки: {missing}")
+
+    def get_galaxy_row(self, position):
+        """
+        Возвращает строку данных галактики по позиции
+
+        В ленивом режиме - все колонки из файла, при присоединенных каталогах - вместе с их колонками.
+        """
+        if self.lazy_catalog is not None:
+            row = self.lazy_catalog.read_row(position)
+        else:
+            row = self.df.iloc[position]
+
+        if self.catalog_sources:
+            name = row.name
+            federated = [col for col in self.federated_columns() if col in row.index]
+            row = pd.concat([row.drop(labels=federated)] +
+                            [source.read_row(position) for source in self.catalog_sources])
+            row.name = name
+
+        # Производные колонки есть только в self.df (в ленивом режиме строка читается из файла)
+        derived = [name for name in self.derived_column_names() if name in self.df.columns and name not in row.index]
+        if derived:
+            name = row.name
+            row = pd.concat([row, self.df[derived].iloc[position]])
+            row.name = name
+        return row
+
+    def federated_columns(self):
+        """Имена колонок присоединенных каталогов в объединенном каталоге"""
+        return [name for source in self.catalog_sources for name in source.column_map]
+
+    def add_catalog_source(self):
+        """Присоединить к загруженному каталогу дополнительный каталог по pgc"""
+        if self.df is None or self.df.empty:
+            messagebox.showwarning("Предупреждение", "Сначала загрузите основной файл с данными")
+            return
+
+        if 'pgc' not in self.df.columns:
+            messagebox.showwarning("Предупреждение", "В основном каталоге отсутствует колонка 'pgc'")
+            return
+
+        if self.load_thread is not None and self.load_thread.is_alive():
+            messagebox.showwarning("Предупреждение", "Дождитесь окончания загрузки данных")
+            return
+
+        file_path = filedialog.askopenfilename(
+            title="Выберите дополнительный каталог",
             filetypes=[
                 ("CSV files", "*.csv"),
                 ("Text files", "*.txt"),
                 ("All files", "*.*")
             ]
         )
+        if not file_path:
+            return
 
-        if file_path:
-            self.current_file_path = file_path
-            self.load_data()
-        else:
-            # Если пользователь отменил выбор, создаем пустой датафрейм
-            self.df = pd.DataFrame()
-            self.numeric_columns = []
-            self.galaxy_names = []
-            messagebox.showwarning("Предупреждение",
-                                   "Файл не выбран. Программа будет работать в демонстрационном режиме.")
+        # Каталог открывается и выравнивается в фоновом потоке так же, как при загрузке файла:
+        # определение кодировки, индекс строк и разбор pgc не блокируют интерфейс
+        self.load_queue = queue.Queue()
+        self.load_cancel_event = threading.Event()
+        self.load_on_complete = None
+        loader = copy.copy(self)
+
+        self.show_load_progress(file_path)
+        self.load_thread = threading.Thread(target=loader.attach_catalog_worker, args=(file_path,))
+        self.load_thread.daemon = True
+        self.load_thread.start()
+        self.root.after(100, self.poll_load_queue)
+
+    def attach_catalog_worker(self, file_path):
+        """Тело фонового потока присоединения каталога: результат или ошибка передаются через очередь"""
+        try:
+            self.report_load_progress('read', f"Открытие каталога {os.path.basename(file_path)}")
+            source = CatalogSource(file_path, self.read_catalog_csv)
+            self.catalog_sources = self.catalog_sources + [source]
+            self.prepare_joined_columns()
+            self.load_queue.put(('catalog', self))
+        except LoadCancelled:
+            self.load_queue.put(('cancelled', None))
+        except Exception as e:
+            self.load_queue.put(('catalog_error', e))
+
+    def show_catalog_source_report(self, source):
+        """Сообщает, сколько галактик найдено в присоединенном каталоге и какие колонки добавлены"""
+        renamed = [name for name, col in source.column_map.items() if name != col]
+        message = (f"Каталог {source.name} присоединен по pgc.\n"
+                   f"Найдено галактик: {source.matched} из {len(self.df)}\n"
+                   f"Новых колонок: {len(source.column_map)}")
+        if renamed:
+            message += f"\nПереименованы из-за совпадения имен: {', '.join(renamed)}"
+        if source.duplicates:
+            message += f"\nПовторяющихся pgc в каталоге (взята первая строка): {source.duplicates}"
+        messagebox.showinfo("Успех", message)
+
+    def remove_catalog_sources(self):
+        """Отсоединить все дополнительные каталоги"""
+        if not self.catalog_sources:
+            messagebox.showinfo("Информация", "Дополнительные каталоги не присоединены")
+            return
 
-    def clean_numeric_value(self, value):
-        """Очистка числовых значений от лишних пробелов и символов"""
-        if pd.isna(value) or value == '':
-            return np.nan
+        if self.load_thread is not None and self.load_thread.is_alive():
+            messagebox.showwarning("Предупреждение", "Дождитесь окончания загрузки данных")
+            return
 
-        # Преобразуем в строку и убираем лишние пробелы
-        str_value = str(value).strip()
+        federated = [col for col in self.federated_columns() if col in self.df.columns]
+        self.df = self.df.drop(columns=federated)
+        for col in federated:
+            self.unparseable_counts.pop(col, None)
+        self.catalog_sources = []
 
-        # Заменяем запятые на точки для десятичных чисел
-        str_value = str_value.replace(',', '.')
+        self.bump_data_version()
+        self.find_numeric_columns()
+        self.materialize_derived_columns()
+        self.update_interface_after_load(keep_selection=True)
 
-        # Убираем множественные пробелы
-        str_value = re.sub(r'\s+', ' ', str_value)
+    def prepare_joined_columns(self):
+        """
+        Выравнивает присоединенные каталоги и вычисляет производные колонки для загруженных данных
 
-        # Если значение состоит только из пробелов или пустое
-        if not str_value or str_value.isspace():
-            return np.nan
+        Выполняется в фоновом потоке на копии анализатора (в ленивом режиме здесь с диска разбираются
+        входные колонки производных), поэтому каталоги, определения и словари копируются, а не
+        изменяются на месте - ими до завершения пользуется интерфейс.
+        """
+        self.report_load_progress('joined')
+        self.df = self.df.copy(deep=False)
+        self.unparseable_counts = dict(self.unparseable_counts)
+        self.catalog_sources = [copy.copy(source) for source in self.catalog_sources]
+        self.derived_columns = [copy.copy(column) for column in self.derived_columns]
+        self.align_catalog_sources()
+        self.materialize_derived_columns()
+
+    def align_catalog_sources(self):
+        """Назначает колонкам присоединенных каталогов имена без конфликтов и выравнивает их по pgc"""
+        if not self.catalog_sources:
+            return
 
-        try:
-            return float(str_value)
-        except (ValueError, TypeError):
-            return np.nan
+        # Уже присоединенные колонки могли быть выровнены по прежним данным - разберем их заново
+        federated = [col for col in self.federated_columns() if col in self.df.columns]
+        if federated:
+            self.df = self.df.drop(columns=federated)
 
-    def load_data(self):
-        """Загрузка данных из файла"""
-        if not self.current_file_path:
-            messagebox.showerror("Ошибка", "Файл не выбран")
+        taken = set(self.lazy_catalog.columns if self.lazy_catalog is not None else self.df.columns)
+        primary_pgc = pd.to_numeric(self.df['pgc'], errors='coerce').to_numpy(dtype=float) \
+            if 'pgc' in self.df.columns else np.full(len(self.df), np.nan)
+
+        for source in self.catalog_sources:
+            source.column_map = {}
+            for col in source.columns:
+                if col == source.pgc_column:
+                    continue
+                # Совпадающие имена получают префикс каталога
+                name = col if col not in taken else f"{source.prefix}_{col}"
+                suffix = 2
+                while name in taken:
+                    name = f"{source.prefix}{suffix}_{col}"
+                    suffix += 1
+                taken.add(name)
+                source.column_map[name] = col
+
+            source.align(primary_pgc)
+            print(f"✓ Каталог {source.name}: найдено {source.matched} из {len(primary_pgc)} галактик")
+
+        self.find_numeric_columns()
+
+    def derived_column_names(self):
+        """Имена производных колонок, вычисленных для текущих данных"""
+        return [column.name for column in self.derived_columns
+                if column.inputs_key is not None and self.df is not None and column.name in self.df.columns]
+
+    def column_input_key(self, column):
+        """
+        Ключ содержимого входной колонки производной колонки: пока он прежний, пересчет не нужен
+
+        Returns:
+            tuple: (ключ, можно ли хранить зависящие от колонки значения в кэше каталога)
+        """
+        for derived in self.derived_columns:
+            if derived.name == column and derived.inputs_key is not None:
+                return derived.inputs_key, derived.persistent
+
+        # Колонки файла определяются его содержимым и параметрами загрузки
+        snapshot = self.file_snapshot
+        if snapshot is not None:
+            native = ['file', snapshot['hash'], snapshot['size'], snapshot['options']]
+        else:
+            native = ['data', self.data_version]
+        for source in self.catalog_sources:
+            if column in source.column_map:
+                return ['catalog', source.file_path, source.column_map[column], native], False
+        return native, snapshot is not None
+
+    def materialize_derived_columns(self):
+        """
+        Вычисляет производные колонки для текущих данных и добавляет их в self.df и numeric_columns
+
+        Колонка пересчитывается, только если изменились ее входные колонки. Значения, зависящие
+        только от содержимого файла, берутся из кэша каталога и записываются в него.
+        """
+        if self.df is None:
             return
 
-        try:
-            # Определяем кодировку файла
-            encodings = ['utf-8', 'cp1251', 'latin-1', 'iso-8859-1']
+        previous = self.derived_column_names()
+        numeric = [col for col in self.numeric_columns if col not in previous]
+        available = set(numeric)
+        taken = set(self.lazy_catalog.columns if self.lazy_catalog is not None else self.df.columns)
+        taken = (taken | set(self.federated_columns())) - set(previous)
+        # Пока фоновая загрузка может переписать кэш каталога, значения в него не пишутся
+        loading = self.load_thread is not None and self.load_thread.is_alive()
+        use_cache = self.load_settings['use_cache'] and self.file_snapshot is not None and not loading
+
+        computed, from_cache = [], []
+        # Колонки могут ссылаться друг на друга - вычисляем те, чьи входные колонки уже готовы
+        pending = [derived for derived in self.derived_columns if derived.name not in taken]
+        unavailable = [derived for derived in self.derived_columns if derived.name in taken]
+        while pending:
+            ready = [derived for derived in pending if all(name in available for name in derived.compiled.names)]
+            if not ready:
+                break
+            pending = [derived for derived in pending if derived not in ready]
+            for derived in ready:
+                if self.update_derived_column(derived, use_cache, computed, from_cache):
+                    available.add(derived.name)
+                else:
+                    unavailable.append(derived)
 
-            for encoding in encodings:
-                try:
-                    # Читаем файл с правильными параметрами
-                    self.df = pd.read_csv(self.current_file_path,
-                                          sep=';',
-                                          skipinitialspace=True,
-                                          decimal='.',
-                                          na_values=['', ' ', 'NaN', 'nan', '        ', '        ', '...'],
-                                          encoding=encoding,
-                                          comment='#',
-                                          dtype={'objname': str},
-                                          quoting=3)
-                    print(f"✓ Файл загружен с кодировкой {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
-                # Если ни одна кодировка не подошла, используем последнюю с ошибками
-                self.df = pd.read_csv(self.current_file_path,
-                                      sep=';',
-                                      skipinitialspace=True,
-                                      decimal='.',
-                                      na_values=['', ' ', 'NaN', 'nan', '        ', '        ', '...'],
-                                      encoding='utf-8',
-                                      comment='#',
-                                      dtype={'objname': str},
-                                      quoting=3,
-                                      errors='ignore')
+        for derived in unavailable + pending:
+            if derived.name in previous:
+                self.df = self.df.drop(columns=[derived.name])
+            derived.inputs_key = None
 
-            print(f"✓ Данные загружены успешно. Размер: {self.df.shape}")
-            print(f"✓ Файл: {os.path.basename(self.current_file_path)}")
+        numeric += self.derived_column_names()
+        if numeric != self.numeric_columns or computed or from_cache:
+            self.set_numeric_columns(numeric)
+        if computed or from_cache:
+            print(f"✓ Производные колонки: вычислено {len(computed)}, из кэша {len(from_cache)}")
 
-            # Очищаем числовые колонки
-            self.clean_numeric_columns()
+    def update_derived_column(self, derived, use_cache, computed, from_cache):
+        """
+        Приводит значения производной колонки в self.df в соответствие с ее входными колонками
 
-            # Покажем структуру данных для диагностики
-            print("\nПервые 5 строк данных:")
-            print(self.df.head())
-            print("\nКолонки данных:")
-            print(self.df.columns.tolist())
-            print("\nТипы данных:")
-            print(self.df.dtypes)
-
-            # Находим числовые колонки
-            self.find_numeric_columns()
+        Args:
+            derived: Производная колонка (DerivedColumn), все входные колонки которой доступны
+            use_cache: Брать значения из кэша каталога и записывать их туда
+            computed, from_cache: Списки, в которые добавляется имя вычисленной или взятой из кэша колонки
 
-            # Получаем список названий галактик из objname
-            self.get_galaxy_names()
+        Returns:
+            bool: False, если колонку не удалось вычислить
+        """
+        names = derived.compiled.names
+        keys = [self.column_input_key(name) for name in names]
+        key = json.dumps([derived.expression, [input_key for input_key, _ in keys]], sort_keys=True)
+        persistent = all(stored for _, stored in keys)
+        if key == derived.inputs_key and derived.name in self.df.columns:
+            return True
+
+        values = None
+        if persistent and use_cache:
+            values = CatalogCache.load_derived(self.current_file_path, self.file_snapshot, derived.name, key)
+        if values is not None:
+            from_cache.append(derived.name)
+        else:
+            self.ensure_columns(names)
+            inputs = {name: self.df[name].to_numpy(dtype=np.float64, na_value=np.nan) for name in names}
+            try:
+                values = derived.compute(inputs, len(self.df), self.load_settings['expression_engine'])
+            except (ZeroDivisionError, ValueError, TypeError, SyntaxError, NameError) as e:
+                print(f"Не удалось вычислить производную колонку {derived.name}: {e}")
+                return False
+            computed.append(derived.name)
+            if persistent and use_cache:
+                CatalogCache.save_derived(self.current_file_path, self.file_snapshot, derived.name, key, values)
 
-            # Обновляем интерфейс
-            self.update_interface_after_load()
+        self.df[derived.name] = values
+        derived.inputs_key = key
+        derived.persistent = persistent
+        return True
 
-        except Exception as e:
-            print(f"Ошибка загрузки: {e}")
-            # Попробуем альтернативный способ чтения
+    def define_derived_column(self, name, expression):
+        """
+        Добавляет производную колонку, сохраняет ее определение и вычисляет для загруженных данных
+
+        Raises:
+            ValueError: Недопустимое имя или выражение (текст для пользователя)
+        """
+        name = name.strip()
+        if not name.isidentifier() or name in ParameterExpression.FUNCTIONS or name in ParameterExpression.CONSTANTS:
+            raise ValueError(f"Имя '{name}' должно быть идентификатором и не совпадать с функцией или константой")
+        if any(column.name == name for column in self.derived_columns):
+            raise ValueError(f"Производная колонка '{name}' уже определена")
+        if self.df is not None:
+            columns = set(self.lazy_catalog.columns if self.lazy_catalog is not None else self.df.columns)
+            if name in columns or name in self.federated_columns():
+                raise ValueError(f"Колонка '{name}' уже есть в каталоге")
+
+        try:
+            derived = DerivedColumn(name, expression.strip())
+        except (SyntaxError, ValueError) as e:
+            raise ValueError(f"Некорректное выражение: {e}")
+        if self.df is not None:
+            unknown = [col for col in derived.compiled.names if col not in self.numeric_columns]
+            if unknown:
+                raise ValueError(f"Неизвестные числовые колонки в выражении: {', '.join(unknown)}")
+
+        self.derived_columns = self.derived_columns + [derived]
+        DerivedColumn.save_registry(self.derived_columns)
+        # Имя могло уже запрашиваться как неизвестный параметр - прежние ряды в кэше не годятся
+        self.bump_data_version()
+        self.materialize_derived_columns()
+
+    def remove_derived_column(self, name):
+        """Удаляет производную колонку (и перестает вычислять зависящие от нее)"""
+        materialized = name in self.derived_column_names()
+        self.derived_columns = [column for column in self.derived_columns if column.name != name]
+        DerivedColumn.save_registry(self.derived_columns)
+        if materialized:
+            self.df = self.df.drop(columns=[name])
+            self.set_numeric_columns([col for col in self.numeric_columns if col != name])
+        self.bump_data_version()
+        self.materialize_derived_columns()
+
+    def show_derived_columns(self):
+        """Показать окно производных колонок: список определений, добавление и удаление"""
+        if self.load_thread is not None and self.load_thread.is_alive():
+            messagebox.showwarning("Предупреждение", "Дождитесь окончания загрузки данных")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("Производные колонки")
+        window.geometry("520x420")
+
+        main_frame = ttk.Frame(window, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(main_frame, text="Колонки, вычисляемые по выражению один раз и доступные как обычные "
+                                   "параметры", wraplength=490).pack(anchor=tk.W, pady=(0, 8))
+
+        list_frame = ttk.Frame(main_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        listbox = tk.Listbox(list_frame, font=("Arial", 10))
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        def refresh():
+            listbox.delete(0, tk.END)
+            materialized = set(self.derived_column_names())
+            for column in self.derived_columns:
+                state = "" if column.name in materialized or self.df is None else " (нет входных колонок)"
+                listbox.insert(tk.END, f"{column.name} = {column.expression}{state}")
+
+        form = ttk.Frame(main_frame)
+        form.pack(fill=tk.X, pady=8)
+        ttk.Label(form, text="Имя:").grid(row=0, column=0, sticky=tk.W)
+        name_var = tk.StringVar()
+        ttk.Entry(form, textvariable=name_var, width=20).grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(form, text="Выражение:").grid(row=1, column=0, sticky=tk.W)
+        expression_var = tk.StringVar()
+        ttk.Entry(form, textvariable=expression_var, width=45).grid(row=1, column=1, sticky=tk.W, padx=5, pady=2)
+
+        def changed():
+            refresh()
+            if self.df is not None:
+                self.update_interface_after_load(keep_selection=True)
+
+        def add_column():
             try:
-                self.load_data_alternative()
-                self.update_interface_after_load()
-            except Exception as e2:
-                print(f"Альтернативный способ тоже не сработал: {e2}")
-                messagebox.showerror("Ошибка", f"Не удалось загрузить данные: {e}")
+                self.define_derived_column(name_var.get(), expression_var.get())
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e), parent=window)
+                return
+            name_var.set("")
+            expression_var.set("")
+            changed()
+
+        def remove_column():
+            selection = listbox.curselection()
+            if selection:
+                self.remove_derived_column(self.derived_columns[selection[0]].name)
+                changed()
+
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=tk.X)
+        ttk.Button(btn_frame, text="Добавить", command=add_column).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Удалить выбранную", command=remove_column).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Закрыть", command=window.destroy).pack(side=tk.LEFT, padx=5)
+
+        refresh()
 
     def load_data_alternative(self):
-        """Альтернативный способ загрузки данных"""
-        with open(self.current_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+        """
+        Альтернативный способ загрузки данных: построчный разбор без pd.read_csv
+
+        Файл читается потоково блоками по load_settings['chunksize'] строк. Ячейки числовых
+        колонок сразу преобразуются в числа и дописываются в типизированные буферы array('d'),
+        поэтому ни весь файл, ни таблица строк целиком в памяти не хранятся.
+        """
+        start = time.perf_counter()
+        encoding = self.current_encoding or 'utf-8'
+        file_size = os.path.getsize(self.current_file_path)
+        batch_size = self.load_settings['chunksize']
+
+        with open(self.current_file_path, 'r', encoding=encoding, errors='ignore') as f:
+            # Парсим заголовок
+            header = f.readline().strip().split(';')
+            n_columns = len(header)
+            is_numeric = [col.lower() not in ['objname', 'pgc', 'type', 'objtype'] for col in header]
+            buffers = [array.array('d') if numeric else [] for numeric in is_numeric]
+            unparseable = [0] * n_columns
+            consumed = 0
+
+            def flush(rows):
+                for i, cells in enumerate(zip(*rows)):
+                    if is_numeric[i]:
+                        values, failed = NumericCleaner.parse_strings(cells)
+                        buffers[i].frombytes(values.tobytes())
+                        unparseable[i] += failed
+                    else:
+                        buffers[i].extend(cells)
 
-        # Парсим заголовок
-        header = lines[0].strip().split(';')
-        data = []
+            rows = []
+            for line in f:
+                consumed += len(line)
+                line = line.strip()
+                if not line:
+                    continue
 
-        for line in lines[1:]:
-            if line.strip():
-                values = line.strip().split(';')
+                values = line.split(';')
                 # Обеспечиваем одинаковую длину
-                while len(values) < len(header):
-                    values.append('')
-                data.append(values[:len(header)])
+                if len(values) < n_columns:
+                    values.extend([''] * (n_columns - len(values)))
+                rows.append(values[:n_columns])
+
+                if len(rows) >= batch_size:
+                    flush(rows)
+                    rows = []
+                    self.report_load_progress('read', "Построчный разбор файла",
+                                              min(consumed / file_size, 1) if file_size else 1)
+            if rows:
+                flush(rows)
+
+        # Числовые буферы превращаются в колонки без копирования, строковые - сразу в строковый тип
+        columns = {}
+        for i in range(n_columns):
+            if is_numeric[i]:
+                columns[i] = pd.Series(np.frombuffer(buffers[i], dtype=np.float64), copy=False)
+            else:
+                columns[i] = pd.Series(buffers[i], dtype=str)
+        self.df = pd.DataFrame(columns, copy=False)
+        self.df.columns = header
 
-        self.df = pd.DataFrame(data, columns=header)
+        self.unparseable_counts = {col: count for col, count in zip(header, unparseable) if count}
+        self.load_profile.add('parse', time.perf_counter() - start, *self.df.shape)
         print(f"✓ Данные загружены альтернативным способом. Размер: {self.df.shape}")
+        if self.unparseable_counts:
+            print(f"✓ Нечисловые значения в {len(self.unparseable_counts)} колонках: {self.unparseable_counts}")
 
-        # Очищаем числовые колонки
-        self.clean_numeric_columns()
+        self.prepare_loaded_catalog()
 
-        # Находим числовые колонки
-        self.find_numeric_columns()
-
-        # Получаем список названий галактик из objname
-        self.get_galaxy_names()
+    def update_interface_after_load(self, keep_selection=False):
+        """
+        Обновление интерфейса после загрузки данных
 
-    def update_interface_after_load(self):
-        """Обновление интерфейса после загрузки данных"""
+        Args:
+            keep_selection: Не сбрасывать выбранные параметры и галактику (после дописывания строк)
+        """
         # Обновляем комбобоксы
-        if hasattr(self, 'x_entry'):
+        if hasattr(self, 'x_entry') and not keep_selection:
             if self.numeric_columns:
                 self.x_entry.delete(0, tk.END)
                 self.x_entry.insert(0, self.numeric_columns[0])
 
-        if hasattr(self, 'y_entry'):
+        if hasattr(self, 'y_entry') and not keep_selection:
             if len(self.numeric_columns) > 1:
                 self.y_entry.delete(0, tk.END)
                 self.y_entry.insert(0, self.numeric_columns[1])
 
         if hasattr(self, 'galaxy_combo'):
-            self.galaxy_combo['values'] = self.galaxy_names
-            if self.galaxy_names:
+            self.galaxy_combo.set_values(self.galaxy_names)
+            if self.galaxy_names and not keep_selection:
                 self.galaxy_combo.set(self.galaxy_names[0])
 
         # Обновляем статус
-        if hasattr(self, 'status_label'):
-            file_name = os.path.basename(self.current_file_path) if self.current_file_path else "Файл не загружен"
-            self.status_label.config(
-                text=f"Файл: {file_name} | Объектов: {len(self.df)} | Параметров: {len(self.numeric_columns)}"
-            )
+        self.update_status_label()
+
+    def update_status_label(self):
+        """Строка состояния: файл, объекты, параметры и пик памяти потоковой загрузки"""
+        if not hasattr(self, 'status_label'):
+            return
+        if self.df is None:
+            self.status_label.config(text="Файл не загружен | Объектов: 0 | Параметров: 0")
+            return
+
+        file_name = os.path.basename(self.current_file_path) if self.current_file_path else "Файл не загружен"
+        status = f"Файл: {file_name} | Объектов: {len(self.df)} | Параметров: {len(self.numeric_columns)}"
+        if self.streaming_peak_bytes is not None:
+            status += f" | Пик памяти при загрузке: {self.streaming_peak_bytes / 1024 ** 2:.1f} MB"
+        self.status_label.config(text=status)
 
     def clean_numeric_columns(self):
-        """Очистка числовых колонки от лишних пробелов"""
+        """Очистка числовых колонок от лишних пробелов (векторно, по колонке целиком)"""
+        self.unparseable_counts = {}
         for col in self.df.columns:
             if col.lower() not in ['objname', 'pgc', 'type', 'objtype']:
-                # Применяем очистку к каждой ячейке
-                self.df[col] = self.df[col].apply(self.clean_numeric_value)
+                self.check_load_cancelled()
+                self.df[col], unparseable = NumericCleaner.clean_series(self.df[col])
+                if unparseable:
+                    self.unparseable_counts[col] = unparseable
+
+        if self.unparseable_counts:
+            print(f"✓ Нечисловые значения в {len(self.unparseable_counts)} колонках: {self.unparseable_counts}")
 
     def get_galaxy_names(self):
         """Получаем правильные названия галактики"""
+        self.galaxy_names = GalaxyNames.from_frame(self.df)
         if 'objname' in self.df.columns:
-            # Извлекаем названия из колонки objname
-            names = self.df['objname'].astype(str).str.strip()
-
-            # Фильтруем и очищаем названия
-            valid_names = []
-            for name in names:
-                clean_name = str(name).strip()
-                # Пропускаем пустые и некорректные названия
-                if (clean_name and
-                        clean_name != 'nan' and
-                        clean_name != 'G' and
-                        not clean_name.isspace() and
-                        len(clean_name) > 2):
-                    valid_names.append(clean_name)
-                else:
-                    # Создаем имя из PGC, если objname некорректен
-                    idx = names.tolist().index(name)
-                    if 'pgc' in self.df.columns and pd.notna(self.df.iloc[idx]['pgc']):
-                        pgc_val = self.df.iloc[idx]['pgc']
-                        if pd.notna(pgc_val):
-                            valid_names.append(f"PGC{int(float(pgc_val))}")
-                        else:
-                            valid_names.append(f"Галактика_{idx + 1}")
-                    else:
-                        valid_names.append(f"Галактика_{idx + 1}")
-
-            self.galaxy_names = valid_names
             print(f"✓ Названия галактик загружены: {len(self.galaxy_names)} имен")
-            print("Примеры названий:", self.galaxy_names[:10])
-
         else:
-            # Создаем имена из PGC номеров или порядковых номеров
-            if 'pgc' in self.df.columns:
-                self.galaxy_names = [
-                    f"PGC{int(float(pgc))}" if pd.notna(pgc) else f"Галактика_{i + 1}"
-                    for i, pgc in enumerate(self.df['pgc'])
-                ]
-            else:
-                self.galaxy_names = [f"Галактика_{i + 1}" for i in range(len(self.df))]
-
             print(f"✓ Созданы названия галактик: {len(self.galaxy_names)} имен")
+        if self.load_settings['verbose']:
             print("Примеры названий:", self.galaxy_names[:10])
 
     def find_numeric_columns(self):
         """Поиск числовых колонок"""
         self.numeric_columns = []
         excluded_cols = ['objname', 'pgc', 'type', 'objtype']
-
-        for col in self.df.columns:
-            col_lower = col.lower()
-            if any(excluded in col_lower for excluded in excluded_cols):
+        columns = list(self.lazy_catalog.columns if self.lazy_catalog is not None else self.df.columns)
+        columns += [col for col in self.federated_columns() if col not in columns]
+        # Производные колонки числовые по построению и не отсеиваются по имени
+        derived = set(self.derived_column_names())
+        candidates = [col for col in columns
+                      if col not in derived and not any(excluded in col.lower() for excluded in excluded_cols)]
+
+        # Неразобранные колонки ленивого и присоединенных каталогов проверяются по выборке первых строк
+        samples = self.sample_unparsed_columns([col for col in candidates if col not in self.df.columns])
+
+        for col in candidates:
+            if col not in self.df.columns:
+                # Текстовые колонки (bar, ring) не дают в выборке ни одного числа. Выборка из одних
+                # пропусков ничего не говорит - такая колонка проверяется при первом обращении
+                numbers, unparseable = samples.get(col, (0, 0))
+                if numbers > 0 or unparseable == 0:
+                    self.numeric_columns.append(col)
                 continue
 
             numeric_data = self.get_numeric_data(col)
             if len(numeric_data) > 5:  # Минимум 5 значений
                 self.numeric_columns.append(col)
 
+        self.set_numeric_columns(self.numeric_columns + self.derived_column_names())
         print(f"✓ Найдено числовых колонок: {len(self.numeric_columns)}")
-        print("Числовые колонки:", self.numeric_columns[:10])  # Покажем первые 10
+        if self.load_settings['verbose']:
+            print("Числовые колонки:", self.numeric_columns[:10])  # Покажем первые 10
+
+    def sample_unparsed_columns(self, columns):
+        """
+        Разбирает первые COLUMN_SAMPLE_ROWS строк еще не разобранных колонок ленивого
+        и присоединенных каталогов
+
+        Returns:
+            dict: Колонка -> (количество чисел, количество нечисловых значений) в выборке
+        """
+        samples = {}
+        if not columns:
+            return samples
+
+        if self.lazy_catalog is not None:
+            lazy = [col for col in columns if col in self.lazy_catalog.columns]
+            if lazy:
+                parsed, unparseable_counts = self.lazy_catalog.read_columns(lazy, self.COLUMN_SAMPLE_ROWS)
+                for col in lazy:
+                    samples[col] = (int(parsed[col].notna().sum()), unparseable_counts.get(col, 0))
+
+        for source in self.catalog_sources:
+            names = [name for name in columns if name in source.column_map and name not in samples]
+            if not names:
+                continue
+            parsed, unparseable_counts = source.read_columns([source.column_map[name] for name in names],
+                                                             self.COLUMN_SAMPLE_ROWS)
+            for name in names:
+                col = source.column_map[name]
+                samples[name] = (int(parsed[col].notna().sum()), unparseable_counts.get(col, 0))
+        return samples
+
+    def set_numeric_columns(self, columns):
+        """Задает список числовых колонок и обновляет зависящие от него описания и разбор выражений"""
+        self.numeric_columns = columns
+        self.param_registry = ParamRegistry(self.numeric_columns, self.describe_param)
+        # Колонки выражений разрешаются по numeric_columns - прежние результаты разбора устарели
+        self.parsed_expressions = {}
 
     def get_numeric_data(self, column):
         """Безопасно извлекает числовые данные из колонки"""
+        # Представление поверх общего хранилища в кэше - без копирования
+        if column in self.numeric_store:
+            return self.numeric_store[column]
+
+        self.ensure_columns([column])
         if column not in self.df.columns:
             return pd.Series([], dtype=float)
 
@@ -1099,6 +4592,7 @@ class GalaxyAnalyzer:
     def get_galaxy_names_for_values(self, column, values):
         """Получает названия галактик для заданных значений параметра"""
         result = []
+        self.ensure_columns([column])
         for val in values:
             # Ищем галактики с близким значением параметра (из-за float точности)
             numeric_col = self.df[column]
@@ -1126,45 +4620,56 @@ class GalaxyAnalyzer:
         return f"Галактика_{index + 1}"
 
     def search_galaxies(self, search_term):
-        """Поиск галактик по названию"""
+        """
+        Поиск галактик по названию: все названия, содержащие строку поиска (без учета регистра)
+
+        Для строки короче трех символов по готовому индексу - названия, начинающиеся с нее
+        (см. NameSearchIndex.search_names).
+        """
         if not search_term:
             return self.galaxy_names
 
         search_term = search_term.lower().strip()
-        results = []
+        index = self.name_search_index
+        if index is not None:
+            return index.search_names(search_term)
 
-        for name in self.galaxy_names:
-            if search_term in name.lower():
-                results.append(name)
-
-        return results[:50]  # Ограничиваем результаты для производительности
+        # Индекс еще строится - перебираем названия
+        return [name for name in self.galaxy_names if search_term in name.lower()]
 
     def get_galaxy_data(self, galaxy_name):
         """Получает все данные для конкретной галактики"""
+        if self.galaxy_index is None:
+            return None
+
         # Ищем по нашему списку названий
-        if galaxy_name in self.galaxy_names:
-            idx = self.galaxy_names.index(galaxy_name)
-            return self.df.iloc[idx]
+        position = self.galaxy_index.find_name(galaxy_name)
+        if position is not None:
+            return self.get_galaxy_row(position)
 
         # Пробуем найти по PGC номеру
         if galaxy_name.upper().startswith('PGC'):
             try:
-                pgc_num = int(galaxy_name[3:])
-                if 'pgc' in self.df.columns:
-                    # Сравниваем как числа
-                    pgc_series = pd.to_numeric(self.df['pgc'], errors='coerce')
-                    mask = pgc_series == pgc_num
-                    if mask.any():
-                        return self.df[mask].iloc[0]
-            except:
+                position = self.galaxy_index.find_pgc(int(galaxy_name[3:]))
+                if position is not None:
+                    return self.get_galaxy_row(position)
+            except ValueError:
                 pass
 
+        # Пробуем найти по обозначению без учета регистра, разделителей и ведущих нулей
+        position = self.galaxy_index.find_designation(galaxy_name)
+        if position is not None:
+            return self.get_galaxy_row(position)
+
         # Пробуем найти по частичному совпадению в objname
-        if 'objname' in self.df.columns:
-            mask = self.df['objname'].astype(str).str.lower().str.contains(
-                galaxy_name.lower(), na=False)
-            if mask.any():
-                return self.df[mask].iloc[0]
+        position = self.galaxy_index.find_objname_substring(galaxy_name)
+        if position is not None:
+            return self.get_galaxy_row(position)
+
+        # Пробуем найти ближайшее обозначение того же каталога (опечатки в номере)
+        position = self.galaxy_index.find_fuzzy(galaxy_name)
+        if position is not None:
+            return self.get_galaxy_row(position)
 
         return None
 
@@ -1490,109 +4995,26 @@ class GalaxyAnalyzer:
         text_widget.configure(state='disabled')
 
     def get_param_info(self, col_name):
-        """Возвращает русское описание параметра"""
-        param_descriptions = {
-            'pgc': 'Номер в каталоге PGC',
-            'objname': 'Основное название объекта',
-            'objtype': 'Тип объекта (G=галактика; S=звезда...)',
-            'al1950': 'Прямое восхождение 1950 (часы)',
-            'de1950': 'Склонение 1950 (градусы)',
-            'al2000': 'Прямое восхождение 2000 (часы)',
-            'de2000': 'Склонение 2000 (градусы)',
-            'l2': 'Галактическая долгота (градусы)',
-            'b2': 'Галактическая широта (градусы)',
-            'sgl': 'Сверхгалактическая долгота (градусы)',
-            'sgb': 'Сверхгалактическая широта (градусы)',
-            'type': 'Морфологический тип',
-            'bar': 'Галактика с баром (B)',
-            'ring': 'Галактика с кольцом (R)',
-            'multiple': 'Кратная галактика (M)',
-            'compactness': 'Компактность (C) или диффузность (D)',
-            't': 'Код морфологического типа',
-            'e_t': 'Ошибка кода морфологического типа',
-            'logd25': 'Логарифм видимого диаметра (d25 в 0.1 угл. мин)',
-            'e_logd25': 'Ошибка логарифма видимого диаметра',
-            'logr25': 'Логарифм отношения осей (большая/малая ось)',
-            'e_logr25': 'Ошибка логарифма отношения осей',
-            'pa': 'Позиционный угол большой оси (Север-Восток)',
-            'brief': 'Средняя эффективная поверхностная яркость',
-            'e_brief': 'Ошибка средней эффективной поверхностной яркости',
-            'logdc': 'Логарифм скорректированного видимого диаметра (dc в 0.1 угл. мин)',
-            'bt': 'Полная B-звездная величина',
-            'e_bt': 'Ошибка полной B-звездная величина',
-            'it': 'Полная I-звездная величина',
-            'e_it': 'Ошибка полной I-звездная величина',
-            'ut': 'Полная U-звездная величина',
-            'e_ut': 'Ошибка полной U-звездной величины',
-            'vt': 'Полная V-звездная величина',
-            'e_vt': 'Ошибка полной V-звездной величины',
-            'kt': 'Полная K-звездная величина',
-            'e_kt': 'Ошибка полной K-звездной величины',
-            'ube': 'Эффективный цвет U-B',
-            'bve': 'Эффективный цвет B-V',
-            'ubtc': 'Скорректированный полный цвет U-B',
-            'bvtc': 'Скорректированный полный цвет B-V',
-            'vmaxg': 'Видимая максимальная скорость вращения газа',
-            'e_vmaxg': 'Ошибка видимой максимальной скорости вращения газа',
-            'vmaxs': 'Видимая максимальная скорость вращения звезд',
-            'e_vmaxs': 'Ошибка видимой максимальной скорости вращения звезд',
-            'vdis': 'Центральная дисперсия скоростей',
-            'e_vdis': 'Ошибка центральной дисперсии скоростей',
-            'vrot': 'Максимальная скорость вращения, скорректированная на наклон',
-            'e_vrot': 'Ошибка максимальной скорости вращения',
-            'vrad': 'Гелиоцентрическая лучевая скорость (радио)',
-            'e_vrad': 'Ошибка гелиоцентрической лучевой скорости (радио)',
-            'vopt': 'Гелиоцентрическая лучевая скорость (оптическая)',
-            'e_vopt': 'Ошибка гелиоцентрической лучевой скорости (оптическая)',
-            'v': 'Средняя гелиоцентрическая лучевая скорость',
-            'e_v': 'Ошибка средней гелиоцентрической лучевой скорости',
-            'vlg': 'Лучевая скорость относительно Местной группы',
-            'vgsr': 'Лучевая скорость относительно GSR',
-            'vvir': 'Лучевая скорость, скорректированная на падение на Virgo',
-            'v3k': 'Лучевая скорость относительно реликтового излучения',
-            'm21': 'Поток линии 21 см в звездных величинах',
-            'e_m21': 'Ошибка потока линии 21 см',
-            'mfir': 'Звездная величина в дальнем ИК-диапазоне',
-            'm21c': 'Скорректированный потока линии 21 см в звездных величинах',
-            'hic': 'Индекс 21 см btc-m21c в звездных величинах',
-            'ag': 'Галактическое поглощение в B-диапазоне',
-            'ai': 'Внутреннее поглощение из-за наклона в B-диапазоне',
-            'a21': 'Самопоглощение на линии 21 см',
-            'incl': 'Наклон между лучом зрения и полярной осей галактики',
-            'btc': 'Скорректированная полная B-звездная величина',
-            'itc': 'Скорректированная полная I-звездная величина',
-            'mg2': 'Центральный индекс Линка Mg2',
-            'e_mg2': 'Ошибка центрального индекса Линка Mg2',
-            'logavmm': 'Логарифм среднего значения',
-            'e_logavmm': 'Ошибка логарифма среднего значения',
-            'modz': 'Космологический модуль расстояния (от vvir с ΛCDM)',
-            'e_modz': 'Ошибка космологического модуля расстояния',
-            'mod0': 'Модуль расстояния от измерений расстояния',
-            'e_mod0': 'Ошибка модуля расстояния от измерений расстояния',
-            'mabs': 'Абсолютная B-звездная величина',
-            'e_mabs': 'Ошибка абсолютной B-звездной величины',
-            'modbest': 'Лучший модуль расстояния (комбинация mod0 и modz)',
-            'e_modbest': 'Ошибка лучшего модуля расстояния',
-            'bri25': 'Средняя поверхностная яркость внутри изофоты 25',
-            'numtype': 'Числовой тип',
-            'hptr': 'Указатель',
-            'agnclass': 'Класс активности активного ядра',
-            'f_astrom': 'Флаг точности астрометрии',
-            'name': 'Название',
-            'id': 'Идентификатор',
-            'stage': 'Стадия Хаббла',
-            'mtype': 'Морфологический тип',
-            'b': 'Параметр бара',
-        }
+        """Возвращает русское описание параметра (из таблицы описаний текущей загрузки)"""
+        if self.param_registry is not None:
+            return dict(self.param_registry.get(col_name))
+        return self.describe_param(col_name)
 
+    def describe_param(self, col_name):
+        """Определяет русское описание параметра по таблице PARAM_DESCRIPTIONS или по имени колонки"""
         col_lower = col_name.lower().strip()
 
-        if col_lower in param_descriptions:
-            ru_name = param_descriptions[col_lower]
+        for derived in self.derived_columns:
+            if derived.name == col_name:
+                return {'name': col_name, 'ru_name': f"Производная колонка: {derived.expression}",
+                        'unit': 'расчетная величина'}
+
+        if col_lower in self.PARAM_DESCRIPTIONS:
+            ru_name = self.PARAM_DESCRIPTIONS[col_lower]
         else:
             clean_col = re.sub(r'^e_', '', col_lower)
-            if clean_col in param_descriptions:
-                ru_name = f"Ошибка {param_descriptions[clean_col]}"
+            if clean_col in self.PARAM_DESCRIPTIONS:
+                ru_name = f"Ошибка {self.PARAM_DESCRIPTIONS[clean_col]}"
             else:
                 ru_name = self.generate_param_description(col_name)
 
@@ -1684,9 +5106,8 @@ class GalaxyAnalyzer:
         scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=listbox.yview)
         listbox.configure(yscrollcommand=scrollbar.set)
 
-        for col in self.numeric_columns:
-            param_info = self.get_param_info(col)
-            listbox.insert(tk.END, f"{col} - {param_info['ru_name']}")
+        registry = self.param_registry
+        listbox.insert(tk.END, *registry.labels)
 
         listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -1706,12 +5127,8 @@ class GalaxyAnalyzer:
                 list_window.destroy()
 
         def update_list(*args):
-            search_term = search_var.get().lower()
             listbox.delete(0, tk.END)
-            for col in self.numeric_columns:
-                param_info = self.get_param_info(col)
-                if search_term in col.lower() or search_term in param_info['ru_name'].lower():
-                    listbox.insert(tk.END, f"{col} - {param_info['ru_name']}")
+            listbox.insert(tk.END, *registry.filter(search_var.get().lower()))
 
         ttk.Button(button_frame, text="Выбрать", command=select_parameter).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Отмена", command=list_window.destroy).pack(side=tk.LEFT, padx=5)
@@ -1722,8 +5139,8 @@ class GalaxyAnalyzer:
     def reload_file(self):
         """Перезагрузка текущего файла"""
         if self.current_file_path:
-            self.load_data()
-            messagebox.showinfo("Успех", f"Файл {os.path.basename(self.current_file_path)} перезагружен")
+            file_name = os.path.basename(self.current_file_path)
+            self.load_data(on_complete=lambda: messagebox.showinfo("Успех", f"Файл {file_name} перезагружен"))
         else:
             messagebox.showwarning("Предупреждение", "Нет загруженного файла для перезагрузки")
 
@@ -1753,15 +5170,42 @@ class GalaxyAnalyzer:
             info_text += f"Размер файла: {os.path.getsize(self.current_file_path) / 1024:.1f} KB\n\n"
 
         info_text += f"Размер данных: {self.df.shape[0]} строк × {self.df.shape[1]} столбцов\n"
+        if self.lazy_catalog is not None:
+            info_text += (f"Ленивый режим: разобрано {self.df.shape[1]} из "
+                          f"{len(self.lazy_catalog.columns)} колонок файла\n")
         info_text += f"Числовых параметров: {len(self.numeric_columns)}\n"
-        info_text += f"Названий галактик: {len(self.galaxy_names)}\n\n"
+        info_text += f"Названий галактик: {len(self.galaxy_names)}\n"
+        for source in self.catalog_sources:
+            info_text += (f"Присоединенный каталог: {source.name} (найдено {source.matched} галактик, "
+                          f"колонок: {len(source.column_map)})\n")
+
+        memory = CompactStorage.memory_by_column(self.df)
+        memory_before = self.memory_report['before'] if self.memory_report else {}
+        total_mb = sum(memory.values()) / 1024 ** 2
+        if memory_before:
+            info_text += (f"Память данных: {sum(memory_before.values()) / 1024 ** 2:.2f} MB -> "
+                          f"{total_mb:.2f} MB (компактное хранение)\n\n")
+        else:
+            info_text += f"Память данных: {total_mb:.2f} MB\n\n"
+
+        cache = self.series_cache.stats()
+        info_text += (f"Кэш рядов параметров: {cache['entries']} рядов, "
+                      f"{cache['bytes'] / 1024 ** 2:.2f} из {cache['max_bytes'] / 1024 ** 2:.0f} MB, "
+                      f"попаданий: {cache['hits']}, промахов: {cache['misses']}, "
+                      f"вытеснено: {cache['evictions']}\n\n")
 
         info_text += "СТОЛБЦЫ ДАННЫХ:\n"
         info_text += "-" * 30 + "\n"
         for col in self.df.columns:
             non_null = self.df[col].notna().sum()
             param_info = self.get_param_info(col)
-            info_text += f"{col}: {non_null} значений ({param_info['ru_name']})\n"
+            info_text += f"{col}: {non_null} значений ({param_info['ru_name']})"
+            if col in self.unparseable_counts:
+                info_text += f", нечисловых: {self.unparseable_counts[col]}"
+            info_text += f", {self.df[col].dtype}, память: "
+            if col in memory_before:
+                info_text += f"{memory_before[col] / 1024:.1f} -> "
+            info_text += f"{memory[col] / 1024:.1f} KB\n"
 
         info_text += f"\nПЕРВЫЕ 5 ГАЛАКТИК:\n"
         info_text += "-" * 30 + "\n"
@@ -1771,12 +5215,60 @@ class GalaxyAnalyzer:
         text_widget.insert(1.0, info_text)
         text_widget.configure(state='disabled')
 
+    def show_load_profile(self):
+        """Показать профиль последней загрузки с возможностью сохранить его в JSON"""
+        if self.load_profile is None:
+            messagebox.showinfo("Профиль загрузки", "Файл еще не загружался")
+            return
+
+        profile = self.load_profile
+        profile_window = tk.Toplevel(self.root)
+        profile_window.title("Профиль загрузки")
+        profile_window.geometry("620x360")
+
+        header = f"Файл: {os.path.basename(profile.file_path or '')}\n"
+        header += f"Начало загрузки: {profile.started} | Способ: {profile.mode}\n\n"
+
+        text_widget = tk.Text(profile_window, wrap=tk.NONE, font=('Courier', 10))
+        text_widget.insert(1.0, header + profile.format_table())
+        text_widget.configure(state='disabled')
+
+        def save_profile():
+            path = filedialog.asksaveasfilename(
+                title="Сохранить профиль загрузки",
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            )
+            if not path:
+                return
+            try:
+                profile.save_json(path)
+                messagebox.showinfo("Успех", f"Профиль загрузки сохранен в {path}")
+            except OSError as e:
+                messagebox.showerror("Ошибка", f"Не удалось сохранить профиль: {e}")
+
+        btns = ttk.Frame(profile_window)
+        btns.pack(side=tk.BOTTOM, fill=tk.X, pady=(0, 10))
+        ttk.Button(btns, text="Сохранить JSON", command=save_profile).pack(side=tk.LEFT, padx=10)
+        ttk.Button(btns, text="Закрыть", command=profile_window.destroy).pack(side=tk.LEFT)
+        text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    def filter_galaxies(self):
+        """Фильтрация списка галактик по строке поиска при вводе"""
+        search_term = self.search_var.get().strip()
+        results = self.search_galaxies(search_term)
+        self.galaxy_combo.set_values(results)
+        if search_term:
+            self.search_count_label.config(text=f"Найдено: {len(results)}")
+        else:
+            self.search_count_label.config(text="")
+
     def search_galaxy(self):
         """Поиск галактики по названию"""
         search_term = self.search_var.get().strip()
 
         if not search_term:
-            self.galaxy_combo['values'] = self.galaxy_names
+            self.galaxy_combo.set_values(self.galaxy_names)
             if self.galaxy_names:
                 self.galaxy_combo.set(self.galaxy_names[0])
             messagebox.showinfo("Поиск", "Введите название галактики для поиска")
@@ -1785,13 +5277,13 @@ class GalaxyAnalyzer:
         results = self.search_galaxies(search_term)
 
         if results:
-            self.galaxy_combo['values'] = results
+            self.galaxy_combo.set_values(results)
             self.galaxy_combo.set(results[0])
             messagebox.showinfo("Результаты поиска",
                                 f"Найдено галактик: {len(results)}\nПервая: {results[0]}")
         else:
             messagebox.showinfo("Поиск", "Галактики не найдены")
-            self.galaxy_combo['values'] = self.galaxy_names
+            self.galaxy_combo.set_values(self.galaxy_names)
             if self.galaxy_names:
                 self.galaxy_combo.set(self.galaxy_names[0])
 
@@ -1818,92 +5310,165 @@ class GalaxyAnalyzer:
             self.search_var.set('')
 
     def parse_parameter_expression(self, param_expr):
-        """Парсит выражение параметра, может быть простым параметром или выражением"""
+        """
+        Парсит выражение параметра, может быть простым параметром или выражением
+
+        Колонки выражения - это его настоящие идентификаторы (v в vt-v не путается с vt и vrot).
+        Результат разбора запоминается для строки выражения до следующего поиска числовых колонок.
+        """
         if not param_expr or not param_expr.strip():
             return None
 
         expr = param_expr.strip()
+        if expr in self.parsed_expressions:
+            return self.parsed_expressions[expr]
 
         if expr in self.numeric_columns:
-            return {
+            param_info = {
                 'type': 'simple',
                 'column': expr,
                 'expression': expr
             }
-
-        try:
-            if any(op in expr for op in ['+', '-', '*', '/', '(', ')']):
-                columns_in_expr = [col for col in self.numeric_columns if col in expr]
-
-                if columns_in_expr:
-                    return {
-                        'type': 'expression',
-                        'expression': expr,
-                        'columns': columns_in_expr
-                    }
-
-            return {
+        else:
+            param_info = {
                 'type': 'unknown',
                 'expression': expr,
                 'columns': []
             }
+            try:
+                compiled = ParameterExpression.compiled(expr)
+                if compiled.names and all(name in self.numeric_columns for name in compiled.names):
+                    param_info = {
+                        'type': 'expression',
+                        'expression': expr,
+                        'columns': compiled.names,
+                        'compiled': compiled
+                    }
+            except (SyntaxError, ValueError):
+                pass
 
-        except:
-            return {
-                'type': 'unknown',
-                'expression': expr,
-                'columns': []
-            }
+        self.parsed_expressions[expr] = param_info
+        return param_info
 
     def get_parameter_data(self, param_expr):
-        """Получает данные для параметра (простого или выражения)"""
+        """
+        Получает данные для параметра (простого или выражения)
+
+        Вычисленные ряды хранятся в кэше по версии данных, поэтому повторные построения
+        с теми же параметрами не пересчитывают выражения. Возвращаемый ряд общий с кэшем
+        и не должен изменяться на месте.
+        """
         param_info = self.parse_parameter_expression(param_expr)
 
         if param_info is None:
             return pd.Series([], dtype=float)
 
+        # Колонки общего хранилища и так доступны без копирования
+        if param_info['type'] == 'simple' and param_info['column'] in self.numeric_store:
+            return self.numeric_store[param_info['column']]
+
+        key = (self.data_version, param_expr.strip())
+        data = self.series_cache.get(key)
+        if data is None:
+            data = self.compute_parameter_data(param_info)
+            self.series_cache.put(key, data)
+        return data
+
+    def compute_parameter_data(self, param_info):
+        """Вычисляет ряд параметра по результату parse_parameter_expression"""
         if param_info['type'] == 'simple':
             return self.get_numeric_data(param_info['column'])
 
         elif param_info['type'] == 'expression':
-            results = []
-            valid_indices = []
-
-            safe_dict = {
-                'abs': abs, 'min': min, 'max': max, 'sum': sum, 'len': len,
-                'log': np.log, 'log10': np.log10, 'exp': np.exp, 'sqrt': np.sqrt,
-                'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
-                'pi': np.pi, 'e': np.e
-            }
+            self.ensure_columns(param_info['columns'])
+            try:
+                values = {col: self.df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                          for col in param_info['columns']}
+                result = param_info['compiled'].evaluate_columns(values, len(self.df),
+                                                                 self.load_settings['expression_engine'])
+            except (ZeroDivisionError, ValueError, TypeError, SyntaxError, NameError):
+                return pd.Series([], dtype=float)
 
-            for idx, row in self.df.iterrows():
-                try:
-                    row_data = {}
-                    has_all_data = True
+            # Строки с пропуском в любой из колонок выражения и с нечисловым результатом отбрасываются
+            valid = np.isfinite(result)
+            for column_values in values.values():
+                valid &= ~np.isnan(column_values)
+            return pd.Series(result[valid], index=self.df.index[valid])
 
-                    for col in param_info['columns']:
-                        value = row[col]
-                        if pd.isna(value):
-                            has_all_data = False
-                            break
-                        row_data[col] = value
+        return pd.Series([], dtype=float)
 
-                    if not has_all_data:
-                        continue
+    def evaluate_expressions(self, expressions):
+        """
+        Вычисляет сразу много параметров (колонок и выражений) за один проход по каталогу
 
-                    eval_dict = {**row_data, **safe_dict}
-                    result = eval(param_info['expression'], {"__builtins__": {}}, eval_dict)
+        Общие подвыражения и входные колонки вычисляются и проверяются один раз (ExpressionBatch).
 
-                    if pd.notna(result) and np.isfinite(result):
-                        results.append(result)
-                        valid_indices.append(idx)
+        Args:
+            expressions: Список параметров в том же виде, что и для get_parameter_data
 
-                except (ZeroDivisionError, ValueError, TypeError, SyntaxError, NameError):
+        Returns:
+            tuple: (pd.DataFrame значений по строкам self.df, с NaN в недопустимых строках;
+                    pd.DataFrame масок допустимости: True там, где значение вошло бы в результат
+                    get_parameter_data). Колонки - выражения без крайних пробелов, без повторов.
+        """
+        expressions = list(dict.fromkeys(expr.strip() for expr in expressions))
+        length = len(self.df) if self.df is not None else 0
+        index = self.df.index if self.df is not None else pd.RangeIndex(0)
+        values = {expr: np.full(length, np.nan) for expr in expressions}
+        valid = {expr: np.zeros(length, dtype=bool) for expr in expressions}
+
+        simple, batched = [], []
+        for expr in expressions:
+            param_info = self.parse_parameter_expression(expr) if self.df is not None else None
+            if param_info is not None and param_info['type'] == 'simple':
+                simple.append(expr)
+            elif param_info is not None and param_info['type'] == 'expression':
+                batched.append(expr)
+
+        # Колонка без выражения берется как есть: get_numeric_data отбрасывает только пропуски
+        self.ensure_columns(simple)
+        for col in simple:
+            if col in self.df.columns:
+                try:
+                    column_values = self.df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                except (ValueError, TypeError) as e:
+                    print(f"Колонка {col} не приводится к числам: {e}")
                     continue
+                values[col] = column_values
+                valid[col] = ~np.isnan(column_values)
+
+        if batched:
+            batch = ExpressionBatch(batched)
+            self.ensure_columns(batch.names)
+            # Входные колонки приводятся к float64 так же, как в compute_parameter_data; выражения
+            # с колонкой, которая не приводится к числам, остаются полностью недопустимыми
+            columns, errors = {}, {}
+            for name in batch.names:
+                try:
+                    columns[name] = self.df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+                except (ValueError, TypeError) as e:
+                    errors[name] = str(e)
+            if errors:
+                for expr, names in zip(batch.expressions, batch.inputs):
+                    for name in names:
+                        if name in errors:
+                            print(f"Выражение {expr} не вычислено: колонка {name}: {errors[name]}")
+                            break
+                batch = ExpressionBatch([expr for expr, names in zip(batch.expressions, batch.inputs)
+                                         if not any(name in errors for name in names)])
 
-            return pd.Series(results, index=valid_indices)
-
-        return pd.Series([], dtype=float)
+            try:
+                batch_values, batch_valid, failed = batch.evaluate(columns, length)
+            except (ArithmeticError, ValueError, TypeError) as e:
+                batch_values, batch_valid, failed = {}, {}, {}
+                print(f"Выражения не вычислены: {e}")
+            values.update(batch_values)
+            valid.update(batch_valid)
+            for expr, error in failed.items():
+                print(f"Выражение {expr} не вычислено: {error}")
+
+        return (pd.DataFrame(values, index=index, columns=expressions, copy=False),
+                pd.DataFrame(valid, index=index, columns=expressions, copy=False))
 
     def get_parameter_info(self, param_expr):
         """Возвращает информацию о параметре (простом или выражении)"""
@@ -1951,17 +5516,9 @@ class GalaxyAnalyzer:
                     value = galaxy_data[col]
                     if pd.isna(value):
                         return np.nan
-                    row_data[col] = value
-
-                safe_dict = {
-                    'abs': abs, 'min': min, 'max': max, 'sum': sum, 'len': len,
-                    'log': np.log, 'log10': np.log10, 'exp': np.exp, 'sqrt': np.sqrt,
-                    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
-                    'pi': np.pi, 'e': np.e
-                }
+                    row_data[col] = np.float64(value)
 
-                eval_dict = {**row_data, **safe_dict}
-                result = eval(param_info['expression'], {"__builtins__": {}}, eval_dict)
+                result = param_info['compiled'].evaluate(row_data)
                 return result if pd.notna(result) and np.isfinite(result) else np.nan
 
             except (ZeroDivisionError, ValueError, TypeError, SyntaxError, NameError):
@@ -2379,6 +5936,117 @@ class GalaxyAnalyzer:
     def show_plot_settings(self):
         """Показать окно настроек графика"""
 
+    def show_load_settings(self):
+        """Показать окно настроек загрузки данных"""
+        settings_window = tk.Toplevel(self.root)
+        settings_window.title("Настройки загрузки")
+        settings_window.geometry("460x540")
+        settings_window.resizable(False, False)
+        main_frame = ttk.Frame(settings_window, padding=12)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(main_frame, text="Настройки загрузки данных", font=('Arial', 12, 'bold')).pack(pady=(0, 8))
+
+        use_cache_var = tk.BooleanVar(value=self.load_settings['use_cache'])
+        ttk.Checkbutton(main_frame, text="Использовать бинарный кэш каталога",
+                        variable=use_cache_var).pack(anchor=tk.W, pady=2)
+
+        streaming_var = tk.BooleanVar(value=self.load_settings['streaming'])
+        ttk.Checkbutton(main_frame, text="Потоковая загрузка частями (большие файлы)",
+                        variable=streaming_var).pack(anchor=tk.W, pady=2)
+
+        lazy_var = tk.BooleanVar(value=self.load_settings['lazy'])
+        ttk.Checkbutton(main_frame, text="Ленивое открытие (колонки разбираются при первом обращении)",
+                        variable=lazy_var).pack(anchor=tk.W, pady=2)
+
+        watch_var = tk.BooleanVar(value=self.load_settings['watch_file'])
+        ttk.Checkbutton(main_frame, text="Следить за файлом и подгружать дописанные строки",
+                        variable=watch_var).pack(anchor=tk.W, pady=2)
+
+        arrow_var = tk.BooleanVar(value=self.load_settings['engine'] == 'pyarrow')
+        arrow_check = ttk.Checkbutton(main_frame, text="Многопоточное чтение CSV (pyarrow)", variable=arrow_var)
+        arrow_check.pack(anchor=tk.W, pady=2)
+        if not CatalogReader.arrow_available():
+            arrow_check.config(state='disabled', text="Многопоточное чтение CSV (pyarrow не установлен)")
+
+        numexpr_var = tk.BooleanVar(value=self.load_settings['expression_engine'] == 'numexpr')
+        numexpr_check = ttk.Checkbutton(main_frame, text="Многопоточное вычисление выражений (numexpr)",
+                                        variable=numexpr_var)
+        numexpr_check.pack(anchor=tk.W, pady=2)
+        if not ParameterExpression.numexpr_available():
+            numexpr_check.config(state='disabled', text="Многопоточное вычисление выражений (numexpr не установлен)")
+
+        compact_var = tk.BooleanVar(value=self.load_settings['compact'])
+        ttk.Checkbutton(main_frame, text="Компактное хранение (float32 и категориальные колонки)",
+                        variable=compact_var).pack(anchor=tk.W, pady=2)
+
+        verbose_var = tk.BooleanVar(value=self.load_settings['verbose'])
+        ttk.Checkbutton(main_frame, text="Подробный вывод в консоль (структура данных, профиль)",
+                        variable=verbose_var).pack(anchor=tk.W, pady=2)
+
+        float32_var = tk.BooleanVar(value=self.load_settings['float32'])
+        ttk.Checkbutton(main_frame, text="Хранить числовые колонки как float32",
+                        variable=float32_var).pack(anchor=tk.W, pady=2)
+
+        validate_int_cmd = self.root.register(lambda P: P.isdigit() or P == "")
+
+        chunk_frame = ttk.Frame(main_frame)
+        chunk_frame.pack(fill=tk.X, pady=6)
+        ttk.Label(chunk_frame, text="Строк в одной части:").pack(side=tk.LEFT)
+        chunksize_var = tk.StringVar(value=str(self.load_settings['chunksize']))
+        ttk.Entry(chunk_frame, textvariable=chunksize_var, width=10,
+                  validate='key', validatecommand=(validate_int_cmd, '%P')).pack(side=tk.LEFT, padx=(8, 0))
+
+        usecols_frame = ttk.Frame(main_frame)
+        usecols_frame.pack(fill=tk.X, pady=6)
+        ttk.Label(usecols_frame, text="Загружаемые колонки (через запятую):").pack(anchor=tk.W)
+        usecols_var = tk.StringVar(value=", ".join(self.load_settings['usecols'] or []))
+        ttk.Entry(usecols_frame, textvariable=usecols_var, width=50).pack(anchor=tk.W, pady=(4, 0))
+        ttk.Label(usecols_frame, text="Оставьте пустым, чтобы загрузить все колонки", foreground='gray',
+                  font=(None, 8)).pack(anchor=tk.W)
+
+        categorical_frame = ttk.Frame(main_frame)
+        categorical_frame.pack(fill=tk.X, pady=6)
+        ttk.Label(categorical_frame, text="Категориальные колонки (через запятую):").pack(anchor=tk.W)
+        categorical_var = tk.StringVar(value=", ".join(self.load_settings['categorical_columns']))
+        ttk.Entry(categorical_frame, textvariable=categorical_var, width=50).pack(anchor=tk.W, pady=(4, 0))
+
+        def apply_load_settings():
+            try:
+                chunksize = int(chunksize_var.get())
+            except ValueError:
+                messagebox.showerror("Ошибка", "Некорректное количество строк в части")
+                return
+            if chunksize < 1000:
+                messagebox.showerror("Ошибка", "Количество строк в части должно быть не меньше 1000")
+                return
+
+            usecols = [col.strip() for col in usecols_var.get().split(',') if col.strip()]
+            categorical = [col.strip() for col in categorical_var.get().split(',') if col.strip()]
+
+            self.load_settings.update({
+                'use_cache': use_cache_var.get(),
+                'streaming': streaming_var.get(),
+                'chunksize': chunksize,
+                'usecols': usecols or None,
+                'float32': float32_var.get(),
+                'categorical_columns': categorical,
+                'lazy': lazy_var.get(),
+                'watch_file': watch_var.get(),
+                'engine': 'pyarrow' if arrow_var.get() else 'pandas',
+                'compact': compact_var.get(),
+                'verbose': verbose_var.get(),
+                'expression_engine': 'numexpr' if numexpr_var.get() else 'numpy',
+            })
+
+            settings_window.destroy()
+            messagebox.showinfo("Успех", "Настройки загрузки применены. Они вступят в силу при следующей загрузке файла")
+
+        btns = ttk.Frame(main_frame)
+        btns.pack(fill=tk.X, pady=(12, 0))
+        ttk.Button(btns, text="Применить", command=apply_load_settings).pack(side=tk.LEFT, padx=6)
+        ttk.Button(btns, text="Отмена", command=settings_window.destroy).pack(side=tk.LEFT, padx=6)
+
     def show_distribution_settings(self):
         """Показать окно настроек для графика распределения (distribution)"""
         if self.plot_type.get() not in ("distribution", "histogram"):
@@ -3865,7 +7533,7 @@ class GalaxyAnalyzer:
             shown_count = 0
 
             for col in main_params:
-                if col in self.df.columns:
+                if col in galaxy_data.index:
                     value = galaxy_data[col]
                     if pd.notna(value):
                         param_info = self.get_param_info(col)
@@ -3925,6 +7593,9 @@ class GalaxyAnalyzer:
 
 
 if __name__ == "__main__":
+    # Бэкенд Tk выбирается только при запуске приложения: модуль импортируется и без дисплея
+    # (бенчмарки, тесты)
+    matplotlib.use('TkAgg')
     root = tk.Tk()
     app = GalaxyAnalyzer(root)
     root.mainloop()
\ No newline at end of file
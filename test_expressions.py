@@ -0,0 +1,94 @@
+"""Тесты вычисления выражений параметров: numexpr и поблочный numpy против прямого вычисления numpy
+
+Запуск: python -m pytest test_expressions.py
+"""
+import numpy as np
+import pytest
+
+from NIR_graphics import ParameterExpression
+
+# Больше двух блоков с неполным последним, чтобы проверить границы блоков
+LENGTH = ParameterExpression.BLOCK_ROWS * 2 + 17
+
+EXPRESSIONS = [
+    'bt - vt',
+    '(bt - vt) / (vrot - vrot)',
+    'bt / zero',
+    '-bt / zero',
+    'log(vrot)',
+    'log10(vrot - 100)',
+    'sqrt(vrot - 150)',
+    'exp(bt / 10) * pi - e',
+    'abs(vrot) ** 0.5 + 2 * n',
+    'max(bt, vt) - min(bt, vt)',
+    'bt % 3 + vt // 2',
+    'sin(bt) ** 2 + cos(bt) ** 2 - tan(vt)',
+    'n / 2 + f32',
+]
+
+
+def make_columns(seed=0):
+    """Колонки с пропусками, нулями, отрицательными значениями и разными типами"""
+    rng = np.random.default_rng(seed)
+    bt = rng.normal(14, 1, LENGTH)
+    bt[rng.random(LENGTH) < 0.1] = np.nan
+    vt = rng.normal(13, 1, LENGTH)
+    vt[::7] = np.nan
+    vrot = rng.normal(150, 80, LENGTH)  # Часть значений отрицательна: log и sqrt дают NaN
+    vrot[::11] = 0.0
+    return {
+        'bt': bt,
+        'vt': vt,
+        'vrot': vrot,
+        'zero': np.where(rng.random(LENGTH) < 0.5, 0.0, 1.0),
+        'n': rng.integers(-5, 5, LENGTH),
+        'f32': rng.normal(0, 1, LENGTH).astype(np.float32),
+    }
+
+
+def reference(expression, columns):
+    """Прямое вычисление numpy над целыми колонками"""
+    return np.broadcast_to(np.asarray(ParameterExpression(expression).evaluate(columns), dtype=np.float64),
+                           (LENGTH,))
+
+
+def assert_same_values(actual, expected, rtol=0.0):
+    """Совпадение значений, включая позиции NaN и бесконечностей с их знаком"""
+    assert actual.shape == expected.shape
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_array_equal(np.isposinf(actual), np.isposinf(expected))
+    np.testing.assert_array_equal(np.isneginf(actual), np.isneginf(expected))
+    finite = np.isfinite(expected)
+    np.testing.assert_allclose(actual[finite], expected[finite], rtol=rtol, atol=0)
+
+
+@pytest.mark.parametrize('expression', EXPRESSIONS)
+def test_numpy_blocks_match_whole_columns(expression):
+    columns = make_columns()
+    result = ParameterExpression(expression).evaluate_columns(columns, LENGTH, engine='numpy')
+    assert result.dtype == np.float64
+    assert_same_values(result, reference(expression, columns))
+
+
+@pytest.mark.skipif(not ParameterExpression.numexpr_available(), reason="numexpr не установлен")
+@pytest.mark.parametrize('expression', EXPRESSIONS)
+def test_numexpr_matches_numpy(expression):
+    columns = make_columns()
+    result = ParameterExpression(expression).evaluate_columns(columns, LENGTH, engine='numexpr')
+    assert result.dtype == np.float64
+    # numexpr использует свои реализации функций: расхождения - в последних разрядах
+    assert_same_values(result, reference(expression, columns), rtol=1e-9)
+
+
+@pytest.mark.parametrize('engine', ['numpy', 'numexpr'])
+def test_constant_expression_fills_column(engine):
+    result = ParameterExpression('2 * pi').evaluate_columns({}, LENGTH, engine=engine)
+    assert result.shape == (LENGTH,)
+    assert np.all(result == 2 * np.pi)
+
+
+def test_numexpr_text_keeps_numpy_only_operations_on_numpy():
+    assert ParameterExpression('bt % 3').numexpr_text is None
+    assert ParameterExpression('bt // 2').numexpr_text is None
+    assert ParameterExpression('max(bt, vt)').numexpr_text is None
+    assert ParameterExpression('log10(vrot) + 1').numexpr_text == 'log10(vrot) + 1.0'